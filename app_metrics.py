@@ -0,0 +1,289 @@
+import bisect
+import cProfile
+import heapq
+import http.server
+import logging
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process instrumentation for the Streamlit apps, exposed in the OpenMetrics
+# text format.
+#
+# Streamlit serves every session from one process and keeps imported modules
+# across reruns, so the metrics live at module level and accumulate for the life
+# of the server. Each app script calls begin_rerun() first and end_rerun() last;
+# reruns cut short by st.rerun() or st.stop() are not recorded. Collection is
+# always on and costs a few microseconds per rerun; exposing it is opt-in:
+#
+#   GRANT_METRICS_PORT=9464            serve /metrics over HTTP on that port, on
+#                                      GRANT_METRICS_HOST (default 127.0.0.1; set
+#                                      0.0.0.0 to let another host scrape it)
+#   GRANT_METRICS_FILE=metrics.txt     rewrite the file at most every
+#                                      GRANT_METRICS_INTERVAL seconds (default 15)
+#   GRANT_PROFILE_DIR=profiles         run every rerun under cProfile and keep
+#                                      dumps of the GRANT_PROFILE_KEEP (default 5)
+#                                      slowest; read them with pstats or snakeviz
+
+METRICS_HOST = os.environ.get("GRANT_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("GRANT_METRICS_PORT") or 0)
+METRICS_FILE = os.environ.get("GRANT_METRICS_FILE")
+METRICS_INTERVAL = float(os.environ.get("GRANT_METRICS_INTERVAL", "15"))
+PROFILE_DIR = os.environ.get("GRANT_PROFILE_DIR")
+PROFILE_KEEP = int(os.environ.get("GRANT_PROFILE_KEEP", "5"))
+
+# A session counts as active if it reran within this many seconds
+SESSION_IDLE_SECONDS = float(os.environ.get("GRANT_METRICS_SESSION_IDLE", "300"))
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+log = logging.getLogger(__name__)
+
+_LABEL_ESCAPES = re.compile(r'[\\"\n]')
+
+
+def _label_value(value):
+    return _LABEL_ESCAPES.sub(lambda m: {"\\": "\\\\", '"': '\\"', "\n": "\\n"}[m.group()], str(value))
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as OpenMetrics expects."""
+
+    def __init__(self, name, help, labels, buckets, unit=""):
+        self.name, self.help, self.label_names, self.unit = name, help, tuple(labels), unit
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def exposition(self):
+        lines = [f"# TYPE {self.name} histogram", f"# HELP {self.name} {self.help}"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, hits in zip((*map(float, self.buckets), "+Inf"), counts):
+                cumulative += hits
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total:.6f}")
+        return lines
+
+
+class Sessions:
+    """Last rerun time per (app, session id); reports sessions seen within SESSION_IDLE_SECONDS."""
+
+    name = "grant_app_active_sessions"
+
+    def __init__(self):
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def touch(self, app, session_id):
+        with self._lock:
+            self._seen[app, session_id] = time.monotonic()
+
+    def active(self):
+        cutoff = time.monotonic() - SESSION_IDLE_SECONDS
+        counts = {}
+        with self._lock:
+            for key, seen in list(self._seen.items()):
+                if seen < cutoff:
+                    del self._seen[key]
+                else:
+                    counts[key[0]] = counts.get(key[0], 0) + 1
+        return counts
+
+    def exposition(self):
+        lines = [f"# TYPE {self.name} gauge", f"# HELP {self.name} Sessions that reran in the last "
+                 f"{SESSION_IDLE_SECONDS:g} seconds"]
+        lines += [f"{self.name}{_labels(('app',), (app,))} {count}" for app, count in sorted(self.active().items())]
+        return lines
+
+
+_MS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RERUN_SECONDS = Histogram("grant_app_rerun_seconds", "Script rerun duration by app and selected section",
+                          ("app", "section"), _MS, unit="seconds")
+EVALUATION_SECONDS = Histogram("grant_app_evaluation_seconds", "Results rule evaluation time",
+                               ("app",), (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25), unit="seconds")
+EXPORT_SECONDS = Histogram("grant_app_export_seconds", "Draft export build time by format",
+                           ("app", "format"), _MS, unit="seconds")
+STATE_BYTES = Histogram("grant_app_state_bytes", "Pickled size of a session's answers at the end of a rerun",
+                        ("app",), (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304), unit="bytes")
+SESSIONS = Sessions()
+
+# Recorded by scoring_api.py; result is hit (answered from the cache), shared
+# (joined an evaluation already in flight) or evaluated
+SCORING_SECONDS = Histogram("grant_scoring_request_seconds", "Scoring API request time by result",
+                            ("jurisdiction", "result"), (0.0005, *_MS), unit="seconds")
+SCORING_BATCH = Histogram("grant_scoring_batch_size", "Distinct answer sets evaluated per scoring batch",
+                          (), (1, 2, 4, 8, 16, 32, 64, 128, 256))
+
+METRICS = [RERUN_SECONDS, EVALUATION_SECONDS, EXPORT_SECONDS, STATE_BYTES, SESSIONS, SCORING_SECONDS, SCORING_BATCH]
+
+
+def exposition():
+    """Every metric in the OpenMetrics text format."""
+    lines = []
+    for metric in METRICS:
+        lines += metric.exposition()
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server_lock = threading.Lock()
+_server = None
+_last_file_write = 0.0
+
+
+def serve(port=METRICS_PORT, host=METRICS_HOST):
+    """Start the /metrics endpoint once per process (a no-op when port is 0 or it is already running)."""
+    global _server
+    if not port or _server is not None:
+        return _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as exc:
+                log.warning("metrics endpoint not started on %s:%s: %s", host, port, exc)
+                _server = False
+                return _server
+            threading.Thread(target=_server.serve_forever, name="grant-metrics", daemon=True).start()
+    return _server
+
+
+def write_file(path=METRICS_FILE, force=False):
+    """Atomically rewrite the metrics file, at most every METRICS_INTERVAL seconds unless forced."""
+    global _last_file_write
+    now = time.monotonic()
+    if not path or not force and now - _last_file_write < METRICS_INTERVAL:
+        return
+    _last_file_write = now
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(exposition())
+    os.replace(tmp, path)
+
+
+class _SlowestProfiles:
+    """Keeps cProfile dumps of the slowest reruns, deleting ones that drop out of the top."""
+
+    def __init__(self, directory, keep):
+        self.directory, self.keep = directory, keep
+        self._kept = []     # min-heap of (seconds, path)
+        self._lock = threading.Lock()
+
+    def offer(self, profile, seconds, app, section):
+        with self._lock:
+            if len(self._kept) >= self.keep and seconds <= self._kept[0][0]:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            name = re.sub(r"[^\w.-]+", "_", f"{app}-{section}")
+            path = os.path.join(self.directory, f"rerun-{seconds * 1000:.0f}ms-{name}-{time.time_ns()}.prof")
+            profile.dump_stats(path)
+            heapq.heappush(self._kept, (seconds, path))
+            if len(self._kept) > self.keep:
+                _, dropped = heapq.heappop(self._kept)
+                try:
+                    os.remove(dropped)
+                except OSError:
+                    pass
+
+
+_profiles = _SlowestProfiles(PROFILE_DIR, PROFILE_KEEP) if PROFILE_DIR else None
+
+
+class Rerun:
+    __slots__ = ("start", "profile")
+
+    def __init__(self):
+        self.profile = None
+        if _profiles is not None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.start = time.perf_counter()
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def begin_rerun():
+    """Call first thing in an app script; pass the result to end_rerun()."""
+    serve()
+    return Rerun()
+
+
+def state_size(state):
+    # Compact records (response_records.ResponseRecord) serialize themselves without their layout
+    dumps = getattr(state, "dumps", None)
+    try:
+        return len(dumps() if dumps else pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+def end_rerun(rerun, app, section="", state=None):
+    """Record a finished rerun of app: its duration under section, and the size of the session's answers."""
+    seconds = time.perf_counter() - rerun.start
+    if rerun.profile is not None:
+        rerun.profile.disable()
+        _profiles.offer(rerun.profile, seconds, app, section)
+    RERUN_SECONDS.observe(seconds, app, section)
+    if state is not None:
+        size = state_size(state)
+        if size is not None:
+            STATE_BYTES.observe(size, app)
+    SESSIONS.touch(app, _session_id())
+    write_file()
@@ -0,0 +1,130 @@
+"""Draft archive import/export benchmark.
+
+Fills a scratch draft database with synthetic drafts, exports it as a zip
+archive in each format, imports the archive into a second database and
+checks every draft comes back identical, section order included. Reports,
+per number of drafts and format:
+
+  export_ms / import_ms    wall time for the whole archive
+  export_kb / import_kb    peak traced Python memory while streaming it, which
+                           should not grow with the number of drafts
+  archive_kb               archive size
+
+    python benchmarks/archive_roundtrip.py
+    python benchmarks/archive_roundtrip.py --sizes 100 2000 --formats csv
+    python benchmarks/archive_roundtrip.py --check              # compare with baselines/archive_roundtrip.json
+    python benchmarks/archive_roundtrip.py --update-baseline
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_common import find_regressions, load_baseline, save_baseline, use_repo_path
+from draft_search import SECTIONS, paragraph
+
+use_repo_path()
+
+from draft_archive import FORMATS, export_archive, import_archive  # noqa: E402
+from draft_store import DraftStore  # noqa: E402
+
+
+def synthetic_draft(rng, n, words):
+    sections = {"Organization Name": f"Organization {n}", "Grant Source and Entity Type": "Family Foundations",
+                "Entity Type": "Non-profit entity", "Program Title": f"Program {n}"}
+    for section in SECTIONS:
+        # Multi-paragraph text with quotes and commas exercises CSV quoting
+        sections[section] = f'{paragraph(rng, words)}\n\n"{paragraph(rng, words // 4)}", {n}'
+    return sections
+
+
+def traced(fn):
+    """Run fn traced for its peak memory, then again untraced for its time; returns (seconds, peak bytes)."""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, peak
+
+
+def measure(drafts, fmt, words, seed):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="grant-archive-") as workdir:
+        source = DraftStore(os.path.join(workdir, "source.db"))
+        for start in range(0, drafts, 100):
+            source.import_drafts(synthetic_draft(rng, n, words) for n in range(start, min(start + 100, drafts)))
+        path = os.path.join(workdir, f"drafts-{fmt}.zip")
+        export_s, export_peak = traced(lambda: export_archive(source, path, fmt))
+
+        targets = []
+
+        def load():
+            target = DraftStore(os.path.join(workdir, f"target{len(targets)}.db"))
+            targets.append(target)
+            for line in import_archive(target, path):
+                if line.error:
+                    raise AssertionError(f"{line.member}: {line.error}")
+
+        import_s, import_peak = traced(load)
+        for target in targets:
+            exported = source.iter_drafts()
+            for draft_id, sections in target.iter_drafts():
+                _, expected = next(exported)
+                if list(sections.items()) != list(expected.items()):
+                    raise AssertionError(f"draft {draft_id} does not round-trip through {fmt}")
+            if next(exported, None) is not None:
+                raise AssertionError(f"drafts missing after a {fmt} round trip")
+            target.close()
+        source.close()
+        archive_kb = os.path.getsize(path) / 1024
+
+    return {
+        "export_ms": round(export_s * 1000, 1),
+        "import_ms": round(import_s * 1000, 1),
+        "export_kb": round(export_peak / 1024, 1),
+        "import_kb": round(import_peak / 1024, 1),
+        "archive_kb": round(archive_kb, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="numbers of drafts")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--words", type=int, default=250, help="words per section")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if worse than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed growth as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {f"{fmt}:{size}": measure(size, fmt, args.words, args.seed)
+               for fmt in args.formats for size in args.sizes}
+
+    print(f"{'case':<12}{'export ms':>11}{'import ms':>11}{'export kb':>11}{'import kb':>11}{'archive kb':>12}")
+    for case, r in results.items():
+        print(f"{case:<12}{r['export_ms']:>11.1f}{r['import_ms']:>11.1f}{r['export_kb']:>11.1f}"
+              f"{r['import_kb']:>11.1f}{r['archive_kb']:>12.1f}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('archive_roundtrip', results)}")
+    if args.check:
+        baseline = load_baseline("archive_roundtrip")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        checked = {case: {m: r[m] for m in ("export_ms", "import_ms", "export_kb", "import_kb")}
+                   for case, r in results.items()}
+        regressions = find_regressions(checked, baseline, args.tolerance, min_delta=50.0)
+        for case, metric, base, value in regressions:
+            print(f"REGRESSION {case} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
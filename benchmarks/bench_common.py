@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+
+# Shared helpers for the benchmark scripts in this directory
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+APPS = {
+    "federal": "federal-business-grant-eligibility-checker-v1.py",
+    "minnesota": "minnesota-business-grant-eligibility-checker-v1.py",
+    "template": "grantwritingtemplatev1.py",
+    "checker": "grant_eligibility_checker.py",
+}
+
+
+def app_path(app):
+    return os.path.join(REPO_ROOT, APPS[app])
+
+
+def app_env(workdir=None):
+    """Environment for running an app outside `streamlit run`.
+
+    `streamlit run` puts the script's directory on sys.path; AppTest and bare
+    subprocesses don't, so the repo root is added explicitly. Stateful apps
+    get a scratch draft database instead of the working directory's.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    workdir = workdir or tempfile.mkdtemp(prefix="grant-bench-")
+    env.setdefault("GRANT_DRAFTS_DB", os.path.join(workdir, "drafts.db"))
+    return env
+
+
+def use_repo_path():
+    """Make the apps' sibling modules importable in this process."""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+
+def load_baseline(name):
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def find_regressions(results, baseline, tolerance, min_delta=0.0):
+    """Compare {key: {metric: value}} results against a baseline of the same shape.
+
+    A metric regresses when it exceeds the baseline by more than tolerance
+    (a fraction) and by more than min_delta (an absolute floor that keeps
+    tiny, noisy measurements from tripping the check). Returns a list of
+    (key, metric, baseline_value, value).
+    """
+    regressions = []
+    for key, metrics in results.items():
+        for metric, value in metrics.items():
+            base = (baseline or {}).get(key, {}).get(metric)
+            if not isinstance(base, (int, float)) or not isinstance(value, (int, float)):
+                continue
+            if value > base * (1 + tolerance) and value - base > min_delta:
+                regressions.append((key, metric, base, value))
+    return regressions
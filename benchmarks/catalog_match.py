@@ -0,0 +1,147 @@
+"""Program catalog matching benchmark.
+
+Builds synthetic catalogs of growing size from the seed catalog's vocabulary,
+then measures:
+
+  build_ms   indexing the catalog (done once per process in the apps)
+  query_ms   median time for one top-k query over a fixed set of random profiles
+
+Each query's result is checked against a brute-force scan of the catalog, so
+the benchmark also guards the index's correctness.
+
+    python benchmarks/catalog_match.py
+    python benchmarks/catalog_match.py --sizes 1000 50000 --queries 500
+    python benchmarks/catalog_match.py --check              # compare with baselines/catalog_match.json
+    python benchmarks/catalog_match.py --update-baseline
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from bench_common import find_regressions, load_baseline, save_baseline, use_repo_path
+
+use_repo_path()
+
+from program_catalog import NUMBER_DIMS, TAG_DIMS, Profile, build_index, load_catalog  # noqa: E402
+
+NUMBER_SCALES = {"employees": 500, "revenue": 5_000_000, "years": 30, "jobs": 50, "wage": 60}
+
+
+def vocabulary():
+    """Tags per dimension, as used by the seed catalog."""
+    tags = {dim: set() for dim in TAG_DIMS}
+    for program in load_catalog().programs:
+        for criteria in (program.requires, program.prefers):
+            for dim, values in criteria.items():
+                tags[dim].update(values)
+    return {dim: sorted(values) for dim, values in tags.items()}
+
+
+def synthetic_catalog(size, vocab, rng):
+    programs = []
+    for i in range(size):
+        spec = {"id": f"p{i}", "name": f"Program {i}", "scope": rng.choice(vocab["scope"]),
+                "requires": {}, "prefers": {}, "ranges": {}}
+        for dim in TAG_DIMS[1:]:
+            if rng.random() < 0.35:
+                spec["requires"][dim] = rng.sample(vocab[dim], rng.randint(1, min(3, len(vocab[dim]))))
+            if rng.random() < 0.3:
+                spec["prefers"][dim] = rng.sample(vocab[dim], rng.randint(1, min(2, len(vocab[dim]))))
+        for dim in NUMBER_DIMS:
+            if rng.random() < 0.3:
+                # Round limits, as real programs use, so boundaries repeat across the catalog
+                scale = NUMBER_SCALES[dim]
+                low, high = sorted(round(rng.uniform(0, scale), -1 if scale > 100 else 0) for _ in range(2))
+                spec["ranges"][dim] = rng.choice([[low, None], [None, high], [low, high]])
+        programs.append(spec)
+    return {"programs": programs}
+
+
+def random_profile(vocab, rng):
+    tags = {dim: frozenset(rng.sample(vocab[dim], rng.randint(0, min(2, len(vocab[dim]))))) for dim in TAG_DIMS}
+    tags["scope"] = frozenset(rng.sample(vocab["scope"], rng.randint(1, len(vocab["scope"]))))
+    numbers = {dim: round(rng.uniform(0, NUMBER_SCALES[dim])) for dim in NUMBER_DIMS}
+    return Profile(tags, numbers)
+
+
+def brute_force(index, profile, k):
+    def eligible(program):
+        for dim, tags in program.requires.items():
+            if not set(tags) & profile.tags.get(dim, frozenset()):
+                return False
+        for dim, (low, high) in program.ranges.items():
+            value = profile.numbers.get(dim)
+            if value is not None and (low is not None and value < low or high is not None and value > high):
+                return False
+        return True
+
+    scored = []
+    for i, program in enumerate(index.programs):
+        if eligible(program):
+            hits = sum(len(set(tags) & profile.tags.get(dim, frozenset())) for dim, tags in program.prefers.items())
+            scored.append((-(2 * index.specificity[i] + hits), i))
+    return [i for _, i in sorted(scored)[:k]]
+
+
+def measure(size, queries, k, seed):
+    rng = random.Random(seed)
+    vocab = vocabulary()
+    catalog = synthetic_catalog(size, vocab, rng)
+    start = time.perf_counter()
+    index = build_index(catalog)
+    build_ms = (time.perf_counter() - start) * 1000
+    positions = {program.id: i for i, program in enumerate(index.programs)}
+    profiles = [random_profile(vocab, rng) for _ in range(queries)]
+    timings, matched = [], []
+    for profile in profiles:
+        start = time.perf_counter()
+        matches = index.top(profile, k)
+        timings.append(time.perf_counter() - start)
+        matched.append(bin(index.candidates(profile)).count("1"))
+        expected = brute_force(index, profile, k)
+        if [positions[m.program.id] for m in matches] != expected:
+            raise AssertionError(f"index and brute force disagree for {profile}")
+    return {
+        "build_ms": round(build_ms, 1),
+        "query_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_query_ms": round(sorted(timings)[int(len(timings) * 0.95)] * 1000, 3),
+        "median_candidates": statistics.median(matched),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10, help="programs returned per query")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if slower than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {str(size): measure(size, args.queries, args.k, args.seed) for size in args.sizes}
+
+    print(f"{'programs':>10}{'build ms':>11}{'query ms':>11}{'p95 query ms':>14}{'candidates':>12}")
+    for size, r in results.items():
+        print(f"{size:>10}{r['build_ms']:>11.1f}{r['query_ms']:>11.3f}{r['p95_query_ms']:>14.3f}"
+              f"{r['median_candidates']:>12g}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('catalog_match', results)}")
+    if args.check:
+        baseline = load_baseline("catalog_match")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        checked = {size: {m: r[m] for m in ("build_ms", "query_ms")} for size, r in results.items()}
+        regressions = find_regressions(checked, baseline, args.tolerance, min_delta=1.0)
+        for size, metric, base, value in regressions:
+            print(f"REGRESSION {size} programs {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
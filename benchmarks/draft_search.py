@@ -0,0 +1,125 @@
+"""Draft full-text search benchmark.
+
+Fills scratch draft databases of growing size with synthetic narrative
+sections, then measures:
+
+  edit_ms    median time to save a one-word edit (history + search index update)
+  query_ms   median / p95 time of a BM25 search with snippets, with and
+             without a section filter
+
+    python benchmarks/draft_search.py
+    python benchmarks/draft_search.py --sizes 200 2000 --queries 100
+    python benchmarks/draft_search.py --check              # compare with baselines/draft_search.json
+    python benchmarks/draft_search.py --update-baseline
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench_common import find_regressions, load_baseline, save_baseline, use_repo_path
+
+use_repo_path()
+
+from draft_store import DraftStore  # noqa: E402
+
+SECTIONS = ["Executive Summary", "Organization Description", "Program Statement Need", "Program Description",
+            "Goals Description", "Program Activities", "Timeline", "Staff", "Evaluation", "Budget", "Summary"]
+TOPIC_WORDS = ("youth literacy rural community outcomes evaluation survey mentoring workforce training housing "
+               "health nutrition families partners volunteers capacity measurable baseline quarterly annual "
+               "participants enrollment retention grant funding match staff coordinator curriculum pilot expand "
+               "access equity underserved county school district library digital broadband clinic seniors "
+               "veterans employment apprenticeship childcare transportation food pantry climate energy").split()
+
+# Narrative text follows a Zipf distribution: a few words everywhere, most words rare.
+# Topic words are mixed into a larger synthetic vocabulary at mid-frequency ranks.
+VOCABULARY = [f"w{n}" for n in range(20)] + TOPIC_WORDS + [f"w{n}" for n in range(20, 8000)]
+WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+
+def paragraph(rng, words):
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=words)).capitalize() + "."
+
+
+def fill(store, drafts, words, rng):
+    for i in range(drafts):
+        draft_id = store.create_draft(f"Organization {i}", f"Program {i}")
+        store.save_sections(draft_id, {section: paragraph(rng, words) for section in SECTIONS},
+                            positions={section: n for n, section in enumerate(SECTIONS)})
+
+
+def measure(drafts, queries, words, seed):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="grant-search-") as workdir:
+        store = DraftStore(os.path.join(workdir, "drafts.db"))
+        fill(store, drafts, words, rng)
+
+        # A typical autosave: one word changed in one section
+        edits = []
+        for _ in range(queries):
+            draft_id, section = rng.randint(1, drafts), rng.choice(SECTIONS)
+            text = store.load_draft(draft_id)[section].split(" ")
+            text[rng.randrange(len(text))] = rng.choice(TOPIC_WORDS)
+            start = time.perf_counter()
+            store.save_sections(draft_id, {section: " ".join(text)})
+            edits.append(time.perf_counter() - start)
+
+        plain, filtered = [], []
+        for _ in range(queries):
+            text = " ".join(rng.sample(TOPIC_WORDS, 2))
+            start = time.perf_counter()
+            store.search(text)
+            plain.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            store.search(text, sections=[rng.choice(SECTIONS)])
+            filtered.append(time.perf_counter() - start)
+        store.close()
+
+    def ms(samples, fraction=0.5):
+        return round(sorted(samples)[int(len(samples) * fraction)] * 1000, 2)
+
+    return {
+        "edit_ms": ms(edits),
+        "query_ms": ms(plain),
+        "p95_query_ms": ms(plain, 0.95),
+        "filtered_query_ms": ms(filtered),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000], help="numbers of drafts")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--words", type=int, default=250, help="words per section")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if slower than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {str(size): measure(size, args.queries, args.words, args.seed) for size in args.sizes}
+
+    print(f"{'drafts':>8}{'edit ms':>10}{'query ms':>10}{'p95 query ms':>14}{'filtered ms':>13}")
+    for size, r in results.items():
+        print(f"{size:>8}{r['edit_ms']:>10.2f}{r['query_ms']:>10.2f}{r['p95_query_ms']:>14.2f}"
+              f"{r['filtered_query_ms']:>13.2f}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('draft_search', results)}")
+    if args.check:
+        baseline = load_baseline("draft_search")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        checked = {size: {m: r[m] for m in ("edit_ms", "query_ms", "filtered_query_ms")}
+                   for size, r in results.items()}
+        regressions = find_regressions(checked, baseline, args.tolerance, min_delta=2.0)
+        for size, metric, base, value in regressions:
+            print(f"REGRESSION {size} drafts {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
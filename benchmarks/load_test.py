@@ -0,0 +1,434 @@
+"""Concurrent-session load test against a real `streamlit run` server.
+
+Starts an app under `streamlit run` (or attaches to one with --url) and opens
+N simulated browser sessions at once over Streamlit's websocket protocol. Each
+scripted user does what rerun_latency.py's AppTest walk does: visits every
+entry of the sidebar `sections` radio, fills in each widget of the main area
+one interaction at a time, and clicks the action buttons ("Generate Results",
+"Prepare Download"). An interaction is timed from sending the widget change to
+the script-finished message of the rerun it caused.
+
+N ramps up through --users; for each stage the report gives the interaction
+count, p50/p95/p99 latency, error rate (reruns that raised, timed out or lost
+their connection), throughput and the server's peak resident memory.
+
+With --workers N, N servers are started on one shared session store
+(GRANT_SESSION_STORE, see response_records.py) and every user reconnects to
+the next worker before each section, carrying its ?sid= token, as users behind
+a load balancer would after a failover. RSS is then the workers' total.
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py minnesota --users 1 10 50 --rounds 2 --think 0.5
+    python benchmarks/load_test.py federal --workers 4 --users 10 50
+    python benchmarks/load_test.py --url http://localhost:8501 --pid 12345 federal
+    python benchmarks/load_test.py --check              # compare with baselines/load_test.json
+    python benchmarks/load_test.py --update-baseline
+
+Uses tornado's websocket client, which Streamlit already depends on.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from bench_common import APPS, app_env, app_path, find_regressions, load_baseline, save_baseline
+
+CHECKED_METRICS = ("p95_ms", "max_rss_mb")
+ACTION_BUTTONS = {"Generate Results", "Prepare Download"}
+SAMPLE_WORDS = ("Our program expands access to small business technical assistance "
+                "across rural and urban communities with measurable outcomes").split()
+
+# ScriptFinishedStatus values (streamlit/proto/ForwardMsg.proto)
+FINISHED_WITH_COMPILE_ERROR = 1
+FINISHED_EARLY_FOR_RERUN = 2
+
+INPUT_KINDS = ("radio", "selectbox", "multiselect", "number_input", "date_input", "text_input", "text_area")
+
+
+def sample_text(words):
+    return " ".join(SAMPLE_WORDS[i % len(SAMPLE_WORDS)] for i in range(words))
+
+
+def answer(kind, widget, words):
+    """The (WidgetState field, value) a scripted user enters into a widget."""
+    if kind in ("radio", "selectbox"):
+        return "int_value", 0
+    if kind == "multiselect":
+        return "int_array_value", [i for i, o in enumerate(widget.options) if o != "None"][:2]
+    if kind == "number_input":
+        value = 12 if widget.data_type == widget.INT else 25000.0
+        if widget.has_max:
+            value = min(value, widget.max)
+        if widget.has_min:
+            value = max(value, widget.min)
+        return ("int_value", int(value)) if widget.data_type == widget.INT else ("double_value", float(value))
+    if kind == "date_input":
+        return "string_array_value", ["2020/01/01"]
+    if kind == "text_input":
+        return "string_value", "Hennepin" if widget.id.endswith("-county") else sample_text(4)
+    return "string_value", sample_text(words)
+
+
+class SessionError(Exception):
+    pass
+
+
+class Session:
+    """One browser tab: a websocket to the server and the widget values it would send back."""
+
+    def __init__(self, url, timeout, query=""):
+        self.url = url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+        self.timeout = timeout
+        self.query = query
+        self.ws = None
+        self.page_hash = ""
+        self.values = {}        # widget id -> (field, value), as the frontend keeps them
+        self.widgets = []       # (area, kind, proto) drawn by the last finished rerun
+        self._cache = {}        # message hash -> ForwardMsg, for ref_hash messages
+
+    async def open(self):
+        from tornado.websocket import websocket_connect
+
+        self.ws = await asyncio.wait_for(websocket_connect(self.url, max_message_size=64 << 20), self.timeout)
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def _receive(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        data = await self.ws.read_message()
+        if data is None:
+            raise SessionError("connection closed")
+        msg = ForwardMsg()
+        msg.ParseFromString(data)
+        if msg.WhichOneof("type") == "ref_hash":
+            if msg.ref_hash not in self._cache:
+                raise SessionError(f"unknown cached message {msg.ref_hash}")
+            cached = ForwardMsg()
+            cached.CopyFrom(self._cache[msg.ref_hash])
+            cached.metadata.CopyFrom(msg.metadata)
+            msg = cached
+        elif msg.hash:
+            self._cache[msg.hash] = msg
+        return msg
+
+    async def rerun(self, trigger=None):
+        """Send the current widget values (and a button press) and wait for the rerun to finish.
+
+        Returns True when the rerun raised in the app.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        back = BackMsg()
+        back.rerun_script.page_script_hash = self.page_hash
+        back.rerun_script.query_string = self.query
+        drawn = {widget.id for _, _, widget in self.widgets}
+        for widget_id, (field, value) in self.values.items():
+            if widget_id in drawn:
+                state = back.rerun_script.widget_states.widgets.add(id=widget_id)
+                if field.endswith("_array_value"):
+                    getattr(state, field).data.extend(value)
+                else:
+                    setattr(state, field, value)
+        if trigger is not None:
+            back.rerun_script.widget_states.widgets.add(id=trigger, trigger_value=True)
+        await self.ws.write_message(back.SerializeToString(), binary=True)
+        return await asyncio.wait_for(self._read_run(), self.timeout)
+
+    async def _read_run(self):
+        widgets, raised = [], False
+        while True:
+            msg = await self._receive()
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.page_hash = msg.new_session.page_script_hash
+                widgets, raised = [], False
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    raised = True
+                elif element_type in INPUT_KINDS or element_type == "button":
+                    area = "sidebar" if msg.metadata.delta_path[0] == 1 else "main"
+                    widgets.append((area, element_type, getattr(element, element_type)))
+            elif kind == "script_finished":
+                if msg.script_finished == FINISHED_WITH_COMPILE_ERROR:
+                    raise SessionError("script failed to compile")
+                if msg.script_finished != FINISHED_EARLY_FOR_RERUN:
+                    self.widgets = widgets
+                    return raised
+
+
+class User:
+    """A scripted user walking an app, recording each interaction's latency and outcome."""
+
+    def __init__(self, urls, words, think, timeout, rng):
+        self.urls, self.timeout = urls, timeout
+        # The token a shared session store keys answers by; ignored by a single worker
+        self.query = f"sid=load{rng.getrandbits(64):016x}"
+        self.session = Session(urls[0], timeout, self.query)
+        self.words, self.think, self.rng = words, think, rng
+        self.latencies = []
+        self.raised = 0     # interactions whose rerun raised in the app
+        self.failed = 0     # interactions that timed out or lost the connection
+
+    async def interact(self, widget_id=None, value=None, trigger=False):
+        if widget_id is not None and not trigger:
+            self.session.values[widget_id] = value
+        start = time.perf_counter()
+        try:
+            raised = await self.session.rerun(widget_id if trigger else None)
+        except (SessionError, asyncio.TimeoutError, OSError) as exc:
+            self.failed += 1
+            raise SessionError(str(exc) or type(exc).__name__) from exc
+        self.latencies.append(time.perf_counter() - start)
+        if raised:
+            self.raised += 1
+        if self.think:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.think))
+
+    def find(self, area, kind, label):
+        for widget_area, widget_kind, widget in self.session.widgets:
+            if (widget_area, widget_kind, widget.label) == (area, kind, label):
+                return widget
+        return None
+
+    async def fill_section(self):
+        filled = set()
+        while True:
+            # Ids of unkeyed widgets change with their default, so they're told apart by label
+            pending = [(kind, widget) for area, kind, widget in self.session.widgets
+                       if area == "main" and kind in INPUT_KINDS and (kind, widget.label) not in filled]
+            if not pending:
+                break
+            # One widget per interaction; widgets revealed by an answer are picked up next pass
+            kind, widget = pending[0]
+            filled.add((kind, widget.label))
+            await self.interact(widget.id, answer(kind, widget, self.words))
+        for area, kind, widget in list(self.session.widgets):
+            if area == "main" and kind == "button" and widget.label in ACTION_BUTTONS:
+                await self.interact(widget.id, trigger=True)
+
+    async def connect(self, url):
+        self.session.close()
+        self.session = Session(url, self.timeout, self.query)
+        try:
+            await self.session.open()
+        except (asyncio.TimeoutError, OSError) as exc:
+            self.failed += 1
+            raise SessionError(str(exc) or type(exc).__name__) from exc
+        await self.interact()
+
+    async def walk(self):
+        try:
+            await self.connect(self.urls[0])
+            radio = self.find("sidebar", "radio", "Jump to Section")
+            if radio is None:
+                await self.fill_section()
+                return
+            for index in range(len(radio.options)):
+                if index and len(self.urls) > 1:
+                    await self.connect(self.urls[index % len(self.urls)])
+                    radio = self.find("sidebar", "radio", "Jump to Section")
+                await self.interact(radio.id, ("int_value", index))
+                await self.fill_section()
+        except SessionError:
+            # Counted in interact(); this user's walk can't continue on a broken session
+            pass
+        finally:
+            self.session.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, env=None, timeout=60):
+    port = free_port()
+    command = [sys.executable, "-m", "streamlit", "run", app_path(app),
+               "--server.headless", "true", "--server.port", str(port), "--server.address", "127.0.0.1",
+               "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"]
+    server = subprocess.Popen(command, env={**app_env(), **(env or {})}, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited: {server.stderr.read().decode(errors='replace')}")
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return server, url
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"streamlit did not become healthy within {timeout} s")
+
+
+def rss_mb(pid):
+    """Resident set size of a process from /proc, or None where that isn't available."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def total_rss_mb(pids):
+    sizes = [rss_mb(pid) for pid in pids]
+    return sum(sizes) if sizes and None not in sizes else None
+
+
+async def sample_rss(pids, peak, interval=0.2):
+    while True:
+        rss = total_rss_mb(pids)
+        if rss is not None:
+            peak[0] = max(peak[0] or 0.0, rss)
+        await asyncio.sleep(interval)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_stage(urls, pids, users, rounds, words, think, timeout, seed):
+    peak = [total_rss_mb(pids)]
+    sampler = asyncio.ensure_future(sample_rss(pids, peak)) if pids else None
+    # Users start spread over the workers, as a round-robin balancer would place them
+    walkers = [User(urls[n % len(urls):] + urls[:n % len(urls)], words, think, timeout, random.Random(seed + n))
+               for n in range(users * rounds)]
+    start = time.perf_counter()
+    for n in range(rounds):
+        # Each round opens a fresh tab per user, like returning visitors
+        await asyncio.gather(*(w.walk() for w in walkers[n * users:(n + 1) * users]))
+    elapsed = time.perf_counter() - start
+    if sampler is not None:
+        sampler.cancel()
+    ms = sorted(s * 1000 for w in walkers for s in w.latencies)
+    failed = sum(w.failed for w in walkers)
+    errors = failed + sum(w.raised for w in walkers)
+    attempts = len(ms) + failed
+    return {
+        "interactions": len(ms),
+        "p50_ms": round(statistics.median(ms), 1) if ms else None,
+        "p95_ms": round(percentile(ms, 0.95), 1) if ms else None,
+        "p99_ms": round(percentile(ms, 0.99), 1) if ms else None,
+        "error_rate": round(errors / max(attempts, 1), 4),
+        "per_second": round(len(ms) / elapsed, 1),
+        "max_rss_mb": round(peak[0], 1) if peak[0] is not None else None,
+    }
+
+
+def measure(app, urls, pids, args):
+    results = {}
+    # One untimed walk per worker warms imports, caches and the rule tables, as the first real visitor would
+    asyncio.run(run_stage(urls, pids, len(urls), 1, args.words, 0, args.timeout, args.seed))
+    suffix = f"@{len(urls)}" if len(urls) > 1 else ""
+    for users in args.users:
+        results[f"{app}:{users}{suffix}"] = asyncio.run(
+            run_stage(urls, pids, users, args.rounds, args.words, args.think, args.timeout, args.seed))
+    return results
+
+
+def start_workers(app, workers, workdir):
+    """Start workers servers for app, sharing one session store when there are several."""
+    env = {}
+    if workers > 1:
+        env["GRANT_SESSION_STORE"] = os.environ.get("GRANT_SESSION_STORE") or os.path.join(workdir, "sessions.db")
+    servers = []
+    try:
+        for _ in range(workers):
+            servers.append(start_server(app, env))
+    except BaseException:
+        stop_servers(s for s, _ in servers)
+        raise
+    return servers
+
+
+def stop_servers(servers):
+    for server in servers:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("apps", nargs="*", metavar="app",
+                        help=f"apps to load (default: federal, minnesota and template; any of {', '.join(APPS)})")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 25], help="concurrent sessions per stage")
+    parser.add_argument("--rounds", type=int, default=1, help="walks per user in each stage")
+    parser.add_argument("--words", type=int, default=200, help="words typed into each text area")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between interactions, in seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before an interaction counts as failed")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=1, help="servers to start on a shared session store")
+    parser.add_argument("--url", nargs="+", default=[],
+                        help="load already running servers instead of starting them (one app only)")
+    parser.add_argument("--pid", type=int, nargs="+", default=[],
+                        help="with --url, the servers' process ids for RSS sampling")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regression vs. the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed growth as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+    apps = args.apps or ["federal", "minnesota", "template"]
+    unknown = set(apps) - set(APPS)
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(sorted(unknown))}")
+    if args.url and len(apps) != 1:
+        parser.error("--url loads a single app; name it")
+
+    results = {}
+    for app in apps:
+        if args.url:
+            results.update(measure(app, args.url, args.pid, args))
+            continue
+        # Fresh servers per app, so one app's sessions and caches don't count against the next
+        with tempfile.TemporaryDirectory(prefix="grant-load-") as workdir:
+            servers = start_workers(app, args.workers, workdir)
+            try:
+                results.update(measure(app, [url for _, url in servers], [s.pid for s, _ in servers], args))
+            finally:
+                stop_servers(s for s, _ in servers)
+
+    print(f"{'app:users@workers':<20}{'interactions':>13}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'per s':>8}{'RSS MB':>9}")
+    for key, r in results.items():
+        latency = "".join(f"{r[m]:>9.1f}" if r[m] is not None else f"{'-':>9}" for m in ("p50_ms", "p95_ms", "p99_ms"))
+        rss = f"{r['max_rss_mb']:>9.1f}" if r["max_rss_mb"] is not None else f"{'-':>9}"
+        print(f"{key:<20}{r['interactions']:>13}{latency}{r['error_rate']:>8.1%}{r['per_second']:>8.1f}{rss}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('load_test', results)}")
+    if args.check:
+        baseline = load_baseline("load_test")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        # Latency under load varies with the machine, so only large p95 and memory growth count;
+        # any failed interaction is a regression
+        regressions = find_regressions({k: {m: r[m] for m in CHECKED_METRICS} for k, r in results.items()},
+                                       baseline, args.tolerance, min_delta=50.0)
+        regressions += [(key, "error_rate", 0, r["error_rate"]) for key, r in results.items() if r["error_rate"]]
+        for key, metric, base, value in regressions:
+            print(f"REGRESSION {key} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
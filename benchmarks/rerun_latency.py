@@ -0,0 +1,218 @@
+"""Per-rerun latency and allocation benchmark driven by Streamlit's AppTest.
+
+Each app is driven headlessly the way a user would: every entry of the
+sidebar `sections` radio is visited, every widget in the main area is filled
+in (including ones that only appear after an earlier answer), and the action
+buttons ("Generate Results", "Prepare Download") are clicked. Every
+rerun is timed, and a second pass under tracemalloc records the peak bytes
+allocated by each rerun.
+
+    python benchmarks/rerun_latency.py
+    python benchmarks/rerun_latency.py federal --repeat 5 --verbose
+    python benchmarks/rerun_latency.py --check              # compare with baselines/rerun_latency.json
+    python benchmarks/rerun_latency.py --update-baseline
+
+Baselines are kept per app and per section, including the number of reruns a
+walk takes, so adding sections, widgets or checks shows up in --check.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date
+
+from bench_common import APPS, app_env, app_path, find_regressions, load_baseline, save_baseline, use_repo_path
+
+CHECKED_METRICS = ("median_ms", "max_alloc_kb")
+ACTION_BUTTONS = {"Generate Results", "Prepare Download"}
+SAMPLE_WORDS = ("Our program expands access to small business technical assistance "
+                "across rural and urban communities with measurable outcomes").split()
+
+
+def sample_text(words):
+    return " ".join(SAMPLE_WORDS[i % len(SAMPLE_WORDS)] for i in range(words))
+
+
+def widget_value(kind, widget, words):
+    if kind == "selectbox":
+        return widget.options[0]
+    if kind == "multiselect":
+        return [o for o in widget.options if o != "None"][:2]
+    if kind == "number_input":
+        return 12 if isinstance(widget.value, int) else 25000.0
+    if kind == "date_input":
+        return date(2020, 1, 1)
+    if kind == "text_input":
+        return "Hennepin" if widget.key == "county" else sample_text(4)
+    return sample_text(words)
+
+
+class Walk:
+    """Drive one AppTest session through an app, recording every rerun."""
+
+    def __init__(self, app, words, trace_allocations):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(app_path(app), default_timeout=120)
+        self.words = words
+        self.trace = trace_allocations
+        self.steps = []
+
+    def run(self, label, section, element=None):
+        target = element if element is not None else self.at
+        if self.trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        target.run()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - before if self.trace else None
+        if self.at.exception:
+            raise RuntimeError(f"{label}: {[e.message for e in self.at.exception]}")
+        self.steps.append((section, label, elapsed, peak))
+
+    def fill_section(self, section):
+        filled = set()
+        while True:
+            pending = []
+            for kind in ("selectbox", "multiselect", "number_input", "date_input", "text_input", "text_area"):
+                for widget in getattr(self.at.main, kind):
+                    ident = (kind, widget.key or widget.label)
+                    if ident not in filled:
+                        pending.append((kind, ident, widget))
+            if not pending:
+                break
+            # Fill one widget per rerun, like a user would; newly revealed widgets are picked up next pass
+            kind, ident, widget = pending[0]
+            filled.add(ident)
+            self.run(f"{kind}:{ident[1]}", section, widget.set_value(widget_value(kind, widget, self.words)))
+        for button in self.at.main.button:
+            if button.label in ACTION_BUTTONS:
+                self.run(f"button:{button.label}", section, button.click())
+
+    def walk(self):
+        self.run("initial", "(initial)")
+        radios = [r for r in self.at.sidebar.radio if r.label == "Jump to Section"]
+        if not radios:
+            self.fill_section("(page)")
+            return self.steps
+        for section in radios[0].options:
+            self.run(f"section:{section}", section, self.at.sidebar.radio[0].set_value(section))
+            self.fill_section(section)
+        return self.steps
+
+
+def summarize(app, timings, allocations):
+    """Collapse per-step medians into per-app and per-section metrics."""
+    def metrics(keys):
+        ms = sorted(statistics.median(timings[k]) * 1000 for k in keys)
+        kb = [statistics.median(allocations[k]) / 1024 for k in keys]
+        return {
+            "reruns": len(keys),
+            "median_ms": round(statistics.median(ms), 2),
+            "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 2),
+            "total_ms": round(sum(ms), 2),
+            "max_alloc_kb": round(max(kb), 1),
+        }
+
+    results = {app: metrics(list(timings))}
+    by_section = defaultdict(list)
+    for key in timings:
+        by_section[key[0]].append(key)
+    for section, keys in by_section.items():
+        results[f"{app}:{section}"] = metrics(keys)
+    return results
+
+
+def measure(app, repeat, words, verbose):
+    timings, allocations = defaultdict(list), defaultdict(list)
+    # One untimed walk warms imports and process-wide caches, then each walk starts from a clean heap
+    Walk(app, words, trace_allocations=False).walk()
+    for _ in range(repeat):
+        gc.collect()
+        for section, label, elapsed, _ in Walk(app, words, trace_allocations=False).walk():
+            timings[(section, label)].append(elapsed)
+    tracemalloc.start()
+    try:
+        for section, label, _, peak in Walk(app, words, trace_allocations=True).walk():
+            allocations[(section, label)].append(peak)
+    finally:
+        tracemalloc.stop()
+    if verbose:
+        for key in timings:
+            print(f"  {app:<10} {key[0]:<20} {key[1]:<45} "
+                  f"{statistics.median(timings[key]) * 1000:8.2f} ms {allocations[key][0] / 1024:10.1f} KB")
+    return summarize(app, timings, allocations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("apps", nargs="*", metavar="app", help=f"apps to measure (default: all of {', '.join(APPS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="timed walks per app")
+    parser.add_argument("--words", type=int, default=200, help="words typed into each text area")
+    parser.add_argument("--verbose", action="store_true", help="print every rerun")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regression vs. the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = set(args.apps) - set(APPS)
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(sorted(unknown))}")
+
+    use_repo_path()
+    os.environ.update(app_env())
+    if args.worker:
+        json.dump(measure(args.apps[0], args.repeat, args.words, args.verbose), sys.stdout)
+        return 0
+
+    # Each app is measured in its own interpreter so earlier AppTest sessions don't skew later ones
+    results = {}
+    for app in args.apps or APPS:
+        command = [sys.executable, os.path.abspath(__file__), app, "--worker",
+                   "--repeat", str(args.repeat), "--words", str(args.words)]
+        if args.verbose:
+            command.append("--verbose")
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        *verbose_lines, result = output.splitlines()
+        for line in verbose_lines:
+            print(line)
+        results.update(json.loads(result))
+
+    print(f"{'app / section':<36}{'reruns':>8}{'median ms':>11}{'p95 ms':>9}{'total ms':>10}{'max alloc KB':>14}")
+    for key, r in results.items():
+        print(f"{key:<36}{r['reruns']:>8}{r['median_ms']:>11.2f}{r['p95_ms']:>9.2f}"
+              f"{r['total_ms']:>10.2f}{r['max_alloc_kb']:>14.1f}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('rerun_latency', results)}")
+    if args.check:
+        baseline = load_baseline("rerun_latency")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        # Sections only take a few reruns, so tail and total timings are too noisy to gate on;
+        # medians and allocations are compared with a floor, rerun counts must match exactly
+        regressions = find_regressions(
+            {k: {m: r[m] for m in CHECKED_METRICS} for k, r in results.items()},
+            baseline, args.tolerance, min_delta=5.0,
+        )
+        for key, r in results.items():
+            base = baseline.get(key, {}).get("reruns")
+            if base is None:
+                regressions.append((key, "reruns", "(new)", r["reruns"]))
+            elif r["reruns"] != base:
+                regressions.append((key, "reruns", base, r["reruns"]))
+        for key, metric, base, value in regressions:
+            print(f"REGRESSION {key} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
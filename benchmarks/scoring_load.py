@@ -0,0 +1,209 @@
+"""Scoring API load benchmark.
+
+Starts scoring_api.py in a subprocess and drives it from --clients
+keep-alive connections at once. Most submissions (--repeat) resubmit one of
+--distinct answer sets with cosmetic changes: multiselect order, the casing
+of choices and the county, numbers sent as strings, added whitespace. The
+rest are new answer sets. Every response is checked against the rules
+evaluated directly in this process. Runs once with the result cache and
+batching, and once with both turned off, and reports per run:
+
+  rps              requests answered per second
+  p50_ms / p95_ms  request latency as the client sees it
+  hit / shared     fractions answered from the cache, or by joining an
+                   evaluation already in flight
+  rss_mb           server resident memory at the end (Linux only)
+
+    python benchmarks/scoring_load.py
+    python benchmarks/scoring_load.py --clients 200 --requests 50000
+    python benchmarks/scoring_load.py --check              # compare with baselines/scoring_load.json
+    python benchmarks/scoring_load.py --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+from bench_common import REPO_ROOT, app_env, find_regressions, load_baseline, save_baseline, use_repo_path
+from load_test import free_port, rss_mb
+from session_memory import in_option_order, random_answers
+
+use_repo_path()
+
+from jurisdiction_engine import available_jurisdictions, load_jurisdiction  # noqa: E402
+
+CHECKED_METRICS = ("p50_ms", "p95_ms")
+
+# Server settings per run
+RUNS = {
+    "cached": [],
+    "uncached": ["--cache-size", "0", "--max-batch", "1"],
+}
+
+
+def submission(jurisdiction, answers):
+    """answers as an intake form would post them: JSON types, years given directly rather than a start date."""
+    derived = {field.key for s in jurisdiction.sections.values() for field in s.fields if field.derive}
+    return {key: value for key, value in answers.items() if key not in derived}
+
+
+def expected_result(jurisdiction, answers):
+    flags, feedback = jurisdiction.evaluate(in_option_order(jurisdiction, answers))
+    return flags, feedback
+
+
+def disguise(jurisdiction, answers, rng):
+    """The same answers as a different client might send them."""
+    multiselect = {f.key for s in jurisdiction.sections.values() for f in s.fields if f.widget == "multiselect"}
+    changed = {}
+    for key, value in answers.items():
+        if key in multiselect:
+            value = rng.sample(value, len(value))
+        elif isinstance(value, str):
+            value = rng.choice([value.upper(), value.lower(), f"  {value} ", value])
+        elif isinstance(value, (int, float)) and rng.random() < 0.5:
+            value = str(value)
+        changed[key] = value
+    return dict(rng.sample(list(changed.items()), len(changed)))
+
+
+def start_server(args, timeout=30):
+    port = free_port()
+    command = [sys.executable, f"{REPO_ROOT}/scoring_api.py", "--port", str(port), *args]
+    server = subprocess.Popen(command, env=app_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"scoring_api exited: {server.stderr.read().decode(errors='replace')}")
+        try:
+            with urllib.request.urlopen(f"{url}/healthz", timeout=1) as response:
+                if response.status == 200:
+                    return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"scoring_api did not become healthy within {timeout} s")
+
+
+async def post(reader, writer, path, body):
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    head = await reader.readuntil(b"\r\n\r\n")
+    headers = dict(line.split(": ", 1) for line in head.decode("latin-1").split("\r\n")[1:] if line)
+    status = int(head.split(b" ", 2)[1])
+    return status, headers.get("X-Cache"), await reader.readexactly(int(headers["Content-Length"]))
+
+
+async def client(port, work, latencies, outcomes):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while work:
+            jurisdiction_id, answers, expected = work.pop()
+            body = json.dumps(answers).encode("utf-8")
+            start = time.perf_counter()
+            status, cache, payload = await post(reader, writer, f"/v1/score/{jurisdiction_id}", body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise AssertionError(f"{jurisdiction_id} {answers}: HTTP {status} {payload[:200]!r}")
+            result = json.loads(payload)
+            if (result["flags"], result["feedback"]) != expected:
+                raise AssertionError(f"{jurisdiction_id} {answers}: result differs from the rules")
+            outcomes[cache] = outcomes.get(cache, 0) + 1
+    finally:
+        writer.close()
+
+
+def workload(jurisdictions, requests, distinct, repeat, seed):
+    rng = random.Random(seed)
+    pools = {}
+    for jurisdiction in jurisdictions:
+        bases = [submission(jurisdiction, random_answers(jurisdiction, rng)) for _ in range(distinct)]
+        pools[jurisdiction.id] = [(base, expected_result(jurisdiction, base)) for base in bases]
+    work = []
+    for _ in range(requests):
+        jurisdiction = rng.choice(jurisdictions)
+        if rng.random() < repeat:
+            base, expected = rng.choice(pools[jurisdiction.id])
+        else:
+            base = submission(jurisdiction, random_answers(jurisdiction, rng))
+            expected = expected_result(jurisdiction, base)
+        work.append((jurisdiction.id, disguise(jurisdiction, base, rng), expected))
+    return work
+
+
+def measure(run, work, clients):
+    server, port = start_server(RUNS[run])
+    try:
+        work = list(reversed(work))
+        total = len(work)
+        latencies, outcomes = [], {}
+
+        async def drive():
+            await asyncio.gather(*(client(port, work, latencies, outcomes) for _ in range(clients)))
+
+        start = time.perf_counter()
+        asyncio.run(drive())
+        elapsed = time.perf_counter() - start
+        rss = rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    latencies.sort()
+    return {
+        "requests": total,
+        "rps": round(total / elapsed),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        "hit": round(outcomes.get("hit", 0) / total, 3),
+        "shared": round(outcomes.get("shared", 0) / total, 3),
+        "rss_mb": round(rss, 1) if rss is not None else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("runs", nargs="*", metavar="run", help=f"runs (default: all of {', '.join(RUNS)})")
+    parser.add_argument("--jurisdictions", nargs="+", default=available_jurisdictions())
+    parser.add_argument("--clients", type=int, default=64, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=300, help="answer sets resubmitted per jurisdiction")
+    parser.add_argument("--repeat", type=float, default=0.8, help="fraction of requests that resubmit one")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if slower than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+    unknown = set(args.runs) - set(RUNS)
+    if unknown:
+        parser.error(f"unknown runs: {', '.join(sorted(unknown))}")
+
+    jurisdictions = [load_jurisdiction(j) for j in args.jurisdictions]
+    work = workload(jurisdictions, args.requests, args.distinct, args.repeat, args.seed)
+    results = {run: measure(run, work, args.clients) for run in args.runs or RUNS}
+
+    print(f"{'run':<10}{'requests':>10}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'hit':>7}{'shared':>8}{'rss MB':>8}")
+    for run, r in results.items():
+        print(f"{run:<10}{r['requests']:>10}{r['rps']:>8}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['hit']:>7.3f}"
+              f"{r['shared']:>8.3f}{r['rss_mb'] or 0:>8.1f}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('scoring_load', results)}")
+    if args.check:
+        baseline = load_baseline("scoring_load")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        checked = {run: {m: r[m] for m in CHECKED_METRICS} for run, r in results.items()}
+        regressions = find_regressions(checked, baseline, args.tolerance, min_delta=2.0)
+        for run, metric, base, value in regressions:
+            print(f"REGRESSION {run} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Per-session answer memory benchmark.
+
+Fills the answers of many simulated checker sessions with random choices,
+stored the way the checkers used to (a {scope: answers} dict in each
+session's state) and as compact ResponseRecords in a SessionRecords store,
+then reports:
+
+  dict_bytes     traced bytes per session for the dicts
+  record_bytes   traced bytes per session for the records and the store's
+                 index of them
+  resident       records left in memory after the sessions go idle and the
+                 store is swept (bounded by --max-resident)
+  spill_ms       time to spill the idle records to disk
+  restore_ms     median time to load one spilled record back
+
+Every record is checked to read back equal to its dict (multiselect answers
+come back in option order), before and after the spill.
+
+    python benchmarks/session_memory.py
+    python benchmarks/session_memory.py --sessions 10000 --jurisdictions minnesota
+    python benchmarks/session_memory.py --check              # compare with baselines/session_memory.json
+    python benchmarks/session_memory.py --update-baseline
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from bench_common import find_regressions, load_baseline, save_baseline, use_repo_path
+
+use_repo_path()
+
+from jurisdiction_engine import available_jurisdictions, load_jurisdiction  # noqa: E402
+from response_records import SessionRecords  # noqa: E402
+
+COUNTIES = ["Hennepin", "Ramsey", "St. Louis", "Olmsted", "Cook", "Polk"]
+
+
+def random_answers(jurisdiction, rng):
+    answers = {}
+    for section in jurisdiction.sections.values():
+        for field in section.fields:
+            if field.widget == "multiselect":
+                answers[field.key] = rng.sample(field.options, rng.randint(0, len(field.options)))
+            elif field.options is not None:
+                answers[field.key] = rng.choice(field.options)
+            elif field.widget == "date_input":
+                answers[field.key] = date(2025, 4, 15) - timedelta(days=rng.randint(0, 20000))
+            elif field.widget == "text_input":
+                # Typed by the user, so a fresh string per session rather than a shared constant
+                answers[field.key] = "".join(rng.choice(COUNTIES))
+            elif jurisdiction.rules.fields.get(field.key) == "int":
+                answers[field.key] = rng.randint(0, 600)
+            else:
+                answers[field.key] = round(rng.uniform(0, 2_000_000), 2)
+            if field.derive:
+                answers[field.derive[0]] = round(rng.uniform(0, 50), 2)
+    return answers
+
+
+def in_option_order(jurisdiction, answers):
+    """answers as a record reads them back: multiselect choices in option order."""
+    options = {f.key: f.options for s in jurisdiction.sections.values() for f in s.fields if f.widget == "multiselect"}
+    return {key: [o for o in options[key] if o in value] if key in options else value for key, value in answers.items()}
+
+
+def traced_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return kept, used
+
+
+def measure(jurisdiction_id, sessions, max_resident, seed):
+    rng = random.Random(seed)
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    # Widget values are fresh objects per session; copy so dicts don't share the generator's
+    answers = [random_answers(jurisdiction, rng) for _ in range(sessions)]
+    # Session ids belong to Streamlit either way
+    session_ids = [f"session-{n:08d}-{rng.getrandbits(64):016x}" for n in range(sessions)]
+
+    def as_dicts():
+        return [{jurisdiction_id: {key: list(value) if isinstance(value, list) else value
+                                   for key, value in a.items()}}
+                for a in answers]
+
+    with tempfile.TemporaryDirectory(prefix="grant-sessions-") as workdir:
+        store = SessionRecords(ttl=float("inf"), max_resident=sessions, spill_path=os.path.join(workdir, "spill.db"))
+
+        def as_records():
+            records = []
+            for session_id, a in zip(session_ids, answers):
+                record = store.get(session_id, jurisdiction_id, jurisdiction.layout)
+                record.update(a)
+                records.append(record)
+            return records
+
+        dicts, dict_bytes = traced_bytes(as_dicts)
+        records, record_bytes = traced_bytes(as_records)
+        expected_answers = [in_option_order(jurisdiction, a) for a in answers]
+        for record, expected in zip(records, expected_answers):
+            if dict(record) != expected:
+                raise AssertionError(f"record reads back differently: {dict(record)} != {expected}")
+        del records
+
+        # The sweep spills the least recently used beyond max_resident
+        store.max_resident = max_resident
+        start = time.perf_counter()
+        store.sweep()
+        spill_ms = (time.perf_counter() - start) * 1000
+        resident = len(store)
+
+        restores = []
+        for n in rng.sample(range(sessions - resident), min(200, sessions - resident)):
+            start = time.perf_counter()
+            record = store.get(session_ids[n], jurisdiction_id, jurisdiction.layout)
+            restores.append(time.perf_counter() - start)
+            if dict(record) != expected_answers[n]:
+                raise AssertionError(f"spilled record {n} reads back differently")
+        store.close()
+
+    return {
+        "dict_bytes": round(dict_bytes / sessions),
+        "record_bytes": round(record_bytes / sessions),
+        "resident": resident,
+        "spill_ms": round(spill_ms, 1),
+        "restore_ms": round(statistics.median(restores) * 1000, 3) if restores else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jurisdictions", nargs="+", default=available_jurisdictions())
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--max-resident", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if worse than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed growth as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {j: measure(j, args.sessions, args.max_resident, args.seed) for j in args.jurisdictions}
+
+    print(f"{'jurisdiction':<14}{'dict B':>8}{'record B':>10}{'resident':>10}{'spill ms':>10}{'restore ms':>12}")
+    for name, r in results.items():
+        print(f"{name:<14}{r['dict_bytes']:>8}{r['record_bytes']:>10}{r['resident']:>10}"
+              f"{r['spill_ms']:>10.1f}{r['restore_ms']:>12.3f}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('session_memory', results)}")
+    if args.check:
+        baseline = load_baseline("session_memory")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        checked = {name: {m: r[m] for m in ("record_bytes", "spill_ms", "restore_ms")} for name, r in results.items()}
+        regressions = find_regressions(checked, baseline, args.tolerance, min_delta=1.0)
+        for name, metric, base, value in regressions:
+            print(f"REGRESSION {name} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Shared session store benchmark.
+
+Drives two SharedRecords stores on one SQLite file, standing in for two
+worker processes, with random checker answers and reports:
+
+  cached_get_us      get() of a record this worker used recently (read cache)
+  revalidate_get_us  get() that checks the database for a newer version
+  batched_ms         writing --sessions changed records in one flush
+  unbatched_ms       the same changes flushed one record at a time
+  handoffs           sessions moved between the workers, each checked to read
+                     back the answers the other worker wrote, including a
+                     stale copy losing to the newer one
+
+    python benchmarks/shared_sessions.py
+    python benchmarks/shared_sessions.py --sessions 5000 --jurisdictions minnesota
+    python benchmarks/shared_sessions.py --check              # compare with baselines/shared_sessions.json
+    python benchmarks/shared_sessions.py --update-baseline
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_common import find_regressions, load_baseline, save_baseline, use_repo_path
+from session_memory import in_option_order, random_answers
+
+use_repo_path()
+
+from jurisdiction_engine import available_jurisdictions, load_jurisdiction  # noqa: E402
+from response_records import SharedRecords  # noqa: E402
+
+
+def median_us(samples):
+    return round(statistics.median(samples) * 1e6, 1)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def measure(jurisdiction_id, sessions, seed):
+    rng = random.Random(seed)
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    layout = jurisdiction.layout
+    answers = [random_answers(jurisdiction, rng) for _ in range(sessions)]
+    session_ids = [f"session{n:08d}{rng.getrandbits(64):016x}" for n in range(sessions)]
+
+    with tempfile.TemporaryDirectory(prefix="grant-shared-") as workdir:
+        path = os.path.join(workdir, "sessions.db")
+        # Flushed by hand, so each write is timed on its own
+        first = SharedRecords(path, ttl=float("inf"), max_resident=sessions, flush_seconds=0, revalidate=float("inf"))
+        second = SharedRecords(path, ttl=float("inf"), max_resident=sessions, flush_seconds=0, revalidate=0.0)
+
+        for session_id, a in zip(session_ids, answers):
+            first.get(session_id, jurisdiction_id, layout).update(a)
+        batched = timed(first.flush)
+
+        # Change one answer per session and write each change in its own transaction
+        key = next(k for k in layout.keys if k in answers[0])
+        unbatched = 0.0
+        for session_id, a in zip(session_ids, answers):
+            first.get(session_id, jurisdiction_id, layout)[key] = a[key]
+            unbatched += timed(first.flush)
+
+        cached = [timed(lambda: first.get(s, jurisdiction_id, layout)) for s in session_ids[:1000]]
+        revalidated = [timed(lambda: second.get(s, jurisdiction_id, layout)) for s in session_ids[:1000]]
+
+        # Sampled sessions move to the second worker, which must see the first one's answers
+        expected = [in_option_order(jurisdiction, a) for a in answers]
+        handoffs = 0
+        for n in rng.sample(range(sessions), min(200, sessions)):
+            session_id, other = session_ids[n], answers[rng.randrange(sessions)]
+            if dict(second.get(session_id, jurisdiction_id, layout)) != expected[n]:
+                raise AssertionError(f"session {n} reads back differently on the second worker")
+            # The second worker saves new answers while the first still caches the old ones...
+            second.get(session_id, jurisdiction_id, layout).update(other)
+            second.flush()
+            stale = first.get(session_id, jurisdiction_id, layout)
+            stale[key] = answers[n][key]
+            # ...so the first worker's write is refused and its copy replaced on next use
+            first.flush()
+            first.revalidate = 0.0
+            if dict(first.get(session_id, jurisdiction_id, layout)) != in_option_order(jurisdiction, other):
+                raise AssertionError(f"session {n}: the stale copy overwrote the newer answers")
+            first.revalidate = float("inf")
+            handoffs += 1
+        first.close()
+        second.close()
+
+    return {
+        "cached_get_us": median_us(cached),
+        "revalidate_get_us": median_us(revalidated),
+        "batched_ms": round(batched * 1000, 1),
+        "unbatched_ms": round(unbatched * 1000, 1),
+        "handoffs": handoffs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jurisdictions", nargs="+", default=available_jurisdictions())
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if worse than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed growth as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {j: measure(j, args.sessions, args.seed) for j in args.jurisdictions}
+
+    print(f"{'jurisdiction':<14}{'cached us':>11}{'revalidate us':>15}{'batched ms':>12}{'unbatched ms':>14}"
+          f"{'handoffs':>10}")
+    for name, r in results.items():
+        print(f"{name:<14}{r['cached_get_us']:>11.1f}{r['revalidate_get_us']:>15.1f}{r['batched_ms']:>12.1f}"
+              f"{r['unbatched_ms']:>14.1f}{r['handoffs']:>10}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('shared_sessions', results)}")
+    if args.check:
+        baseline = load_baseline("shared_sessions")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        checked = {name: {m: r[m] for m in ("cached_get_us", "revalidate_get_us", "batched_ms")}
+                   for name, r in results.items()}
+        regressions = find_regressions(checked, baseline, args.tolerance, min_delta=5.0)
+        for name, metric, base, value in regressions:
+            print(f"REGRESSION {name} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
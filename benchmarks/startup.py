@@ -0,0 +1,115 @@
+"""Cold-start benchmark for the Streamlit apps.
+
+For each app, in fresh interpreters, measures:
+
+  import_ms        executing only the script's top-level import statements
+  first_render_ms  a full first AppTest run of the script (streamlit itself
+                   is already imported by the harness, so this is the app's
+                   own imports plus its first script run)
+
+and lists which heavy libraries were loaded along the way. Medians over
+--repeat runs are reported.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --check            # fail on regression vs. baselines/startup.json
+    python benchmarks/startup.py --update-baseline
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from bench_common import APPS, app_env, app_path, find_regressions, load_baseline, save_baseline
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "altair"]
+
+IMPORT_PROBE = """
+import ast, json, sys, time
+path, heavy = sys.argv[1], sys.argv[2].split(",")
+with open(path, encoding="utf-8") as f:
+    tree = ast.parse(f.read())
+imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+code = compile(ast.Module(body=imports, type_ignores=[]), path, "exec")
+start = time.perf_counter()
+exec(code, {"__name__": "__startup_bench__"})
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "heavy": [m for m in heavy if m in sys.modules]}))
+"""
+
+RENDER_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+path, heavy = sys.argv[1], sys.argv[2].split(",")
+start = time.perf_counter()
+at = AppTest.from_file(path, default_timeout=120).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "heavy": [m for m in heavy if m in sys.modules],
+                  "exception": [e.message for e in at.exception]}))
+"""
+
+
+def probe(code, app, env):
+    proc = subprocess.run([sys.executable, "-c", code, app_path(app), ",".join(HEAVY_MODULES)],
+                          env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(app, repeat):
+    with tempfile.TemporaryDirectory(prefix="grant-startup-") as workdir:
+        env = app_env(workdir)
+        imports = [probe(IMPORT_PROBE, app, env) for _ in range(repeat)]
+        renders = [probe(RENDER_PROBE, app, env) for _ in range(repeat)]
+    errors = renders[-1]["exception"]
+    if errors:
+        raise RuntimeError(f"{app} raised during first render: {errors}")
+    return {
+        "import_ms": round(statistics.median(r["seconds"] for r in imports) * 1000, 1),
+        "first_render_ms": round(statistics.median(r["seconds"] for r in renders) * 1000, 1),
+        "heavy_modules": renders[-1]["heavy"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("apps", nargs="*", metavar="app", help=f"apps to measure (default: all of {', '.join(APPS)})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--check", action="store_true", help="exit 1 if slower than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+    unknown = set(args.apps) - set(APPS)
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(sorted(unknown))}")
+
+    results = {app: measure(app, args.repeat) for app in args.apps or APPS}
+
+    print(f"{'app':<12}{'import ms':>12}{'first render ms':>18}  heavy modules loaded")
+    for app, r in results.items():
+        print(f"{app:<12}{r['import_ms']:>12.1f}{r['first_render_ms']:>18.1f}  {', '.join(r['heavy_modules']) or '-'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('startup', results)}")
+    if args.check:
+        baseline = load_baseline("startup")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        regressions = find_regressions(results, baseline, args.tolerance, min_delta=20.0)
+        # A heavy library appearing on the startup path is a regression on its own
+        for app, r in results.items():
+            added = set(r["heavy_modules"]) - set(baseline.get(app, {}).get("heavy_modules", r["heavy_modules"]))
+            if added:
+                regressions.append((app, "heavy_modules", "", ", ".join(sorted(added))))
+        for app, metric, base, value in regressions:
+            print(f"REGRESSION {app} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Template text analytics benchmark.
+
+Builds synthetic drafts of growing total length spread over the template's
+text sections, then measures the analysis a template rerun does (statistics,
+limits and duplicate detection for every section):
+
+  cold_ms    first rerun, every section analyzed
+  edit_ms    median rerun after a one-word edit to one section
+  idle_ms    median rerun with nothing changed
+
+edit_ms should track the size of the edited section, and idle_ms should stay
+flat, however long the whole draft is.
+
+    python benchmarks/template_analytics.py
+    python benchmarks/template_analytics.py --sizes 1000 50000 --edits 100
+    python benchmarks/template_analytics.py --check              # compare with baselines/template_analytics.json
+    python benchmarks/template_analytics.py --update-baseline
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from bench_common import find_regressions, load_baseline, save_baseline, use_repo_path
+
+use_repo_path()
+
+from text_analytics import (  # noqa: E402
+    duplicate_paragraphs, reading_ease, section_limits, section_stats,
+)
+
+SECTIONS = ["Executive Summary", "Organization Description", "Program Statement Need", "Program Description",
+            "Goals Description", "Program Activities", "Timeline", "Staff", "Evaluation", "Budget", "Summary"]
+SOURCES = ["Federal Grants", "Community Foundations"]
+WORDS = ("the program serves rural youth families through weekly tutoring mentoring sessions at county library "
+         "with trained volunteers measurable outcomes evaluation baseline survey quarterly partners capacity "
+         "enrollment retention literacy workforce community underserved access equity").split()
+
+
+def sentence(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(8, 24))).capitalize() + "."
+
+
+def section_text(rng, words):
+    paragraphs, count = [], 0
+    while count < words:
+        paragraph = " ".join(sentence(rng) for _ in range(rng.randint(3, 6)))
+        paragraphs.append(paragraph)
+        count += len(paragraph.split())
+    return "\n\n".join(paragraphs)
+
+
+def rerun(texts):
+    """The analysis one template rerun does."""
+    duplicates = duplicate_paragraphs(texts)
+    for section, text in texts.items():
+        stats = section_stats(text)
+        section_limits(SOURCES, section)
+        reading_ease(stats)
+        duplicates.get(section)
+
+
+def timed(texts):
+    start = time.perf_counter()
+    rerun(texts)
+    return time.perf_counter() - start
+
+
+def measure(total_words, edits, seed):
+    rng = random.Random(seed)
+    section_stats.cache_clear()
+    texts = {section: section_text(rng, total_words // len(SECTIONS)) for section in SECTIONS}
+    cold = timed(texts)
+    idle = [timed(texts) for _ in range(edits)]
+    edited = []
+    for _ in range(edits):
+        section = rng.choice(SECTIONS)
+        words = texts[section].split(" ")
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+        texts = {**texts, section: " ".join(words)}
+        edited.append(timed(texts))
+    return {
+        "cold_ms": round(cold * 1000, 2),
+        "edit_ms": round(statistics.median(edited) * 1000, 3),
+        "idle_ms": round(statistics.median(idle) * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="total words per draft")
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if slower than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {str(size): measure(size, args.edits, args.seed) for size in args.sizes}
+
+    print(f"{'words':>8}{'cold ms':>10}{'edit ms':>10}{'idle ms':>10}")
+    for size, r in results.items():
+        print(f"{size:>8}{r['cold_ms']:>10.2f}{r['edit_ms']:>10.3f}{r['idle_ms']:>10.3f}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('template_analytics', results)}")
+    if args.check:
+        baseline = load_baseline("template_analytics")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        regressions = find_regressions(results, baseline, args.tolerance, min_delta=1.0)
+        for size, metric, base, value in regressions:
+            print(f"REGRESSION {size} words {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
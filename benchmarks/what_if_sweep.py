@@ -0,0 +1,119 @@
+"""What-if sweep benchmark.
+
+Sweeps numeric answers of each checker over grids of increasing size and
+reports, per grid:
+
+  points       grid points evaluated
+  sweep_ms     one vectorized sweep (what_if.sweep, cache cleared first)
+  cached_us    the same sweep again, served from the per-answer-set cache
+  scalar_ms    the compiled per-session evaluator run at every grid point,
+               estimated from a sample of --scalar-sample points
+  flips        rule changes found, checked against the scalar evaluator
+
+    python benchmarks/what_if_sweep.py
+    python benchmarks/what_if_sweep.py --check              # compare with baselines/what_if_sweep.json
+    python benchmarks/what_if_sweep.py --update-baseline
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from bench_common import find_regressions, load_baseline, save_baseline, use_repo_path
+
+use_repo_path()
+
+from jurisdiction_engine import load_jurisdiction  # noqa: E402
+from what_if import _sweep, flip_points, sweep  # noqa: E402
+
+# (jurisdiction, answers, axes, points per axis)
+CASES = {
+    "federal:employees": ("federal", {"us_located": "Yes", "years": 4.0}, [("employees", 0, 1000)], 1000),
+    "federal:employees*years": ("federal", {"us_located": "Yes"}, [("employees", 0, 1000), ("years", 0, 20)], 200),
+    "minnesota:employees*revenue": ("minnesota", {"located_in_mn": "Yes", "county": "Hennepin"},
+                                    [("employees", 0, 100), ("revenue", 0, 2_000_000)], 1000),
+}
+
+
+def measure(case, scalar_sample, seed):
+    jurisdiction_id, answers, axes, points = CASES[case]
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    # Imports and the first DataFrame build are paid once per process, not per sweep
+    sweep(jurisdiction, answers, [(axes[0][0], 0, 1)], 2)
+
+    _sweep.cache_clear()
+    start = time.perf_counter()
+    result = sweep(jurisdiction, answers, axes, points)
+    sweep_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    sweep(jurisdiction, answers, axes, points)
+    cached_us = (time.perf_counter() - start) * 1e6
+
+    # The scalar evaluator must agree with every sampled grid point
+    rng = random.Random(seed)
+    size = result.met.size
+    sample = [rng.randrange(size) for _ in range(min(scalar_sample, size))]
+    start = time.perf_counter()
+    for flat in sample:
+        index = tuple(int(i) for i in np.unravel_index(flat, result.met.shape))
+        point = {**answers, **{axis.field: axis.values[i].item() for axis, i in zip(result.axes, index)}}
+        flags, _ = jurisdiction.evaluate(point)
+        for rule_id, passed in result.flags.items():
+            if flags[rule_id] != bool(passed[index]):
+                raise AssertionError(f"{case}: {rule_id} differs at {point}")
+        if sum(flags.values()) != result.met[index]:
+            raise AssertionError(f"{case}: rule count differs at {point}")
+    scalar_ms = (time.perf_counter() - start) / len(sample) * size * 1000
+
+    flips = flip_points(jurisdiction, result, answers)
+    for flip in flips:
+        flags, _ = jurisdiction.evaluate({**answers, flip.field: flip.value})
+        if flags[flip.rule] != flip.passes:
+            raise AssertionError(f"{case}: {flip} does not hold")
+    return {
+        "points": size,
+        "sweep_ms": round(sweep_ms, 1),
+        "cached_us": round(cached_us, 1),
+        "scalar_ms": round(scalar_ms, 1),
+        "flips": len(flips),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="*", metavar="case", help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--scalar-sample", type=int, default=2000, help="grid points run through the scalar evaluator")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="exit 1 if worse than the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed growth as a fraction")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    results = {case: measure(case, args.scalar_sample, args.seed) for case in args.cases or CASES}
+
+    print(f"{'case':<30}{'points':>10}{'sweep ms':>10}{'cached us':>11}{'scalar ms':>11}{'flips':>7}")
+    for case, r in results.items():
+        print(f"{case:<30}{r['points']:>10}{r['sweep_ms']:>10.1f}{r['cached_us']:>11.1f}"
+              f"{r['scalar_ms']:>11.1f}{r['flips']:>7}")
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline('what_if_sweep', results)}")
+    if args.check:
+        baseline = load_baseline("what_if_sweep")
+        if baseline is None:
+            parser.error("no baseline stored; run with --update-baseline first")
+        checked = {case: {m: r[m] for m in ("sweep_ms", "cached_us")} for case, r in results.items()}
+        regressions = find_regressions(checked, baseline, args.tolerance, min_delta=5.0)
+        for case, metric, base, value in regressions:
+            print(f"REGRESSION {case} {metric}: {base} -> {value}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import math
+
+import streamlit as st
+
+import checker_hooks  # noqa: F401  (registers the hooks named in jurisdiction files)
+from app_metrics import EVALUATION_SECONDS, begin_rerun, end_rerun
+from grants_gov_store import matching_opportunities, open_store
+from jurisdiction_engine import available_jurisdictions, load_jurisdiction
+from program_catalog import load_catalog
+from section_renderer import init_responses, render_section
+from what_if import default_range, flip_points, format_value, numeric_fields, sweep, sweep_chart
+
+# The eligibility checker UI, driven entirely by a jurisdiction definition.
+# The per-jurisdiction scripts call run_checker("<id>"); grant_eligibility_checker.py
+# serves every jurisdiction from one process with a picker in the sidebar.
+
+# Programs and Grants.gov opportunities listed under the results
+MATCH_COUNT = 10
+OPPORTUNITY_COUNT = 5
+
+# What-if grid points: along one varied answer, and per axis when two are varied
+WHAT_IF_LINE_POINTS = 1000
+WHAT_IF_GRID_POINTS = 200
+
+
+def pick_jurisdiction():
+    # Titles are shown in the picker; ?jurisdiction=<id> preselects one
+    titles = {load_jurisdiction(j).title: j for j in available_jurisdictions()}
+    requested = st.query_params.get("jurisdiction")
+    ids = list(titles.values())
+    index = ids.index(requested) if requested in ids else 0
+    title = st.sidebar.selectbox("Jurisdiction", list(titles), index=index)
+    st.query_params["jurisdiction"] = titles[title]
+    return titles[title]
+
+
+def show_matches(jurisdiction, responses):
+    st.subheader("Matching Programs")
+    matches = load_catalog().top(jurisdiction.profile(responses), k=MATCH_COUNT)
+    if not matches:
+        st.write("No programs in the local catalog match your answers yet.")
+    for match in matches:
+        program = match.program
+        st.markdown(f"**[{program.name}]({program.url})** — {program.agency}  \n"
+                    f"{program.kind}: {program.award}")
+        st.caption(f"{program.summary} Why it matches: {'; '.join(match.reasons)}.")
+
+
+def show_opportunities(store, jurisdiction, responses):
+    # Only shown once an extract has been imported with import_grants_gov.py
+    opportunities = matching_opportunities(store, jurisdiction.profile(responses), limit=OPPORTUNITY_COUNT)
+    if not opportunities:
+        return
+    st.subheader("Open Grants.gov Opportunities")
+    for opportunity in opportunities:
+        title = opportunity.title.replace("[", "\\[").replace("]", "\\]")
+        closes = str(opportunity.close_date)
+        closes = f"closes {closes[4:6]}/{closes[6:]}/{closes[:4]}" if opportunity.close_date else "no close date"
+        ceiling = "" if math.isnan(opportunity.award_ceiling) else f" · up to ${opportunity.award_ceiling:,.0f}"
+        st.markdown(f"**[{title}](https://www.grants.gov/search-results-detail/"
+                    f"{opportunity.opportunity_id})** — {opportunity.agency_name}  \n"
+                    f"{opportunity.opportunity_number} · {closes}{ceiling}")
+
+
+def what_if_range(jurisdiction, field, label, answers):
+    # The rule table's kind, not the current answer, decides whole numbers or cents
+    number = int if jurisdiction.rules.fields[field] == "int" else float
+    start, stop = default_range(jurisdiction, field, answers.get(field))
+    low, high = st.columns(2)
+    start = low.number_input(f"{label} from", min_value=number(0), value=number(start), step=number(1),
+                             key=f"what_if_{field}_from")
+    stop = high.number_input("to", min_value=number(0), value=number(stop), step=number(1),
+                             key=f"what_if_{field}_to")
+    return field, start, stop
+
+
+def show_what_if(jurisdiction, responses):
+    fields = numeric_fields(jurisdiction)
+    if not fields:
+        return
+    # A collapsed expander still runs its body, so the sweep only runs while this is switched on
+    if not st.toggle("What if…", key="what_if_open"):
+        return
+    with st.container(border=True):
+        st.caption("Vary one or two of your numeric answers to see where each check starts or stops passing. "
+                   "Your other answers stay as entered.")
+        answers = dict(responses)
+        keys = {label: key for key, label in fields.items()}
+        first, second = st.columns(2)
+        x = keys[first.selectbox("Vary", list(keys), key="what_if_x")]
+        y = keys.get(second.selectbox("Against", ["Nothing else", *(label for label in keys if keys[label] != x)],
+                                      key="what_if_y"))
+        axes = [what_if_range(jurisdiction, field, fields[field], answers) for field in (x, y) if field]
+        if any(stop <= start for _, start, stop in axes):
+            st.warning("Each range needs an upper end above its lower end.")
+            return
+        # Cached per answer set and grid, so only a changed answer or range is evaluated again
+        result = sweep(jurisdiction, answers, axes, WHAT_IF_GRID_POINTS if y else WHAT_IF_LINE_POINTS)
+        flips = flip_points(jurisdiction, result, answers)
+        sections = {rule.id: rule.section for rule in jurisdiction.rules.rules}
+        for flip in flips:
+            st.markdown(f"- **{flip.rule.replace('_', ' ').capitalize()}** ({sections[flip.rule]}) "
+                        f"{'passes' if flip.passes else 'stops passing'} from {fields[flip.field]} = "
+                        f"{format_value(jurisdiction, flip.field, flip.value)}")
+        if not flips:
+            st.write("No check changes over these ranges.")
+        st.vega_lite_chart(sweep_chart(result, fields, flips, answers), use_container_width=True)
+
+
+def run_checker(jurisdiction_id=None):
+    rerun = begin_rerun()
+
+    # Streamlit app configuration
+    if jurisdiction_id is None:
+        st.set_page_config(page_title="Business Grant Eligibility Checker", layout="wide")
+        jurisdiction_id = pick_jurisdiction()
+    else:
+        st.set_page_config(page_title=load_jurisdiction(jurisdiction_id).title, layout="wide")
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    # Memory-mapped once per process (and again after a new import); nothing is parsed here
+    opportunity_store = open_store()
+
+    # Header
+    st.title(jurisdiction.title)
+    st.markdown(jurisdiction.intro)
+
+    # Sidebar for navigation
+    st.sidebar.header("Navigation")
+    sections = [*jurisdiction.sections, "Results"]
+    selected_section = st.sidebar.radio("Jump to Section", sections)
+
+    # Each jurisdiction keeps its own answers in the session
+    responses = init_responses(jurisdiction.id, jurisdiction.layout)
+
+    # Only the selected section is drawn; its widgets commit answers on change
+    if selected_section in jurisdiction.sections:
+        render_section(jurisdiction.sections[selected_section])
+
+    # Results
+    if selected_section == "Results":
+        st.header("Eligibility Assessment Results")
+        if st.button("Generate Results"):
+            with EVALUATION_SECONDS.time(jurisdiction.id):
+                flags, feedback = jurisdiction.evaluate(responses)
+
+            # Display Results
+            st.subheader("Summary")
+            if feedback:
+                for item in feedback:
+                    st.write(item)
+                if jurisdiction.profile:
+                    show_matches(jurisdiction, responses)
+                    if opportunity_store is not None:
+                        show_opportunities(opportunity_store, jurisdiction, responses)
+                st.write(jurisdiction.next_steps)
+            else:
+                st.write(jurisdiction.incomplete)
+        show_what_if(jurisdiction, responses)
+
+    # Footer
+    st.markdown("---")
+    st.write(jurisdiction.footer)
+
+    end_rerun(rerun, jurisdiction.id, selected_section, responses)
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+import streamlit as st
+
+from mn_counties import lookup_county
+from section_renderer import hook
+
+# Hooks that jurisdiction files can name in a field's "derive" or "note".
+
+# Reference date for "years operational"
+AS_OF = date(2025, 4, 15)
+
+
+@hook("years_since")
+def years_since(start_date):
+    if not start_date:
+        return 0
+    start_datetime = datetime.combine(start_date, datetime.min.time())
+    return (datetime.combine(AS_OF, datetime.min.time()) - start_datetime).days / 365.25
+
+
+@hook("years_note")
+def years_note(start_date, responses):
+    if start_date:
+        st.write(f"Years operational: {years_since(start_date):.1f}")
+    else:
+        st.write("Please select a valid start date.")
+
+
+@hook("county_note")
+def county_note(county, responses):
+    # Resolve the county against the local index (handles aliases, FIPS codes and typos)
+    match = lookup_county(county)
+    if match:
+        area = "Twin Cities metro" if match.metro else "Greater Minnesota"
+        st.caption(f"Matched {match.name} County (FIPS {match.fips}) — {area}"
+                   f"{', rural' if match.rural else ''}{', distressed area' if match.distressed else ''}.")
+    elif county:
+        st.warning("County not recognized; check the spelling.")
+
+
+@hook("distressed_note")
+def distressed_note(distressed_area, responses):
+    match = lookup_county(responses.get("county"))
+    if distressed_area == "Unsure" and match:
+        st.caption(f"Local data lists {match.name} County as {'a' if match.distressed else 'not a'} distressed area; "
+                   "this will be used in your results.")
@@ -0,0 +1,212 @@
+"""Bulk import and export of grant drafts as zip archives.
+
+An archive holds one member per draft, either a CSV in the template's
+Section,Input download layout or a JSON object of {section: text}; both keep
+section order, so an exported archive imports back to the same drafts.
+Drafts are streamed one member at a time and written to the store in
+transactions of --chunk-size drafts, so memory stays flat however many
+drafts the archive holds. A member that fails validation is reported and
+skipped; the rest of the archive still imports.
+
+    python draft_archive.py export drafts.zip                  # every saved draft, as CSV
+    python draft_archive.py export drafts.zip --format json --ids 3 4 5
+    python draft_archive.py import drafts.zip --db agency.db
+"""
+import argparse
+import csv
+import io
+import json
+import posixpath
+import sys
+import zipfile
+from collections import namedtuple
+
+FORMATS = ("csv", "json")
+
+# The sections the template writes, in its order
+SECTIONS = (
+    "Organization Name", "Grant Source and Entity Type", "Entity Type", "Grant Outline", "Material Organization",
+    "Program Title", "Executive Summary", "Organization Description", "Program Statement Need",
+    "Program Description", "Goals Description", "Program Activities", "Timeline", "Staff", "Evaluation",
+    "Budget", "Summary",
+)
+ENTITY_TYPES = ("Non-profit entity", "For-profit entity")
+CSV_HEADER = ["Section", "Input"]
+
+# Largest draft member read, uncompressed; anything bigger is rejected unread
+MAX_DRAFT_BYTES = 2 * 1024 * 1024
+
+# A long section is one CSV field; let the csv module read fields up to the member limit
+csv.field_size_limit(max(csv.field_size_limit(), MAX_DRAFT_BYTES))
+
+# Drafts written per store transaction
+CHUNK_SIZE = 50
+
+# One line of an import report: draft_id is None when the member was rejected
+Imported = namedtuple("Imported", ["member", "draft_id", "error"])
+
+
+class DraftError(ValueError):
+    """A member of an archive is not a valid draft."""
+
+
+def member_name(draft_id, fmt):
+    return f"draft-{draft_id:06d}.{fmt}"
+
+
+def _write_member(archive, name, sections, fmt):
+    with archive.open(name, "w") as raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as out:
+        if fmt == "csv":
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(CSV_HEADER)
+            writer.writerows(sections.items())
+        else:
+            json.dump(sections, out, ensure_ascii=False, indent=1)
+
+
+def export_archive(store, out, fmt="csv", draft_ids=None, chunk_size=CHUNK_SIZE):
+    """Write drafts from store to out (a path or binary file) as a zip archive; returns the number written."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown archive format {fmt!r}")
+    count = 0
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        for draft_id, sections in store.iter_drafts(draft_ids, chunk_size):
+            _write_member(archive, member_name(draft_id, fmt), sections, fmt)
+            count += 1
+    return count
+
+
+def _no_duplicates(pairs):
+    sections = {}
+    for section, text in pairs:
+        if section in sections:
+            raise DraftError(f"section {section!r} appears twice")
+        sections[section] = text
+    return sections
+
+
+def _read_csv(member):
+    reader = csv.reader(io.TextIOWrapper(member, encoding="utf-8-sig", newline=""))
+    header = next(reader, None)
+    if header != CSV_HEADER:
+        raise DraftError(f"expected a {','.join(CSV_HEADER)} header, found {header!r}")
+    pairs = []
+    for line, row in enumerate(reader, 2):
+        if not row:
+            continue
+        if len(row) != 2:
+            raise DraftError(f"line {line}: expected 2 columns, found {len(row)}")
+        pairs.append(row)
+    return _no_duplicates(pairs)
+
+
+def _read_json(member):
+    sections = json.loads(io.TextIOWrapper(member, encoding="utf-8-sig").read(), object_pairs_hook=_no_duplicates)
+    if not isinstance(sections, dict):
+        raise DraftError("expected a JSON object of section: text")
+    for section, text in sections.items():
+        if not isinstance(text, str):
+            raise DraftError(f"section {section!r} is {type(text).__name__}, not text")
+    return sections
+
+
+def validate(sections):
+    """Raise DraftError unless sections is a draft the template can open."""
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        raise DraftError(f"unknown sections: {', '.join(map(repr, unknown))}")
+    if not any(text.strip() for section, text in sections.items() if section != "Entity Type"):
+        raise DraftError("draft is empty")
+    entity_type = sections.get("Entity Type")
+    if entity_type and entity_type not in ENTITY_TYPES:
+        raise DraftError(f"entity type must be one of {', '.join(ENTITY_TYPES)}, not {entity_type!r}")
+
+
+def read_member(archive, info):
+    """Parse and validate one archive member; returns {section: text} or raises DraftError."""
+    fmt = posixpath.splitext(info.filename)[1].lower().lstrip(".")
+    if fmt not in FORMATS:
+        raise DraftError("not a .csv or .json draft")
+    if info.file_size > MAX_DRAFT_BYTES:
+        raise DraftError(f"larger than {MAX_DRAFT_BYTES // 1024 // 1024} MB")
+    try:
+        with archive.open(info) as member:
+            sections = (_read_csv if fmt == "csv" else _read_json)(member)
+    except UnicodeDecodeError:
+        raise DraftError("not UTF-8 text") from None
+    except (csv.Error, json.JSONDecodeError) as exc:
+        raise DraftError(f"malformed {fmt.upper()}: {exc}") from None
+    except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as exc:
+        # Corrupt, encrypted or unsupported compression
+        raise DraftError(f"unreadable: {exc}") from None
+    validate(sections)
+    return sections
+
+
+def _is_draft_member(info):
+    name = info.filename
+    return not (info.is_dir() or name.startswith("__MACOSX/") or posixpath.basename(name).startswith("."))
+
+
+def import_archive(store, source, chunk_size=CHUNK_SIZE):
+    """Import every draft in the zip archive source (a path or binary file) into store.
+
+    Yields an Imported line per member in archive order, each once its chunk
+    has been committed. Raises zipfile.BadZipFile if source is not a zip.
+    """
+    with zipfile.ZipFile(source) as archive:
+        pending, drafts = [], []
+        for info in archive.infolist():
+            if not _is_draft_member(info):
+                continue
+            try:
+                drafts.append(read_member(archive, info))
+                pending.append(Imported(info.filename, None, None))
+            except DraftError as exc:
+                pending.append(Imported(info.filename, None, str(exc)))
+            if len(pending) >= chunk_size:
+                yield from _commit(store, pending, drafts)
+                pending, drafts = [], []
+        yield from _commit(store, pending, drafts)
+
+
+def _commit(store, pending, drafts):
+    ids = iter(store.import_drafts(drafts) if drafts else ())
+    for line in pending:
+        yield line if line.error else line._replace(draft_id=next(ids))
+
+
+def main(argv=None):
+    from draft_store import DraftStore
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("archive", help="zip archive to write or read")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="member format when exporting")
+    parser.add_argument("--ids", type=int, nargs="+", help="drafts to export (default: all)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="drafts per read or write transaction")
+    parser.add_argument("--db", help="drafts database (default: GRANT_DRAFTS_DB or grant_drafts.db)")
+    args = parser.parse_args(argv)
+
+    store = DraftStore(args.db) if args.db else DraftStore()
+    if args.action == "export":
+        count = export_archive(store, args.archive, args.format, args.ids, args.chunk_size)
+        print(f"Exported {count} drafts to {args.archive}", file=sys.stderr)
+        return 0
+
+    imported = rejected = 0
+    try:
+        for line in import_archive(store, args.archive, args.chunk_size):
+            if line.error:
+                rejected += 1
+                print(f"{line.member}: {line.error}", file=sys.stderr)
+            else:
+                imported += 1
+    except zipfile.BadZipFile as exc:
+        parser.error(f"{args.archive}: {exc}")
+    print(f"Imported {imported} drafts, rejected {rejected}", file=sys.stderr)
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
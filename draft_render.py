@@ -0,0 +1,413 @@
+"""Render a grant draft as a formatted Markdown, DOCX or PDF proposal.
+
+Only the standard library is used: DOCX is written as WordprocessingML inside
+a zip, and PDF with the built-in Helvetica fonts. Every format is written
+section by section to a binary file object, and each section's rendered form
+is cached by its content, so re-exporting after a small edit only re-renders
+the sections that changed.
+
+    python draft_render.py 12 --format pdf -o proposal.pdf
+    python draft_render.py 12 --format markdown            # to stdout
+"""
+import argparse
+import re
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+Format = namedtuple("Format", ["extension", "mime"])
+
+FORMATS = {
+    "markdown": Format(".md", "text/markdown"),
+    "docx": Format(".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": Format(".pdf", "application/pdf"),
+}
+
+# Sections shown in the title block rather than as headings
+TITLE_SECTIONS = ("Organization Name", "Program Title")
+DETAIL_SECTIONS = {"Grant Source and Entity Type": "Grant sources", "Entity Type": "Entity type"}
+
+# The writer's planning notes are not part of the proposal
+NOTE_SECTIONS = ("Grant Outline", "Material Organization")
+
+# Proposal headings for sections whose stored name is abbreviated
+HEADINGS = {
+    "Organization Description": "Description and Background of the Organization",
+    "Program Statement Need": "Program Statement and Need for the Program",
+    "Goals Description": "Goals",
+}
+
+# Cached rendered sections per format
+SECTION_CACHE_SIZE = 1024
+
+_BULLET = re.compile(r"^\s*[-*•]\s+")
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def blocks(text):
+    """Split section text into ("p" | "li", text) blocks: blank lines end paragraphs, -/* lines are bullets."""
+    result, paragraph = [], []
+    for line in text.splitlines():
+        if not line.strip():
+            if paragraph:
+                result.append(("p", " ".join(paragraph)))
+                paragraph = []
+        elif _BULLET.match(line):
+            if paragraph:
+                result.append(("p", " ".join(paragraph)))
+                paragraph = []
+            result.append(("li", _BULLET.sub("", line).strip()))
+        else:
+            paragraph.append(line.strip())
+    if paragraph:
+        result.append(("p", " ".join(paragraph)))
+    return result
+
+
+def proposal_parts(sections):
+    """Split {section: text} into (title, subtitle, details, [(heading, text)]), skipping empty sections."""
+    title = sections.get("Program Title", "").strip() or "Grant Proposal"
+    subtitle = sections.get("Organization Name", "").strip()
+    details = [(label, sections[name].strip()) for name, label in DETAIL_SECTIONS.items()
+               if sections.get(name, "").strip()]
+    body = [(HEADINGS.get(name, name), text.strip()) for name, text in sections.items()
+            if name not in TITLE_SECTIONS + NOTE_SECTIONS and name not in DETAIL_SECTIONS and (text or "").strip()]
+    return title, subtitle, details, body
+
+
+# Markdown
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def _markdown_section(heading, text):
+    lines, previous = [f"## {heading}"], "p"
+    for kind, block in blocks(text):
+        # Bullets sit on consecutive lines; anything else is separated by a blank line
+        if not (kind == "li" and previous == "li"):
+            lines.append("")
+        lines.append(f"- {block}" if kind == "li" else block)
+        previous = kind
+    return "\n".join(lines) + "\n\n"
+
+
+def write_markdown(sections, out):
+    title, subtitle, details, body = proposal_parts(sections)
+    head = [f"# {title}", ""]
+    if subtitle:
+        head += [f"**{subtitle}**", ""]
+    head += [f"- **{name}:** {text}" for name, text in details]
+    out.write(("\n".join(head).rstrip() + "\n\n").encode("utf-8"))
+    for heading, text in body:
+        out.write(_markdown_section(heading, text).encode("utf-8"))
+
+
+# DOCX
+
+_DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>
+</Types>"""
+
+_DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>
+</Relationships>"""
+
+_DOCX_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+_DOCX_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
+<w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Calibri" w:hAnsi="Calibri" w:cs="Calibri"/><w:sz w:val="22"/></w:rPr></w:rPrDefault>
+<w:pPrDefault><w:pPr><w:spacing w:after="160" w:line="276" w:lineRule="auto"/></w:pPr></w:pPrDefault></w:docDefaults>
+<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>
+<w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/><w:basedOn w:val="Normal"/><w:pPr><w:spacing w:after="80"/></w:pPr><w:rPr><w:b/><w:sz w:val="40"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Subtitle"><w:name w:val="Subtitle"/><w:basedOn w:val="Normal"/><w:rPr><w:color w:val="595959"/><w:sz w:val="28"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/><w:basedOn w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="360" w:after="120"/><w:outlineLvl w:val="0"/></w:pPr><w:rPr><w:b/><w:color w:val="1F3864"/><w:sz w:val="30"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="ListBullet"><w:name w:val="List Bullet"/><w:basedOn w:val="Normal"/><w:pPr><w:spacing w:after="60"/><w:ind w:left="720" w:hanging="360"/></w:pPr></w:style>
+</w:styles>"""
+
+_DOCX_CORE = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<dc:title>{title}</dc:title><dc:creator>{creator}</dc:creator>
+<dcterms:created xsi:type="dcterms:W3CDTF">{created}</dcterms:created>
+</cp:coreProperties>"""
+
+_DOCX_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+_DOCX_TAIL = ('<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+              '<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" w:header="720" w:footer="720" w:gutter="0"/>'
+              '</w:sectPr></w:body></w:document>')
+
+
+def _xml_text(text):
+    return escape(_INVALID_XML.sub("", text))
+
+
+def _docx_paragraph(text, style=None, bold_prefix=None):
+    props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    runs = ""
+    if bold_prefix:
+        runs += f'<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{_xml_text(bold_prefix)}</w:t></w:r>'
+    runs += f'<w:r><w:t xml:space="preserve">{_xml_text(text)}</w:t></w:r>'
+    return f"<w:p>{props}{runs}</w:p>"
+
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def _docx_section(heading, text):
+    parts = [_docx_paragraph(heading, "Heading1")]
+    for kind, block in blocks(text):
+        parts.append(_docx_paragraph(block, "ListBullet", "•\t") if kind == "li" else _docx_paragraph(block))
+    return "".join(parts).encode("utf-8")
+
+
+def write_docx(sections, out):
+    title, subtitle, details, body = proposal_parts(sections)
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        package.writestr("_rels/.rels", _DOCX_RELS)
+        package.writestr("word/_rels/document.xml.rels", _DOCX_DOCUMENT_RELS)
+        package.writestr("word/styles.xml", _DOCX_STYLES)
+        package.writestr("docProps/core.xml", _DOCX_CORE.format(
+            title=_xml_text(title), creator=_xml_text(subtitle), created=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())))
+        # The document part is streamed into the zip one section at a time
+        with package.open("word/document.xml", "w") as document:
+            head = [_DOCX_HEAD, _docx_paragraph(title, "Title")]
+            if subtitle:
+                head.append(_docx_paragraph(subtitle, "Subtitle"))
+            head += [_docx_paragraph(text, bold_prefix=f"{name}: ") for name, text in details]
+            document.write("".join(head).encode("utf-8"))
+            for heading, text in body:
+                document.write(_docx_section(heading, text))
+            document.write(_DOCX_TAIL.encode("utf-8"))
+
+
+# PDF
+
+PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 612, 792, 72
+
+# Advance widths (1/1000 em) of the built-in fonts for printable ASCII, from their AFM metrics
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+# Common typographic characters outside ASCII (same in both weights)
+_EXTRA_WIDTHS = {"‘": 222, "’": 222, "“": 333, "”": 333, "–": 556, "—": 1000, "•": 350, "…": 1000}
+
+# (font resource, size, leading, space before)
+_PDF_STYLES = {
+    "title": ("F2", 20, 26, 0),
+    "subtitle": ("F1", 13, 18, 0),
+    "heading": ("F2", 14, 20, 16),
+    "p": ("F1", 11, 15, 6),
+    "li": ("F1", 11, 15, 2),
+}
+_BULLET_INDENT = 16
+
+# A laid-out line; bullet lines also draw a bullet in the indent
+Line = namedtuple("Line", ["style", "indent", "text", "bullet"])
+
+
+def _text_width(text, font, size):
+    widths = _HELVETICA_BOLD_WIDTHS if font == "F2" else _HELVETICA_WIDTHS
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += widths[code - 32] if 32 <= code < 127 else _EXTRA_WIDTHS.get(char, 556)
+    return total * size / 1000
+
+
+def _wrap(text, style, width):
+    font, size = _PDF_STYLES[style][:2]
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and _text_width(candidate, font, size) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _layout(style, text, indent=0):
+    wrapped = _wrap(text, style, PAGE_WIDTH - 2 * MARGIN - indent)
+    return [Line(style, indent, line, style == "li" and i == 0) for i, line in enumerate(wrapped)]
+
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def _pdf_section(heading, text):
+    """Lay out one section into lines; pagination happens when the document is assembled."""
+    lines = [*_layout("heading", heading)]
+    for kind, block in blocks(text):
+        lines += _layout("li", block, _BULLET_INDENT) if kind == "li" else _layout("p", block)
+    return tuple(lines)
+
+
+def _pdf_string(text):
+    encoded = text.encode("cp1252", "replace")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class _PdfWriter:
+    """Writes PDF objects as they are produced, remembering offsets for the xref table."""
+
+    def __init__(self, out):
+        self.out = out
+        self.offsets = {}
+        self.position = 0
+        self.next_id = 1
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.out.write(data)
+        self.position += len(data)
+
+    def reserve(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def stream(self, object_id, data):
+        compressed = zlib.compress(data)
+        self.object(object_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(compressed)
+                    + compressed + b"\nendstream")
+
+    def finish(self, root_id, info_id):
+        xref = self.position
+        count = self.next_id
+        rows = [b"xref\n0 %d\n0000000000 65535 f \n" % count]
+        rows += [b"%010d 00000 n \n" % self.offsets[i] for i in range(1, count)]
+        self._write(b"".join(rows))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (count, root_id, info_id, xref))
+
+
+def write_pdf(sections, out):
+    title, subtitle, details, body = proposal_parts(sections)
+    pdf = _PdfWriter(out)
+    catalog_id, pages_id, info_id = pdf.reserve(), pdf.reserve(), pdf.reserve()
+    regular_id, bold_id = pdf.reserve(), pdf.reserve()
+    for font_id, name in ((regular_id, b"Helvetica"), (bold_id, b"Helvetica-Bold")):
+        pdf.object(font_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /" + name + b" /Encoding /WinAnsiEncoding >>")
+    resources = b"<< /Font << /F1 %d 0 R /F2 %d 0 R >> >>" % (regular_id, bold_id)
+
+    page_ids, commands = [], []
+    y = PAGE_HEIGHT - MARGIN
+
+    def flush_page():
+        content_id, page_id = pdf.reserve(), pdf.reserve()
+        pdf.stream(content_id, b"\n".join(commands))
+        pdf.object(page_id, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>"
+                   % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, resources, content_id))
+        page_ids.append(page_id)
+        commands.clear()
+
+    def place(lines):
+        nonlocal y
+        previous = None
+        for line in lines:
+            font, size, leading, before = _PDF_STYLES[line.style]
+            step = leading + (before if line.style != previous or line.bullet else 0)
+            # Keep a heading with at least two following lines
+            keep = 2 * _PDF_STYLES["p"][2] if line.style == "heading" else 0
+            if y - step - keep < MARGIN and commands:
+                flush_page()
+                y = PAGE_HEIGHT - MARGIN
+                step = leading
+            y -= step
+            x = MARGIN + line.indent
+            if line.bullet:
+                commands.append(b"BT /%s %d Tf %.2f %.2f Td %s Tj ET"
+                                % (font.encode(), size, x - _BULLET_INDENT + 4, y, _pdf_string("•")))
+            commands.append(b"BT /%s %d Tf %.2f %.2f Td %s Tj ET"
+                            % (font.encode(), size, x, y, _pdf_string(line.text)))
+            previous = line.style
+
+    head = _layout("title", title)
+    if subtitle:
+        head += _layout("subtitle", subtitle)
+    for name, text in details:
+        head += _layout("p", f"{name}: {text}")
+    place(head)
+    for heading, text in body:
+        place(_pdf_section(heading, text))
+    flush_page()
+
+    pdf.object(pages_id, b"<< /Type /Pages /Kids [%s] /Count %d >>"
+               % (b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)))
+    pdf.object(catalog_id, b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    pdf.object(info_id, b"<< /Title %s /Author %s /Producer (Grant Writing Template) >>"
+               % (_pdf_string(title), _pdf_string(subtitle)))
+    pdf.finish(catalog_id, info_id)
+
+
+WRITERS = {"markdown": write_markdown, "docx": write_docx, "pdf": write_pdf}
+
+
+def render(sections, fmt, out):
+    """Write the draft's {section: text} to the binary file object out in the given format."""
+    WRITERS[fmt](sections, out)
+
+
+def render_to_file(sections, fmt):
+    """Render into an anonymous temporary file and return it rewound for reading."""
+    out = tempfile.TemporaryFile()
+    render(sections, fmt, out)
+    out.seek(0)
+    return out
+
+
+def main(argv=None):
+    from draft_store import DraftStore
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("draft_id", type=int)
+    parser.add_argument("--format", choices=list(FORMATS), default="pdf")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--db", help="drafts database (default: GRANT_DRAFTS_DB or grant_drafts.db)")
+    args = parser.parse_args(argv)
+
+    store = DraftStore(args.db) if args.db else DraftStore()
+    sections = store.load_draft(args.draft_id)
+    if not sections:
+        parser.error(f"draft {args.draft_id} not found")
+    if args.output == "-":
+        render(sections, args.format, sys.stdout.buffer)
+    else:
+        with open(args.output, "wb") as out:
+            render(sections, args.format, out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
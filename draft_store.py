@@ -0,0 +1,523 @@
+import atexit
+import difflib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# Embedded SQLite repository for grant writing drafts.
+#
+# The current text of every section lives in draft_sections, so reopening a
+# draft is one indexed read. Older versions are kept in section_history as
+# reverse deltas (how to rebuild version n-1 from version n), so a long
+# narrative that changes by a sentence costs a sentence, not a full copy.
+#
+# section_search is an FTS5 index over the current text of every section,
+# keyed through section_keys. save_sections replaces only the rows of the
+# sections it changes, in the same transaction, so the index is never rebuilt.
+#
+# save_later queues changes for a debounced autosave. A background thread
+# writes each draft's queued changes when its delay runs out, merged into one
+# save. Saving or loading the draft writes them first, as do closing the store
+# and interpreter exit, so a debounced edit is never dropped.
+
+DEFAULT_DB_PATH = os.environ.get("GRANT_DRAFTS_DB", "grant_drafts.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    id INTEGER PRIMARY KEY,
+    organization TEXT NOT NULL DEFAULT '',
+    program_title TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_by_org_title ON drafts (organization, program_title);
+CREATE TABLE IF NOT EXISTS draft_sections (
+    draft_id INTEGER NOT NULL REFERENCES drafts (id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (draft_id, section)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS section_history (
+    draft_id INTEGER NOT NULL REFERENCES drafts (id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    replaced_at REAL NOT NULL,
+    delta TEXT NOT NULL,
+    PRIMARY KEY (draft_id, section, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS section_keys (
+    id INTEGER PRIMARY KEY,
+    draft_id INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    UNIQUE (draft_id, section)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS section_search USING fts5 (content, tokenize = 'porter unicode61');
+"""
+
+# Highlight markers around matched terms in search snippets (Markdown bold)
+SNIPPET_MARK = "**"
+SNIPPET_TOKENS = 16
+
+# Locks that keep each draft's saves in order; drafts share them by id, so the count stays fixed
+SAVE_LOCK_STRIPES = 64
+
+# Past this many characters a section's history keeps each version whole rather than diffing it
+DELTA_MAX_CHARS = 200_000
+
+SearchHit = namedtuple("SearchHit", ["draft_id", "section", "organization", "program_title", "snippet", "score"])
+
+_TOKENS = re.compile(r"\S+|\s+")
+
+log = logging.getLogger(__name__)
+
+
+def make_delta(new, old):
+    """Encode old as copy ranges of new plus inserted text (a JSON list).
+
+    The common start and end are copied as they are and only the changed
+    middle is diffed, word by word. Words common enough to be noise (such as
+    the spaces between words) are left to the surrounding matches, which
+    keeps the diff near-linear. Sections longer than DELTA_MAX_CHARS keep old
+    whole.
+    """
+    if max(len(new), len(old)) > DELTA_MAX_CHARS:
+        return json.dumps([old], separators=(",", ":"))
+    new_tokens, old_tokens = _TOKENS.findall(new), _TOKENS.findall(old)
+    shortest = min(len(new_tokens), len(old_tokens))
+    prefix = 0
+    while prefix < shortest and new_tokens[prefix] == old_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and new_tokens[-1 - suffix] == old_tokens[-1 - suffix]:
+        suffix += 1
+    new_middle = new_tokens[prefix:len(new_tokens) - suffix]
+    old_middle = old_tokens[prefix:len(old_tokens) - suffix]
+
+    offsets = [sum(map(len, new_tokens[:prefix]))]
+    for token in new_middle:
+        offsets.append(offsets[-1] + len(token))
+    ops = [[0, offsets[0]]] if prefix else []
+    matcher = difflib.SequenceMatcher(None, new_middle, old_middle)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([offsets[i1], offsets[i2]])
+        elif j2 > j1:
+            ops.append("".join(old_middle[j1:j2]))
+    if suffix:
+        ops.append([offsets[-1], len(new)])
+    return json.dumps(ops, separators=(",", ":"))
+
+
+def apply_delta(new, delta):
+    """Rebuild the older text from new and a delta produced by make_delta."""
+    return "".join(new[op[0]:op[1]] if isinstance(op, list) else op for op in json.loads(delta))
+
+
+def search_query(text):
+    """Turn what a writer types into an FTS5 query: every word must match.
+
+    "Quoted text" is matched as a phrase and a trailing * matches a prefix;
+    anything else FTS5 would treat as syntax is ignored.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\w+(?:[-\'’]\w+)*\*?)', text):
+        # Hyphenated words ("non-profit") are phrases too, matching how they were tokenized
+        words = re.findall(r"\w+", phrase or word)
+        if words:
+            terms.append('"' + " ".join(words) + '"' + ("*" if word.endswith("*") else ""))
+    return " ".join(terms)
+
+
+class DraftStore:
+    """Thread-safe access to the drafts database from every session in the process."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        indexed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'section_search'").fetchone() is not None
+        self._conn.executescript(SCHEMA)
+        if not indexed:
+            # Databases from before the search index get it built once
+            self.rebuild_search_index()
+        # draft_id -> [sections, positions, organization, program_title, due] queued by save_later
+        self._pending = {}
+        self._pending_changed = threading.Condition()
+        self._save_locks = [threading.Lock() for _ in range(SAVE_LOCK_STRIPES)]
+        self._flusher = None
+        self._closed = False
+        atexit.register(self.flush)
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._pending_changed:
+            self._closed = True
+            self._pending_changed.notify()
+        with self._lock:
+            self._conn.close()
+
+    def create_draft(self, organization="", program_title=""):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO drafts (organization, program_title, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (organization, program_title, now, now),
+            )
+            return cursor.lastrowid
+
+    def save_sections(self, draft_id, sections, positions=None, organization=None, program_title=None):
+        """Save only the given {section: text} changes as one transaction.
+
+        positions maps section names to their display order; organization and
+        program_title update the draft's indexed metadata when given. Changes
+        queued for the draft by save_later are written with these.
+        """
+        with self._saving(draft_id):
+            entry = self._take_pending(draft_id)
+            if entry is not None:
+                queued, queued_positions, queued_organization, queued_title, _ = entry
+                sections = {**queued, **sections}
+                positions = {**queued_positions, **(positions or {})}
+                organization = queued_organization if organization is None else organization
+                program_title = queued_title if program_title is None else program_title
+            self._save_now(draft_id, sections, positions, organization, program_title)
+
+    def save_later(self, draft_id, sections, delay, positions=None, organization=None, program_title=None):
+        """Queue a save_sections call to run within delay seconds.
+
+        Changes queued for the same draft before then are merged into one
+        write, which is due when the earliest of them is.
+        """
+        with self._pending_changed:
+            entry = self._pending.get(draft_id)
+            if entry is None:
+                entry = self._pending[draft_id] = [{}, {}, None, None, time.monotonic() + delay]
+            entry[0].update(sections)
+            entry[1].update(positions or {})
+            if organization is not None:
+                entry[2] = organization
+            if program_title is not None:
+                entry[3] = program_title
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_when_due, name="draft-autosave", daemon=True)
+                self._flusher.start()
+            self._pending_changed.notify()
+
+    def flush(self):
+        """Write every queued change now."""
+        with self._pending_changed:
+            draft_ids = list(self._pending)
+        for draft_id in draft_ids:
+            self._flush_draft(draft_id)
+
+    def has_pending(self, draft_id):
+        """True while changes queued for the draft by save_later are not yet written."""
+        with self._pending_changed:
+            return draft_id in self._pending
+
+    def _saving(self, draft_id):
+        # Held from taking a draft's queued changes until they are written, so its saves land in order
+        return self._save_locks[draft_id % SAVE_LOCK_STRIPES]
+
+    def _take_pending(self, draft_id, due_by=None):
+        with self._pending_changed:
+            entry = self._pending.get(draft_id)
+            if entry is None or (due_by is not None and entry[4] > due_by):
+                return None
+            return self._pending.pop(draft_id)
+
+    def _flush_draft(self, draft_id, due_by=None):
+        with self._saving(draft_id):
+            entry = self._take_pending(draft_id, due_by)
+            if entry is not None:
+                self._save_now(draft_id, *entry[:4])
+
+    def _flush_when_due(self):
+        while True:
+            with self._pending_changed:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due = [draft_id for draft_id, entry in self._pending.items() if entry[4] <= now]
+                if not due:
+                    wake = min((entry[4] for entry in self._pending.values()), default=None)
+                    self._pending_changed.wait(None if wake is None else wake - now)
+                    continue
+            for draft_id in due:
+                try:
+                    self._flush_draft(draft_id, now)
+                except sqlite3.Error:
+                    log.exception("autosave of draft %s failed", draft_id)
+
+    def _save_now(self, draft_id, sections, positions, organization, program_title):
+        positions = positions or {}
+        # Diff outside the lock, so saving a long section doesn't hold up every other session
+        with self._lock:
+            current = self._conn.execute(
+                f"SELECT section, content, version FROM draft_sections WHERE draft_id = ? AND section IN "
+                f"({', '.join('?' * len(sections))})", (draft_id, *sections),
+            ).fetchall() if sections else []
+        deltas = {section: (version, make_delta(sections[section] or "", content))
+                  for section, content, version in current if content != (sections[section] or "")}
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            try:
+                self._write_sections(draft_id, sections, positions, now, deltas)
+                updates, params = ["updated_at = ?"], [now]
+                if organization is not None:
+                    updates.append("organization = ?")
+                    params.append(organization)
+                if program_title is not None:
+                    updates.append("program_title = ?")
+                    params.append(program_title)
+                conn.execute(f"UPDATE drafts SET {', '.join(updates)} WHERE id = ?", (*params, draft_id))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def import_drafts(self, drafts):
+        """Create a draft for each {section: text} mapping, all in one transaction; returns the new ids.
+
+        Sections keep the mapping's order, and each draft's organization and
+        program title are taken from its sections, as autosave does.
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sections in drafts:
+                    draft_id = conn.execute(
+                        "INSERT INTO drafts (organization, program_title, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                        (sections.get("Organization Name", ""), sections.get("Program Title", ""), now, now),
+                    ).lastrowid
+                    self._write_sections(draft_id, sections, {section: i for i, section in enumerate(sections)}, now)
+                    ids.append(draft_id)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def _write_sections(self, draft_id, sections, positions, now, deltas=None):
+        # Insert or version each changed section; callers hold the lock inside a transaction.
+        # deltas maps sections to (version, delta) diffed beforehand; a section saved since then is diffed again.
+        conn = self._conn
+        for section, content in sections.items():
+            content = content or ""
+            row = conn.execute(
+                "SELECT content, version FROM draft_sections WHERE draft_id = ? AND section = ?",
+                (draft_id, section),
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO draft_sections (draft_id, section, position, content, version) "
+                    "VALUES (?, ?, ?, ?, 1)",
+                    (draft_id, section, positions.get(section, 0), content),
+                )
+                self._index_section(draft_id, section, content)
+                continue
+            old_content, version = row
+            if old_content == content:
+                continue
+            diffed_version, delta = (deltas or {}).get(section, (None, None))
+            if diffed_version != version:
+                delta = make_delta(content, old_content)
+            conn.execute(
+                "INSERT INTO section_history (draft_id, section, version, replaced_at, delta) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (draft_id, section, version, now, delta),
+            )
+            conn.execute(
+                "UPDATE draft_sections SET content = ?, version = ? WHERE draft_id = ? AND section = ?",
+                (content, version + 1, draft_id, section),
+            )
+            self._index_section(draft_id, section, content)
+
+    def _index_section(self, draft_id, section, content):
+        # Replace this section's row in the search index; callers hold the lock inside a transaction
+        conn = self._conn
+        conn.execute("INSERT OR IGNORE INTO section_keys (draft_id, section) VALUES (?, ?)", (draft_id, section))
+        (key,) = conn.execute(
+            "SELECT id FROM section_keys WHERE draft_id = ? AND section = ?", (draft_id, section)).fetchone()
+        conn.execute("DELETE FROM section_search WHERE rowid = ?", (key,))
+        if content.strip():
+            conn.execute("INSERT INTO section_search (rowid, content) VALUES (?, ?)", (key, content))
+
+    def rebuild_search_index(self):
+        """Index every saved section from scratch; only needed for databases created before search."""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM section_search")
+                conn.execute("DELETE FROM section_keys")
+                conn.execute("INSERT INTO section_keys (draft_id, section) SELECT draft_id, section FROM draft_sections")
+                conn.execute(
+                    "INSERT INTO section_search (rowid, content) SELECT k.id, s.content FROM section_keys k "
+                    "JOIN draft_sections s ON s.draft_id = k.draft_id AND s.section = k.section "
+                    "WHERE trim(s.content) != ''"
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def search(self, text, sections=None, limit=20):
+        """Rank saved sections against text with BM25; returns SearchHits, best first.
+
+        sections limits the search to those section names. Snippets mark the
+        matched terms with SNIPPET_MARK.
+        """
+        query = search_query(text)
+        if not query:
+            return []
+        # Rank and snippet on the FTS table alone so FTS5 can stop after the top rows;
+        # the section filter is applied to the matches (+rowid keeps FTS5 from re-running the match per id)
+        inner = "SELECT rowid AS id, snippet(section_search, 0, ?, ?, ' … ', ?) AS snippet, rank " \
+                "FROM section_search WHERE section_search MATCH ?"
+        params = [SNIPPET_MARK, SNIPPET_MARK, SNIPPET_TOKENS, query]
+        if sections:
+            inner += f" AND +rowid IN (SELECT id FROM section_keys WHERE section IN ({', '.join('?' * len(sections))}))"
+            params.extend(sections)
+        inner += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        sql = (
+            "SELECT k.draft_id, k.section, d.organization, d.program_title, hit.snippet, hit.rank "
+            f"FROM ({inner}) AS hit JOIN section_keys k ON k.id = hit.id JOIN drafts d ON d.id = k.draft_id "
+            "ORDER BY hit.rank"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        # rank is bm25(), which is lower-is-better; report higher-is-better scores
+        return [SearchHit(*row[:5], -row[5]) for row in rows]
+
+    def indexed_sections(self):
+        """Names of every section that has been saved in any draft."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT section FROM section_keys ORDER BY section")]
+
+    def load_draft(self, draft_id):
+        """Return {section: text} for the latest version, in display order."""
+        self._flush_draft(draft_id)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section, content FROM draft_sections WHERE draft_id = ? ORDER BY position",
+                (draft_id,),
+            ).fetchall()
+        return dict(rows)
+
+    def iter_drafts(self, draft_ids=None, chunk_size=100):
+        """Yield (draft_id, {section: text}) for every draft, or the given ids, in id order.
+
+        Drafts are read chunk_size at a time and the lock is released between
+        chunks, so exporting a large store neither holds it in memory nor blocks saves.
+        """
+        self.flush()
+        if draft_ids is not None:
+            draft_ids = sorted(set(draft_ids))
+        last, start = 0, 0
+        while True:
+            with self._lock:
+                if draft_ids is None:
+                    chunk = self._conn.execute(
+                        "SELECT id FROM drafts WHERE id > ? ORDER BY id LIMIT ?", (last, chunk_size)).fetchall()
+                else:
+                    wanted = draft_ids[start:start + chunk_size]
+                    start += chunk_size
+                    if not wanted:
+                        return
+                    chunk = self._conn.execute(
+                        f"SELECT id FROM drafts WHERE id IN ({', '.join('?' * len(wanted))}) ORDER BY id",
+                        wanted).fetchall()
+                chunk = [row[0] for row in chunk]
+                if not chunk:
+                    if draft_ids is None:
+                        return
+                    continue
+                rows = self._conn.execute(
+                    f"SELECT draft_id, section, content FROM draft_sections WHERE draft_id IN "
+                    f"({', '.join('?' * len(chunk))}) ORDER BY draft_id, position", chunk,
+                ).fetchall()
+            sections = {draft_id: {} for draft_id in chunk}
+            for draft_id, section, content in rows:
+                sections[draft_id][section] = content
+            for draft_id in chunk:
+                yield draft_id, sections[draft_id]
+            last = chunk[-1]
+
+    def find_drafts(self, organization, program_title=None):
+        query = "SELECT id, organization, program_title, updated_at FROM drafts WHERE organization = ?"
+        params = [organization]
+        if program_title is not None:
+            query += " AND program_title = ?"
+            params.append(program_title)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY updated_at DESC", params).fetchall()
+
+    def list_drafts(self, limit=200):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, organization, program_title, updated_at FROM drafts ORDER BY updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def saved_at(self, draft_id):
+        """When the draft's last save was committed, as time.time(), or None if there is no such draft."""
+        with self._lock:
+            row = self._conn.execute("SELECT updated_at FROM drafts WHERE id = ?", (draft_id,)).fetchone()
+        return row[0] if row else None
+
+    def section_versions(self, draft_id, section):
+        """Return [(version, replaced_at, text)] from newest to oldest; the current version has no replaced_at."""
+        with self._lock:
+            current = self._conn.execute(
+                "SELECT content, version FROM draft_sections WHERE draft_id = ? AND section = ?",
+                (draft_id, section),
+            ).fetchone()
+            if current is None:
+                return []
+            history = self._conn.execute(
+                "SELECT version, replaced_at, delta FROM section_history "
+                "WHERE draft_id = ? AND section = ? ORDER BY version DESC",
+                (draft_id, section),
+            ).fetchall()
+        text, version = current
+        versions = [(version, None, text)]
+        for version, replaced_at, delta in history:
+            text = apply_delta(text, delta)
+            versions.append((version, replaced_at, text))
+        return versions
+
+    def delete_draft(self, draft_id):
+        with self._saving(draft_id):
+            # Queued changes to a deleted draft are dropped, not written after it
+            self._take_pending(draft_id)
+            with self._lock:
+                conn = self._conn
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute("DELETE FROM section_search WHERE rowid IN "
+                                 "(SELECT id FROM section_keys WHERE draft_id = ?)", (draft_id,))
+                    conn.execute("DELETE FROM section_keys WHERE draft_id = ?", (draft_id,))
+                    conn.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
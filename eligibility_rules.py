@@ -0,0 +1,273 @@
+from collections import namedtuple
+from string import Formatter
+import re
+
+from mn_counties import is_distressed_county, is_metro_county, is_rural_county
+
+# Rule tables shared by the interactive checkers and bulk screening. The tables
+# themselves are declared per jurisdiction in jurisdictions/*.json and loaded
+# by jurisdiction_engine.py.
+#
+# A rule fires when its condition holds and then contributes its message to the
+# feedback list. Conditions are nested lists so the same table can be evaluated
+# against a single session's responses dict or, column-wise, against a pandas
+# DataFrame holding one applicant per row:
+#
+#   ["eq", field, value]          ["ne", field, value]
+#   ["in", field, [values]]       ["lt" | "le" | "gt" | "ge", field, number]
+#   ["nonempty", field]           ["has" | "lacks", field, value]   (multiselect fields)
+#   ["contains_any", field, [substrings]]                    (case-insensitive)
+#   ["all", cond, ...]            ["any", cond, ...]          ["not", cond]
+#
+# Derived fields are "flag" answers computed from another answer by a lookup
+# function, e.g. whether the county typed in is a metro county.
+
+Rule = namedtuple("Rule", ["id", "section", "when", "message"])
+RuleTable = namedtuple("RuleTable", ["fields", "rules", "derived"], defaults=[None])
+
+# Field kinds and the value assumed when an answer is missing, mirroring the
+# defaults the Results sections used with responses.get(...)
+FIELD_DEFAULTS = {"choice": None, "text": "", "int": 0, "float": 0.0, "multi": (), "flag": False}
+
+# Multiselect answers are stored as a single delimited string in DataFrames
+MULTI_SEP = ";"
+
+# Lookup functions that derived fields may name in jurisdiction files
+LOOKUPS = {
+    "is_metro_county": is_metro_county,
+    "is_distressed_county": is_distressed_county,
+    "is_rural_county": is_rural_county,
+}
+
+_COMPARISONS = {
+    "lt": lambda a, b: a < b,
+    "le": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "ge": lambda a, b: a >= b,
+}
+
+_formatter = Formatter()
+
+
+def _split_multi(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(MULTI_SEP) if v.strip()]
+    return list(value)
+
+
+# Single-session evaluation, used by the interactive apps. Tables are compiled
+# once into closures so a rerun doesn't re-walk the condition lists.
+
+def _getter(field, kind):
+    default = FIELD_DEFAULTS[kind]
+    if kind == "multi":
+        return lambda responses: _split_multi(responses.get(field, default))
+    return lambda responses: responses.get(field, default)
+
+
+def _compile(cond, fields):
+    op = cond[0]
+    if op in ("all", "any"):
+        parts = [_compile(c, fields) for c in cond[1:]]
+        if op == "all":
+            return lambda r: all(part(r) for part in parts)
+        return lambda r: any(part(r) for part in parts)
+    if op == "not":
+        inner = _compile(cond[1], fields)
+        return lambda r: not inner(r)
+    if cond[1] not in fields:
+        raise ValueError(f"Rule condition {cond!r} uses unknown field {cond[1]!r}")
+    get = _getter(cond[1], fields[cond[1]])
+    if op == "eq":
+        value = cond[2]
+        return lambda r: get(r) == value
+    if op == "ne":
+        value = cond[2]
+        return lambda r: get(r) != value
+    if op == "in":
+        values = cond[2]
+        return lambda r: get(r) in values
+    if op in _COMPARISONS:
+        compare, value = _COMPARISONS[op], cond[2]
+        return lambda r: compare(get(r), value)
+    if op == "nonempty":
+        return lambda r: bool(get(r))
+    if op == "has":
+        value = cond[2]
+        return lambda r: value in get(r)
+    if op == "lacks":
+        value = cond[2]
+        return lambda r: value not in get(r)
+    if op == "contains_any":
+        needles = [s.lower() for s in cond[2]]
+        return lambda r: any(n in (get(r) or "").lower() for n in needles)
+    raise ValueError(f"Unknown rule operator: {op}")
+
+
+def _compile_message(message, fields):
+    getters = {}
+    for _, name, _, _ in _formatter.parse(message):
+        if name is None:
+            continue
+        if name not in fields:
+            raise ValueError(f"Message {message!r} uses unknown field {name!r}")
+        get = _getter(name, fields[name])
+        getters[name] = (lambda r, get=get: ", ".join(get(r))) if fields[name] == "multi" else get
+    if not getters:
+        return lambda r: message
+    return lambda r: message.format(**{name: get(r) for name, get in getters.items()})
+
+
+def derive_responses(responses, table):
+    """Return the responses with the table's derived fields filled in."""
+    if not table.derived:
+        return responses
+    answers = dict(responses)
+    for field, (lookup, source) in table.derived.items():
+        answers[field] = bool(lookup(answers.get(source)))
+    return answers
+
+
+def compile_condition(cond, fields):
+    """Compile one condition into check(responses) -> bool; pass responses through derive_responses first."""
+    return _compile(cond, fields)
+
+
+def compile_rules(table):
+    """Compile a table into evaluate(responses) -> ({rule_id: passed}, feedback)."""
+    compiled = [(rule.id, _compile(rule.when, table.fields), _compile_message(rule.message, table.fields))
+                for rule in table.rules]
+
+    def evaluate(responses):
+        responses = derive_responses(responses, table)
+        flags, feedback = {}, []
+        for rule_id, check, render in compiled:
+            passed = check(responses)
+            flags[rule_id] = passed
+            if passed:
+                feedback.append(render(responses))
+        return flags, feedback
+
+    return evaluate
+
+
+def evaluate_responses(responses, table):
+    """Evaluate one session's responses; returns ({rule_id: passed}, feedback)."""
+    return compile_rules(table)(responses)
+
+
+# Column-wise evaluation over a DataFrame with one applicant per row
+
+def prepare_frame(df, table):
+    """Return a copy of df holding every rule field, with defaults filled in."""
+    import pandas as pd
+
+    frame = pd.DataFrame(index=df.index)
+    derived = table.derived or {}
+    for field, kind in table.fields.items():
+        if field in derived:
+            continue
+        column = df[field] if field in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if kind in ("int", "float"):
+            column = pd.to_numeric(column, errors="coerce").fillna(0)
+            column = column.astype("int64" if kind == "int" else "float64")
+        elif kind == "multi":
+            if pd.api.types.infer_dtype(column, skipna=True) == "mixed":
+                column = column.str.join(MULTI_SEP)
+            column = column.fillna("").astype(str)
+        elif kind == "text":
+            column = column.fillna("").astype(str)
+        frame[field] = column
+    for field, (lookup, source) in derived.items():
+        # One lookup per distinct value rather than per row
+        values = frame[source]
+        resolved = {value: bool(lookup(value)) for value in values.unique()}
+        frame[field] = values.map(resolved).astype(bool)
+    return frame
+
+
+def _mask(cond, frame, fields):
+    op = cond[0]
+    if op in ("all", "any"):
+        masks = [_mask(c, frame, fields) for c in cond[1:]]
+        result = masks[0]
+        for m in masks[1:]:
+            result = (result & m) if op == "all" else (result | m)
+        return result
+    if op == "not":
+        return ~_mask(cond[1], frame, fields)
+    column = frame[cond[1]]
+    if op == "eq":
+        return column.eq(cond[2]).fillna(False)
+    if op == "ne":
+        return column.ne(cond[2]).fillna(True)
+    if op == "in":
+        return column.isin(cond[2])
+    if op in _COMPARISONS:
+        return _COMPARISONS[op](column, cond[2])
+    if op == "nonempty":
+        return column.ne("")
+    if op in ("has", "lacks"):
+        pattern = rf"(?:^|{MULTI_SEP})\s*{re.escape(cond[2])}\s*(?:{MULTI_SEP}|$)"
+        found = column.str.contains(pattern, regex=True)
+        return found if op == "has" else ~found
+    if op == "contains_any":
+        pattern = "|".join(re.escape(s.lower()) for s in cond[2])
+        return column.str.lower().str.contains(pattern, regex=True)
+    raise ValueError(f"Unknown rule operator: {op}")
+
+
+def _render_column(message, frame, mask, fields):
+    import pandas as pd
+
+    rows = frame.loc[mask]
+    out = pd.Series("", index=rows.index, dtype=object)
+    for literal, name, spec, _ in _formatter.parse(message):
+        out = out + literal
+        if name is None:
+            continue
+        column = rows[name]
+        if fields[name] == "multi":
+            column = column.str.replace(rf"\s*{MULTI_SEP}\s*", ", ", regex=True)
+        elif spec:
+            column = column.map(("{:" + spec + "}").format)
+        else:
+            column = column.astype(str)
+        out = out + column
+    return out.reindex(frame.index)
+
+
+def evaluate_flags(df, table):
+    """Like evaluate_frame, but only the pass/fail flags; skips rendering messages."""
+    import pandas as pd
+
+    frame = prepare_frame(df, table)
+    return pd.DataFrame({rule.id: _mask(rule.when, frame, table.fields).astype(bool) for rule in table.rules},
+                        index=df.index)
+
+
+def evaluate_frame(df, table):
+    """Evaluate every row of df at once.
+
+    Returns (flags, messages): two DataFrames indexed like df with one column
+    per rule id, holding the pass/fail flag and the feedback string (or NaN
+    when the rule did not fire).
+    """
+    import pandas as pd
+
+    frame = prepare_frame(df, table)
+    flags, messages = {}, {}
+    for rule in table.rules:
+        mask = _mask(rule.when, frame, table.fields).astype(bool)
+        flags[rule.id] = mask
+        messages[rule.id] = _render_column(rule.message, frame, mask, table.fields)
+    return pd.DataFrame(flags, index=df.index), pd.DataFrame(messages, index=df.index)
+
+
+def feedback_lists(messages):
+    """Collapse a messages frame into one feedback list per row, in rule order."""
+    stacked = messages.stack()
+    grouped = stacked.groupby(level=0, sort=False).agg(list)
+    return grouped.reindex(messages.index).apply(lambda v: v if isinstance(v, list) else [])
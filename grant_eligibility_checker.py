@@ -0,0 +1,5 @@
+from checker_app import run_checker
+
+# Every jurisdiction in jurisdictions/ from one deployment, chosen in the sidebar
+# (or with ?jurisdiction=<id>)
+run_checker()
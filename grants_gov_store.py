@@ -0,0 +1,376 @@
+import heapq
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+# Columnar on-disk store of Grants.gov opportunities, written by
+# import_grants_gov.py and memory-mapped by the checkers.
+#
+# A store is a directory holding manifest.json and one or more segment files.
+# The first segment is a full import; each later segment holds only the
+# opportunities that changed in a newer extract plus tombstones for those that
+# disappeared from it. For every opportunity the newest segment wins, so an
+# update never rewrites older segments until they are compacted.
+#
+# Segment layout (little endian, every block 8-byte aligned):
+#
+#   b"GRANTSG1"  magic
+#   u64          header length
+#   header       JSON: {"rows": n, "columns": {name: {"kind", "offset", ...}},
+#                       "tombstones": {"offset", "count"}}
+#   blocks       i64 / f64 columns as raw arrays; str columns as n+1 i64
+#                offsets followed by a UTF-8 blob
+#
+# Columns are read straight from the mapping with memoryview.cast, so opening
+# a store parses only the small JSON headers and nothing is decoded until a
+# row is actually used.
+
+GRANTS_GOV_STORE = os.environ.get("GRANTS_GOV_STORE", "grants_gov_store")
+
+MAGIC = b"GRANTSG1"
+MANIFEST = "manifest.json"
+
+# Eligible applicant codes used in the extract, one bit each
+ELIGIBLE_CODES = ["00", "01", "02", "04", "05", "06", "07", "08", "11", "12", "13", "20", "21", "22", "23", "25", "99"]
+ELIGIBLE_BIT = {code: 1 << i for i, code in enumerate(ELIGIBLE_CODES)}
+SMALL_BUSINESS_ELIGIBLE = ELIGIBLE_BIT["22"] | ELIGIBLE_BIT["23"] | ELIGIBLE_BIT["99"]
+
+# Category of funding activity codes, one bit each
+ACTIVITY_CODES = ["ACA", "AG", "AR", "BC", "CD", "CP", "DPR", "ED", "ELT", "EN", "ENV", "FN", "HL", "HO", "HU",
+                  "IIJ", "IS", "ISS", "LJL", "NR", "O", "OZ", "RA", "RD", "ST", "T"]
+ACTIVITY_BIT = {code: 1 << i for i, code in enumerate(ACTIVITY_CODES)}
+
+# Program catalog industry tags -> funding activity categories
+ACTIVITY_BY_INDUSTRY = {
+    "technology": ["ST"],
+    "agriculture": ["AG"],
+    "manufacturing": ["BC"],
+    "infrastructure": ["T", "CD"],
+    "energy": ["EN"],
+    "tourism": ["BC", "CD"],
+    "childcare": ["ISS", "ED"],
+    "housing": ["HO"],
+    "healthcare": ["HL"],
+    "retail": ["BC"],
+    "real_estate": ["HO", "CD"],
+}
+
+# Column name -> kind. Dates are yyyymmdd integers (0 when absent); money is
+# NaN when absent; cost_sharing is 1 / 0 / -1 (unknown).
+COLUMNS = {
+    "opportunity_id": "i64",
+    "checksum": "i64",
+    "is_forecast": "i64",
+    "opportunity_number": "str",
+    "title": "str",
+    "agency_code": "str",
+    "agency_name": "str",
+    "category": "str",
+    "instruments": "str",
+    "cfda": "str",
+    "activity": "i64",
+    "eligible": "i64",
+    "post_date": "i64",
+    "close_date": "i64",
+    "last_updated": "i64",
+    "award_ceiling": "f64",
+    "award_floor": "f64",
+    "total_funding": "f64",
+    "expected_awards": "i64",
+    "cost_sharing": "i64",
+    "url": "str",
+    "eligibility_info": "str",
+    "description": "str",
+}
+
+Opportunity = namedtuple("Opportunity", list(COLUMNS))
+
+_TYPECODES = {"i64": "q", "f64": "d"}
+_HEADER = struct.Struct("<8sQ")
+
+
+def _pad(n):
+    return -n % 8
+
+
+def yyyymmdd(day):
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+class Segment:
+    """Read-only view of one segment file through a memory map."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Grants.gov store segment")
+        header = json.loads(self._map[_HEADER.size:_HEADER.size + header_length])
+        self.rows = header["rows"]
+        self._view = memoryview(self._map)
+        self._columns = {}
+        for name, spec in header["columns"].items():
+            if spec["kind"] == "str":
+                offsets = self._view[spec["offset"]:spec["offset"] + 8 * (self.rows + 1)].cast("q")
+                blob = self._view[spec["data"]:spec["data"] + spec["length"]]
+                self._columns[name] = (offsets, blob)
+            else:
+                start = spec["offset"]
+                self._columns[name] = self._view[start:start + 8 * self.rows].cast(_TYPECODES[spec["kind"]])
+        tombstones = header["tombstones"]
+        self.tombstones = self._view[tombstones["offset"]:tombstones["offset"] + 8 * tombstones["count"]].cast("q")
+
+    def column(self, name):
+        """Numeric column as a memoryview; str columns as (offsets, blob)."""
+        return self._columns[name]
+
+    def value(self, name, row):
+        column = self._columns[name]
+        if COLUMNS[name] == "str":
+            offsets, blob = column
+            return str(blob[offsets[row]:offsets[row + 1]], "utf-8")
+        return column[row]
+
+    def record(self, row):
+        return Opportunity(*(self.value(name, row) for name in COLUMNS))
+
+    def close(self):
+        # Views must be released before the map can close
+        for column in self._columns.values():
+            for view in column if isinstance(column, tuple) else (column,):
+                view.release()
+        self.tombstones.release()
+        self._view.release()
+        self._map.close()
+
+
+class SegmentWriter:
+    """Append rows to a new segment with bounded memory.
+
+    Rows are buffered per column and spilled to scratch files every
+    chunk_size rows; close() assembles the segment next to its final path and
+    renames it into place.
+    """
+
+    def __init__(self, path, chunk_size=5000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self._scratch = tempfile.mkdtemp(prefix=".segment-", dir=os.path.dirname(os.path.abspath(path)))
+        self._spill = {}
+        for name, kind in COLUMNS.items():
+            files = [open(os.path.join(self._scratch, f"{name}.data"), "wb")]
+            if kind == "str":
+                files.append(open(os.path.join(self._scratch, f"{name}.offsets"), "wb"))
+            self._spill[name] = files
+        self._buffer = {name: [] for name in COLUMNS}
+        self._string_bytes = {name: 0 for name, kind in COLUMNS.items() if kind == "str"}
+        self._tombstones = array("q")
+
+    def append(self, row):
+        for name in COLUMNS:
+            self._buffer[name].append(row[name])
+        self.rows += 1
+        if len(self._buffer["opportunity_id"]) >= self.chunk_size:
+            self._flush()
+
+    def delete(self, opportunity_id):
+        self._tombstones.append(opportunity_id)
+
+    def _flush(self):
+        for name, kind in COLUMNS.items():
+            values = self._buffer[name]
+            if kind == "str":
+                data, offsets = self._spill[name]
+                encoded = [v.encode("utf-8") for v in values]
+                position, ends = self._string_bytes[name], array("q")
+                for chunk in encoded:
+                    position += len(chunk)
+                    ends.append(position)
+                data.write(b"".join(encoded))
+                ends.tofile(offsets)
+                self._string_bytes[name] = position
+            else:
+                array(_TYPECODES[kind], values).tofile(self._spill[name][0])
+            values.clear()
+
+    def close(self):
+        """Write the segment and return its row count."""
+        self._flush()
+        for files in self._spill.values():
+            for f in files:
+                f.close()
+        columns, layout, position = {}, [], 0
+        for name, kind in COLUMNS.items():
+            data_path = os.path.join(self._scratch, f"{name}.data")
+            if kind == "str":
+                offsets_size = 8 * (self.rows + 1)
+                length = self._string_bytes[name]
+                columns[name] = {"kind": kind, "offset": position, "data": position + offsets_size, "length": length}
+                layout.append((b"\0" * 8, None))
+                layout.append((None, os.path.join(self._scratch, f"{name}.offsets")))
+                layout.append((None, data_path))
+                position += offsets_size + length
+            else:
+                columns[name] = {"kind": kind, "offset": position}
+                layout.append((None, data_path))
+                position += 8 * self.rows
+            layout.append((b"\0" * _pad(position), None))
+            position += _pad(position)
+        tombstones = {"offset": position, "count": len(self._tombstones)}
+        header = {"rows": self.rows, "columns": columns, "tombstones": tombstones}
+
+        # Offsets in the header are relative to the data start; fix them up once its size is known
+        def encode(base):
+            fixed = json.loads(json.dumps(header))
+            for spec in fixed["columns"].values():
+                spec["offset"] += base
+                if "data" in spec:
+                    spec["data"] += base
+            fixed["tombstones"]["offset"] += base
+            return json.dumps(fixed, separators=(",", ":")).encode("utf-8")
+
+        size = len(encode(0))
+        while True:
+            base = _HEADER.size + size + _pad(_HEADER.size + size)
+            encoded = encode(base)
+            if len(encoded) <= size:
+                break
+            size = len(encoded)
+        encoded = encoded.ljust(size)
+
+        partial = self.path + ".partial"
+        with open(partial, "wb") as out:
+            out.write(_HEADER.pack(MAGIC, size))
+            out.write(encoded)
+            out.write(b"\0" * _pad(_HEADER.size + size))
+            for literal, path in layout:
+                if literal is not None:
+                    out.write(literal)
+                else:
+                    with open(path, "rb") as f:
+                        shutil.copyfileobj(f, out)
+            self._tombstones.tofile(out)
+        os.replace(partial, self.path)
+        shutil.rmtree(self._scratch, ignore_errors=True)
+        return self.rows
+
+    def abort(self):
+        for files in self._spill.values():
+            for f in files:
+                f.close()
+        shutil.rmtree(self._scratch, ignore_errors=True)
+
+
+class OpportunityStore:
+    """Newest-segment-wins view over every segment listed in a store's manifest."""
+
+    def __init__(self, path=GRANTS_GOV_STORE):
+        self.path = path
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.segments = [Segment(os.path.join(path, s["file"])) for s in self.manifest["segments"]]
+        # (segment index, row) of the live version of each opportunity, built from the id columns only
+        self._live = {}
+        hidden = set()
+        for number in range(len(self.segments) - 1, -1, -1):
+            segment = self.segments[number]
+            ids = segment.column("opportunity_id")
+            for row in range(segment.rows - 1, -1, -1):
+                opportunity_id = ids[row]
+                if opportunity_id not in self._live and opportunity_id not in hidden:
+                    self._live[opportunity_id] = (number, row)
+            hidden.update(segment.tombstones)
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, opportunity_id):
+        return opportunity_id in self._live
+
+    def get(self, opportunity_id):
+        location = self._live.get(opportunity_id)
+        if location is None:
+            return None
+        number, row = location
+        return self.segments[number].record(row)
+
+    def checksums(self):
+        """{opportunity_id: checksum} for every live opportunity."""
+        return {opportunity_id: self.segments[number].column("checksum")[row]
+                for opportunity_id, (number, row) in self._live.items()}
+
+    def records(self):
+        for number, row in self._live.values():
+            yield self.segments[number].record(row)
+
+    def search(self, eligible=0, activity=0, open_on=None, limit=None):
+        """Yield live opportunities matching every given filter, soonest closing first.
+
+        eligible and activity are bitmasks (any overlap matches); open_on is a
+        date the opportunity must not have closed by. Only integer columns are
+        read while filtering; matching rows are decoded as they are yielded.
+        """
+        cutoff = yyyymmdd(open_on) if open_on else 0
+        hits = []
+        for number, row in self._live.values():
+            segment = self.segments[number]
+            if eligible and not segment.column("eligible")[row] & eligible:
+                continue
+            if activity and not segment.column("activity")[row] & activity:
+                continue
+            if cutoff:
+                close_date = segment.column("close_date")[row]
+                if close_date and close_date < cutoff or segment.column("is_forecast")[row]:
+                    continue
+            close_date = segment.column("close_date")[row] or 99999999
+            hits.append((close_date, number, row))
+        hits = heapq.nsmallest(limit, hits) if limit is not None else sorted(hits)
+        for _, number, row in hits:
+            yield self.segments[number].record(row)
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+
+def write_manifest(path, manifest):
+    # Readers see either the old or the new manifest, never a partial one
+    partial = os.path.join(path, MANIFEST + ".partial")
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(partial, os.path.join(path, MANIFEST))
+
+
+@lru_cache(maxsize=4)
+def _open_store(path, manifest_version):
+    return OpportunityStore(path)
+
+
+def open_store(path=GRANTS_GOV_STORE):
+    """Return the mapped store, reopened only when an import replaces the manifest; None if never imported."""
+    try:
+        manifest_version = os.stat(os.path.join(path, MANIFEST)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _open_store(path, manifest_version)
+
+
+def matching_opportunities(store, profile, open_on=None, limit=5):
+    """Open opportunities a small business could apply for, filtered by the profile's industries."""
+    activity = 0
+    for tag in profile.tags.get("industry", ()):
+        for code in ACTIVITY_BY_INDUSTRY.get(tag, ()):
+            activity |= ACTIVITY_BIT[code]
+    return list(store.search(eligible=SMALL_BUSINESS_ELIGIBLE, activity=activity,
+                             open_on=open_on or date.today(), limit=limit))
@@ -1,30 +1,43 @@
-import streamlit as st
-import pandas as pd
-import base64
+import csv
+import hashlib
+import io
+import json
+import time
+import zipfile
+from datetime import datetime
 
-# Initialize a dictionary to hold all inputs
-all_inputs = {}
+import streamlit as st
 
-# Function to save input data
-def save_input_data(section, input_data):
-    all_inputs[section] = input_data
+from app_metrics import EXPORT_SECONDS, begin_rerun, end_rerun
+from draft_archive import SECTIONS, export_archive, import_archive
+from draft_render import FORMATS, NOTE_SECTIONS, render_to_file
+from draft_store import DraftStore
+from text_analytics import duplicate_paragraphs, reading_ease, reading_label, section_limits, section_stats
 
-# Function to collect inputs into a DataFrame
-def collect_inputs():
-    df = pd.DataFrame(list(all_inputs.items()), columns=['Section', 'Input'])
-    return df
+# Timed from the first line; recorded at the end of the script
+rerun = begin_rerun()
 
-# Helper function to generate a CSV download link
-def get_table_download_link(df):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()  # some strings <-> bytes conversions necessary here
-    href = f'<a href="data:file/csv;base64,{b64}" download="grant_data.csv">Download CSV File</a>'
-    return href
+# Seconds between automatic saves of changed sections
+AUTOSAVE_SECONDS = 5
 
-# Streamlit app code where inputs are collected
-st.title('Grant Writing Template v1')
+# Free-text sections that get live statistics
+TEXT_SECTIONS = [
+    "Grant Outline",
+    "Material Organization",
+    "Executive Summary",
+    "Organization Description",
+    "Program Statement Need",
+    "Program Description",
+    "Goals Description",
+    "Program Activities",
+    "Timeline",
+    "Staff",
+    "Evaluation",
+    "Budget",
+    "Summary",
+]
 
-# Grant source selection and entity type
+# Grant sources offered in the multiselect
 grant_options = [
     "Family Foundations",
     "Independent Private Foundations",
@@ -36,57 +49,292 @@ grant_options = [
     "State Grants",
     "Local Grants"
 ]
-selected_grants = st.multiselect("Select grant sources:", grant_options)
+
+# Search results shown in the sidebar
+SEARCH_RESULTS = 10
+
+# Rejected drafts listed after an archive import
+IMPORT_ERRORS_SHOWN = 20
+
+# Keep each session's inputs in its own session state
+if "inputs" not in st.session_state:
+    st.session_state.inputs = {}
+    st.session_state.draft_id = None
+    st.session_state.saved_inputs = {}
+    st.session_state.last_autosave = 0.0
+
+# Function to save input data
+def save_input_data(section, input_data):
+    st.session_state.inputs[section] = input_data
+
+# Content hash of the current draft; identical drafts share one export
+def draft_digest(inputs):
+    return hashlib.sha256(json.dumps(list(inputs.items())).encode()).hexdigest()
+
+# Build the CSV export; cached by digest so unchanged drafts are never re-serialized.
+# Written with the csv module so the app never has to import pandas.
+@st.cache_data(max_entries=256, show_spinner=False)
+def build_csv(digest, _items):
+    with EXPORT_SECONDS.time("template", "csv"):
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(['Section', 'Input'])
+        writer.writerows(_items)
+        return out.getvalue()
+
+# Render the draft as a formatted proposal. Each section's rendering is cached inside
+# draft_render, so a re-export after a small edit only re-renders the changed sections.
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_proposal(digest, fmt, _items):
+    with EXPORT_SECONDS.time("template", fmt), render_to_file(dict(_items), fmt) as rendered:
+        return rendered.read()
+
+# Export choices: label -> draft_render format (None for the raw CSV)
+EXPORT_FORMATS = {"CSV": None, "Markdown": "markdown", "Word (DOCX)": "docx", "PDF": "pdf"}
+
+# Counts, readability, the chosen funders' limits and paragraphs repeated from other sections
+# (duplicates, from duplicate_paragraphs) under a text section. section_stats is cached on
+# the text, so only the section that changed is re-analyzed.
+def show_stats(section, text, grant_sources, duplicates):
+    stats = section_stats(text)
+    if not stats.words:
+        return
+    limits = section_limits(grant_sources, section)
+    limited = {limit.unit for limit in limits}
+    parts = [] if "words" in limited else [f"{stats.words:,} words"]
+    for limit in limits:
+        count = getattr(stats, limit.unit)
+        usage = f"{count:,} / {limit.value:,} {limit.unit} ({limit.source})"
+        parts.append(f":red[{usage}]" if count > limit.value else usage)
+    if "characters" not in limited:
+        parts.append(f"{stats.characters:,} characters")
+    ease = reading_ease(stats)
+    parts.append(f"reading ease {ease:.0f} ({reading_label(ease)})")
+    for duplicate in duplicates.get(section, ()):
+        parts.append(f":orange[paragraph {duplicate.paragraph} repeats {', '.join(duplicate.sections)}]")
+    st.caption(" · ".join(parts))
+
+# One SQLite draft store shared by every session in the process
+@st.cache_resource
+def get_draft_store():
+    return DraftStore()
+
+# Save the sections that changed since the last save, at most every AUTOSAVE_SECONDS;
+# changes within that window are queued in the store and written when it ends
+def autosave(force=False):
+    inputs = st.session_state.inputs
+    saved = st.session_state.saved_inputs
+    changed = {section: value for section, value in inputs.items() if saved.get(section) != value}
+    if not changed and not force:
+        return
+    store = get_draft_store()
+    if st.session_state.draft_id is None:
+        # Don't create a draft until something beyond the default entity type is filled in
+        if not any(value for section, value in changed.items() if section != "Entity Type"):
+            return
+        st.session_state.draft_id = store.create_draft()
+    save = dict(positions={section: i for i, section in enumerate(inputs)},
+                organization=inputs.get("Organization Name", ""),
+                program_title=inputs.get("Program Title", ""))
+    elapsed = time.monotonic() - st.session_state.last_autosave
+    if force or elapsed >= AUTOSAVE_SECONDS:
+        # Also writes any changes still queued from earlier in the window
+        store.save_sections(st.session_state.draft_id, changed, **save)
+        st.session_state.last_autosave = time.monotonic()
+    else:
+        store.save_later(st.session_state.draft_id, changed, AUTOSAVE_SECONDS - elapsed, **save)
+    st.session_state.saved_inputs = dict(inputs)
+
+# Load a saved draft into the widgets (runs as a callback, before the widgets are drawn)
+def open_draft(draft_id):
+    sections = get_draft_store().load_draft(draft_id)
+    # Sections the draft doesn't have start blank rather than keeping the previous draft's text
+    missing = [section for section in SECTIONS if section not in sections]
+    for section in missing:
+        st.session_state.pop(section, None)
+    for section, value in sections.items():
+        if section == "Grant Source and Entity Type":
+            st.session_state[section] = [g for g in value.split(", ") if g in grant_options]
+        else:
+            st.session_state[section] = value
+    sections = {**sections, **dict.fromkeys(missing, "")}
+    st.session_state.inputs = dict(sections)
+    st.session_state.saved_inputs = dict(sections)
+    st.session_state.draft_id = draft_id
+    st.session_state.last_autosave = 0.0
+
+# Start a blank draft
+def new_draft():
+    for section in st.session_state.inputs:
+        st.session_state.pop(section, None)
+    st.session_state.inputs = {}
+    st.session_state.saved_inputs = {}
+    st.session_state.draft_id = None
+    st.session_state.last_autosave = 0.0
+
+# Streamlit app code where inputs are collected
+st.title('Grant Writing Template v1')
+
+# Saved drafts
+st.sidebar.header("Saved Drafts")
+drafts = get_draft_store().list_drafts()
+if drafts:
+    labels = {f"#{d[0]} {d[1] or 'Untitled organization'} — {d[2] or 'Untitled program'} "
+              f"({datetime.fromtimestamp(d[3]):%Y-%m-%d %H:%M})": d[0] for d in drafts}
+    chosen = st.sidebar.selectbox("Draft", list(labels))
+    st.sidebar.button("Open Draft", on_click=open_draft, args=(labels[chosen],))
+st.sidebar.button("New Draft", on_click=new_draft)
+
+# Search past language across every saved section
+st.sidebar.header("Search Drafts")
+search_text = st.sidebar.text_input("Find past language", key="search_text")
+search_sections = st.sidebar.multiselect("Only in sections", get_draft_store().indexed_sections(), key="search_sections")
+if search_text:
+    hits = get_draft_store().search(search_text, sections=search_sections, limit=SEARCH_RESULTS)
+    if not hits:
+        st.sidebar.caption("No saved sections match.")
+    for hit in hits:
+        st.sidebar.markdown(f"**#{hit.draft_id} {hit.organization or 'Untitled organization'}** — {hit.section}  \n"
+                            f"{hit.snippet}")
+        st.sidebar.button("Open", key=f"search-open-{hit.draft_id}-{hit.section}", on_click=open_draft,
+                          args=(hit.draft_id,))
+
+# Bulk import and export of many drafts as one zip archive
+st.sidebar.header("Import / Export Drafts")
+archive_file = st.sidebar.file_uploader("Drafts archive (.zip of CSV or JSON drafts)", type="zip", key="archive_upload")
+if archive_file is not None and st.sidebar.button("Import Drafts"):
+    imported, rejected, errors = 0, 0, []
+    try:
+        for line in import_archive(get_draft_store(), archive_file):
+            if line.error is None:
+                imported += 1
+                continue
+            rejected += 1
+            if len(errors) < IMPORT_ERRORS_SHOWN:
+                errors.append(f"{line.member}: {line.error}")
+    except zipfile.BadZipFile:
+        errors = None
+    st.session_state.archive_report = (archive_file.name, imported, rejected, errors)
+    # Rerun so the saved drafts list above includes the imported drafts
+    st.rerun()
+if "archive_report" in st.session_state:
+    name, imported, rejected, errors = st.session_state.archive_report
+    if errors is None:
+        st.sidebar.error(f"{name} is not a zip archive.")
+    else:
+        st.sidebar.caption(f"Imported {imported:,} drafts from {name}"
+                           + (f", rejected {rejected:,}:" if rejected else "."))
+        for error in errors:
+            st.sidebar.caption(f":red[{error}]")
+archive_label = st.sidebar.selectbox("Archive format", ["CSV", "JSON"], key="archive_format")
+if st.sidebar.button("Prepare Archive"):
+    archive = io.BytesIO()
+    count = export_archive(get_draft_store(), archive, archive_label.lower())
+    st.sidebar.download_button(f"Download {count:,} Drafts", archive.getvalue(), file_name="grant_drafts.zip",
+                               mime="application/zip")
+
+organization_name = st.text_input("Organization Name", key="Organization Name")
+save_input_data("Organization Name", organization_name)
+
+selected_grants = st.multiselect("Select grant sources:", grant_options, key="Grant Source and Entity Type")
 save_input_data("Grant Source and Entity Type", ", ".join(selected_grants))
 
-entity_type = st.selectbox("Select your entity type:", ["Non-profit entity", "For-profit entity"])
+entity_type = st.selectbox("Select your entity type:", ["Non-profit entity", "For-profit entity"], key="Entity Type")
 save_input_data("Entity Type", entity_type)
 
+# Analyze every text section up front so repeats can be flagged under both copies
+# (widget values are already in session state when the script reruns). Notes are
+# expected to be copied into the proposal, so they aren't checked for repeats.
+duplicates = duplicate_paragraphs({section: st.session_state.get(section) or ""
+                                   for section in TEXT_SECTIONS if section not in NOTE_SECTIONS})
+
 # Adjusted all st.text_area components to have a consistent height of 100 for uniformity
-grant_outline = st.text_area("Grant Outline (topic, outline, sub-header, sub-sub header)", height=100)
+grant_outline = st.text_area("Grant Outline (topic, outline, sub-header, sub-sub header)", height=100, key="Grant Outline")
 save_input_data("Grant Outline", grant_outline)
+show_stats("Grant Outline", grant_outline, selected_grants, duplicates)
 
-material_organization = st.text_area("Before you start filling in the outline (organize the material you have available)", height=100)
+material_organization = st.text_area("Before you start filling in the outline (organize the material you have available)", height=100, key="Material Organization")
 save_input_data("Material Organization", material_organization)
+show_stats("Material Organization", material_organization, selected_grants, duplicates)
 
-program_title = st.text_input("Program Title")
+program_title = st.text_input("Program Title", key="Program Title")
 save_input_data("Program Title", program_title)
 
-executive_summary = st.text_area("Executive Summary", height=100)
+executive_summary = st.text_area("Executive Summary", height=100, key="Executive Summary")
 save_input_data("Executive Summary", executive_summary)
+show_stats("Executive Summary", executive_summary, selected_grants, duplicates)
 
-organization_description = st.text_area("Description and Background of the Organization", height=100)
+organization_description = st.text_area("Description and Background of the Organization", height=100, key="Organization Description")
 save_input_data("Organization Description", organization_description)
+show_stats("Organization Description", organization_description, selected_grants, duplicates)
 
-program_statement_need = st.text_area("Program Statement and Need for the Program", height=100)
+program_statement_need = st.text_area("Program Statement and Need for the Program", height=100, key="Program Statement Need")
 save_input_data("Program Statement Need", program_statement_need)
+show_stats("Program Statement Need", program_statement_need, selected_grants, duplicates)
 
-program_description = st.text_area("Program Description", height=100)
+program_description = st.text_area("Program Description", height=100, key="Program Description")
 save_input_data("Program Description", program_description)
+show_stats("Program Description", program_description, selected_grants, duplicates)
 
-goals_description = st.text_area("Goals Description", height=100)
+goals_description = st.text_area("Goals Description", height=100, key="Goals Description")
 save_input_data("Goals Description", goals_description)
+show_stats("Goals Description", goals_description, selected_grants, duplicates)
 
-program_activities = st.text_area("Program Activities", height=100)
+program_activities = st.text_area("Program Activities", height=100, key="Program Activities")
 save_input_data("Program Activities", program_activities)
+show_stats("Program Activities", program_activities, selected_grants, duplicates)
 
-timeline = st.text_area("Timeline", height=100)
+timeline = st.text_area("Timeline", height=100, key="Timeline")
 save_input_data("Timeline", timeline)
+show_stats("Timeline", timeline, selected_grants, duplicates)
 
-staff = st.text_area("Staff", height=100)
+staff = st.text_area("Staff", height=100, key="Staff")
 save_input_data("Staff", staff)
+show_stats("Staff", staff, selected_grants, duplicates)
 
-evaluation = st.text_area("Evaluation", height=100)
+evaluation = st.text_area("Evaluation", height=100, key="Evaluation")
 save_input_data("Evaluation", evaluation)
+show_stats("Evaluation", evaluation, selected_grants, duplicates)
 
-budget = st.text_area("Budget", height=100)
+budget = st.text_area("Budget", height=100, key="Budget")
 save_input_data("Budget", budget)
+show_stats("Budget", budget, selected_grants, duplicates)
 
-budget_narrative = st.text_area("Summary", height=100)
+budget_narrative = st.text_area("Summary", height=100, key="Summary")
 save_input_data("Summary", budget_narrative)
+show_stats("Summary", budget_narrative, selected_grants, duplicates)
+
+# Only render the draft when the user asks for a download, and only once per version and format
+inputs = st.session_state.inputs
+digest = draft_digest(inputs)
+export_label = st.selectbox("Export format", list(EXPORT_FORMATS), key="export_format")
+export_format = EXPORT_FORMATS[export_label]
+if st.session_state.get("export_digest") == (export_format, digest):
+    if export_format is None:
+        st.download_button("Download CSV File", build_csv(digest, tuple(inputs.items())),
+                           file_name="grant_data.csv", mime="text/csv")
+    else:
+        file_format = FORMATS[export_format]
+        st.download_button(f"Download {export_label} File", build_proposal(digest, export_format, tuple(inputs.items())),
+                           file_name="grant_proposal" + file_format.extension, mime=file_format.mime)
+elif st.button("Prepare Download"):
+    st.session_state.export_digest = (export_format, digest)
+    st.rerun()
 
-# After collecting all inputs, convert them to a DataFrame
-df_inputs = collect_inputs()
+# Autosave changed sections (debounced), or right away on request
+if st.sidebar.button("Save Draft"):
+    autosave(force=True)
+else:
+    autosave()
+if st.session_state.draft_id is not None:
+    draft_id = st.session_state.draft_id
+    saved_at = get_draft_store().saved_at(draft_id)
+    if get_draft_store().has_pending(draft_id):
+        st.sidebar.caption(f"Draft #{draft_id} has unsaved changes")
+    elif saved_at is not None:
+        age = time.time() - saved_at
+        st.sidebar.caption(f"Draft #{draft_id} saved " + (f"{age:.0f}s ago" if age < 60 else
+                                                          f"{datetime.fromtimestamp(saved_at):%Y-%m-%d %H:%M}"))
 
-# Display the download link
-st.markdown(get_table_download_link(df_inputs), unsafe_allow_html=True)
+# The template is a single page, so every rerun is recorded under one section
+end_rerun(rerun, "template", "draft", st.session_state.inputs)
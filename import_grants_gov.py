@@ -0,0 +1,264 @@
+"""Import a Grants.gov opportunities XML extract into the local columnar store.
+
+The extract (GrantsDBExtractYYYYMMDDv2.zip, or the XML inside it) is parsed
+as a stream, so memory stays flat however large the file is:
+
+    python import_grants_gov.py GrantsDBExtract20250415v2.zip
+    python import_grants_gov.py extract.xml --store /srv/grants_gov_store
+    python import_grants_gov.py --compact
+
+The first import writes a full segment. Later imports compare each record's
+checksum with the store and append a segment holding only new and changed
+opportunities, plus tombstones for ones missing from the extract (skip those
+with --partial when the file is not a full snapshot). Once there are more
+than --max-segments segments they are compacted back into one.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import zipfile
+import zlib
+from xml.etree.ElementTree import iterparse
+
+from grants_gov_store import (
+    ACTIVITY_BIT, COLUMNS, ELIGIBLE_BIT, GRANTS_GOV_STORE, MANIFEST, OpportunityStore, SegmentWriter,
+    write_manifest,
+)
+
+RECORD_TAGS = {"OpportunitySynopsisDetail_1_0": False, "OpportunityForecastDetail_1_0": True}
+
+# Extract element -> (column, parser); repeated elements are collected into lists
+TEXT_FIELDS = {
+    "OpportunityNumber": "opportunity_number",
+    "OpportunityTitle": "title",
+    "AgencyCode": "agency_code",
+    "AgencyName": "agency_name",
+    "OpportunityCategory": "category",
+    "AdditionalInformationURL": "url",
+    "AdditionalInformationOnEligibility": "eligibility_info",
+    "Description": "description",
+}
+DATE_FIELDS = {
+    "PostDate": "post_date",
+    "CloseDate": "close_date",
+    "EstimatedSynopsisCloseDate": "close_date",
+    "LastUpdatedDate": "last_updated",
+}
+MONEY_FIELDS = {
+    "AwardCeiling": "award_ceiling",
+    "AwardFloor": "award_floor",
+    "EstimatedTotalProgramFunding": "total_funding",
+}
+REPEATED_FIELDS = {"FundingInstrumentType", "CFDANumbers", "CategoryOfFundingActivity", "EligibleApplicants"}
+
+DEFAULT_MAX_SEGMENTS = 8
+
+
+def parse_date(text):
+    # The extract writes MMDDYYYY; ISO dates are accepted too
+    text = (text or "").strip()
+    if len(text) == 8 and text.isdigit():
+        return int(text[4:] + text[:4])
+    if len(text) == 10 and text[4] == "-":
+        return int(text.replace("-", ""))
+    return 0
+
+
+def parse_money(text):
+    try:
+        return float(text.replace(",", "").replace("$", ""))
+    except (AttributeError, ValueError):
+        return math.nan
+
+
+def parse_int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def build_row(fields, repeated, is_forecast):
+    row = {name: "" if kind == "str" else 0 for name, kind in COLUMNS.items()}
+    row["is_forecast"] = int(is_forecast)
+    for element, column in TEXT_FIELDS.items():
+        row[column] = (fields.get(element) or "").strip()
+    for element, column in DATE_FIELDS.items():
+        if element in fields:
+            row[column] = parse_date(fields[element])
+    for element, column in MONEY_FIELDS.items():
+        row[column] = parse_money(fields.get(element))
+    row["opportunity_id"] = parse_int(fields.get("OpportunityID"))
+    row["expected_awards"] = parse_int(fields.get("ExpectedNumberOfAwards"))
+    cost_sharing = (fields.get("CostSharingOrMatchingRequirement") or "").strip().lower()
+    row["cost_sharing"] = {"yes": 1, "no": 0}.get(cost_sharing, -1)
+    row["instruments"] = ";".join(repeated["FundingInstrumentType"])
+    row["cfda"] = ";".join(repeated["CFDANumbers"])
+    row["activity"] = sum(ACTIVITY_BIT.get(code, 0) for code in set(repeated["CategoryOfFundingActivity"]))
+    row["eligible"] = sum(ELIGIBLE_BIT.get(code, 0) for code in set(repeated["EligibleApplicants"]))
+    row["checksum"] = checksum(row)
+    return row
+
+
+def checksum(row):
+    """CRC of every column but the checksum itself; a changed record gets a new one."""
+    payload = "\x1f".join(repr(row[name]) for name in COLUMNS if name != "checksum")
+    return zlib.crc32(payload.encode("utf-8"))
+
+
+def iter_records(source):
+    """Yield one row dict per opportunity, clearing parsed elements as it goes."""
+    root = None
+    for event, elem in iterparse(source, events=("start", "end")):
+        if root is None:
+            root = elem
+            continue
+        if event != "end":
+            continue
+        tag = _local(elem.tag)
+        if tag not in RECORD_TAGS:
+            continue
+        fields, repeated = {}, {name: [] for name in REPEATED_FIELDS}
+        for child in elem:
+            name = _local(child.tag)
+            text = (child.text or "").strip()
+            if name in REPEATED_FIELDS:
+                if text:
+                    repeated[name].append(text)
+            else:
+                fields[name] = text
+        yield build_row(fields, repeated, RECORD_TAGS[tag])
+        # Drop the finished record from the tree so memory doesn't grow with the file
+        elem.clear()
+        root.clear()
+
+
+def open_extract(path):
+    if path == "-":
+        return sys.stdin.buffer
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        members = [name for name in archive.namelist() if name.lower().endswith(".xml")]
+        if not members:
+            raise SystemExit(f"{path} contains no XML extract")
+        return archive.open(members[0])
+    return open(path, "rb")
+
+
+def load_manifest(store_path):
+    if os.path.exists(os.path.join(store_path, MANIFEST)):
+        return OpportunityStore(store_path)
+    return None
+
+
+def next_segment(manifest):
+    number = manifest.get("next_segment", 1)
+    manifest["next_segment"] = number + 1
+    return f"segment-{number:06d}.gcs"
+
+
+def import_extract(path, store_path, partial=False, chunk_size=5000):
+    """Apply one extract to the store; returns (added_or_changed, deleted, unchanged)."""
+    os.makedirs(store_path, exist_ok=True)
+    store = load_manifest(store_path)
+    manifest = store.manifest if store else {"format": 1, "segments": []}
+    known = store.checksums() if store else {}
+    if store:
+        store.close()
+
+    name = next_segment(manifest)
+    writer = SegmentWriter(os.path.join(store_path, name), chunk_size=chunk_size)
+    seen, unchanged = set(), 0
+    try:
+        with open_extract(path) as source:
+            for row in iter_records(source):
+                opportunity_id = row["opportunity_id"]
+                seen.add(opportunity_id)
+                if known.get(opportunity_id) == row["checksum"]:
+                    unchanged += 1
+                    continue
+                writer.append(row)
+        deleted = 0 if partial else len(known.keys() - seen)
+        if not partial:
+            for opportunity_id in sorted(known.keys() - seen):
+                writer.delete(opportunity_id)
+    except BaseException:
+        writer.abort()
+        raise
+    if writer.rows == 0 and deleted == 0:
+        writer.abort()
+        return 0, 0, unchanged
+    writer.close()
+    manifest["segments"].append({
+        "file": name, "rows": writer.rows, "tombstones": deleted,
+        "extract": os.path.basename(path), "imported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    write_manifest(store_path, manifest)
+    return writer.rows, deleted, unchanged
+
+
+def compact(store_path, chunk_size=5000):
+    """Rewrite the live opportunities into a single segment and drop the old files."""
+    store = OpportunityStore(store_path)
+    manifest = store.manifest
+    old_files = [s["file"] for s in manifest["segments"]]
+    name = next_segment(manifest)
+    writer = SegmentWriter(os.path.join(store_path, name), chunk_size=chunk_size)
+    try:
+        for record in store.records():
+            writer.append(record._asdict())
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        store.close()
+    writer.close()
+    manifest["segments"] = [{
+        "file": name, "rows": writer.rows, "tombstones": 0,
+        "extract": "compacted", "imported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }]
+    write_manifest(store_path, manifest)
+    for old in old_files:
+        try:
+            os.remove(os.path.join(store_path, old))
+        except OSError:
+            # Still mapped by a running app on some platforms; it is no longer referenced
+            pass
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("extract", nargs="?", help="extract .zip or .xml file, or - for stdin")
+    parser.add_argument("--store", default=GRANTS_GOV_STORE, help=f"store directory (default: {GRANTS_GOV_STORE})")
+    parser.add_argument("--partial", action="store_true", help="the extract is not a full snapshot; don't delete")
+    parser.add_argument("--compact", action="store_true", help="compact the store into one segment")
+    parser.add_argument("--max-segments", type=int, default=DEFAULT_MAX_SEGMENTS)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows buffered before spilling to disk")
+    args = parser.parse_args(argv)
+    if not args.extract and not args.compact:
+        parser.error("give an extract to import, or --compact")
+
+    if args.extract:
+        start = time.perf_counter()
+        changed, deleted, unchanged = import_extract(args.extract, args.store, args.partial, args.chunk_size)
+        print(f"{changed} new or changed, {deleted} removed, {unchanged} unchanged "
+              f"({time.perf_counter() - start:.1f}s)")
+    store = load_manifest(args.store)
+    if store is None:
+        return 0
+    segments = len(store.manifest["segments"])
+    store.close()
+    if args.compact or segments > args.max_segments:
+        print(f"Compacted {segments} segments into one with {compact(args.store, args.chunk_size)} opportunities")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
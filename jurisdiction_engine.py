@@ -0,0 +1,146 @@
+import json
+import os
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+from eligibility_rules import LOOKUPS, Rule, RuleTable, compile_condition, compile_rules, derive_responses
+from program_catalog import NUMBER_DIMS, TAG_DIMS, Profile
+from response_records import RecordLayout
+
+# Loads jurisdiction definitions (questions, thresholds, rules and messages)
+# from jurisdictions/<id>.json and compiles each one once per process. Adding
+# a state is a new JSON file; no new app or process is needed.
+#
+# Rule conditions may refer to a threshold as "$name"; it is replaced with
+# the value from the file's "thresholds" block at load time.
+#
+# The optional "profile" block maps answers onto the program catalog's
+# vocabulary (see program_catalog.py): each tag is a rule condition, and each
+# number names the answer to compare with program ranges.
+
+JURISDICTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jurisdictions")
+
+Section = namedtuple("Section", ["name", "header", "fields"])
+
+# widget   name of the st.* input function
+# options  choices for selectbox/multiselect
+# kwargs   extra widget arguments (ISO date strings for date_input limits)
+# show_if  (key, [values]) - only shown when that answer is one of the values
+# derive   (key, hook) - also store hook(value) under key when this answer changes
+# note     hook(value, responses) drawn under the widget, e.g. a lookup result
+Field = namedtuple("Field", ["key", "widget", "label", "options", "kwargs", "show_if", "derive", "note"],
+                   defaults=[None, None, None, None, None])
+
+Jurisdiction = namedtuple("Jurisdiction", [
+    "id", "title", "intro", "next_steps", "incomplete", "footer", "as_of",
+    "thresholds", "sections", "rules", "evaluate", "profile", "layout",
+])
+
+_DATE_KWARGS = ("value", "min_value", "max_value")
+
+
+def available_jurisdictions():
+    return sorted(name[:-5] for name in os.listdir(JURISDICTIONS_DIR) if name.endswith(".json"))
+
+
+def _resolve(cond, thresholds, where):
+    if isinstance(cond, list):
+        return [_resolve(c, thresholds, where) for c in cond]
+    if isinstance(cond, str) and cond.startswith("$"):
+        if cond[1:] not in thresholds:
+            raise ValueError(f"{where}: unknown threshold {cond!r}")
+        return thresholds[cond[1:]]
+    return cond
+
+
+def _field(spec, where):
+    kwargs = dict(spec.get("kwargs") or {})
+    if spec["widget"] == "date_input":
+        for name in _DATE_KWARGS:
+            if isinstance(kwargs.get(name), str):
+                kwargs[name] = date.fromisoformat(kwargs[name])
+    return Field(
+        key=spec["key"],
+        widget=spec["widget"],
+        label=spec["label"],
+        options=spec.get("options"),
+        kwargs=kwargs or None,
+        show_if=tuple(spec["show_if"]) if spec.get("show_if") else None,
+        derive=tuple(spec["derive"]) if spec.get("derive") else None,
+        note=spec.get("note"),
+    )
+
+
+def _compile_profile(spec, table):
+    unknown = (set(spec.get("tags", {})) - set(TAG_DIMS)) | (set(spec.get("numbers", {})) - set(NUMBER_DIMS))
+    if unknown:
+        raise ValueError(f"profile uses unknown dimension(s) {sorted(unknown)}")
+    tags = {dim: [(tag, compile_condition(cond, table.fields)) for tag, cond in conditions.items()]
+            for dim, conditions in spec.get("tags", {}).items()}
+    numbers = spec.get("numbers", {})
+    for field in numbers.values():
+        if field not in table.fields:
+            raise ValueError(f"profile uses unknown field {field!r}")
+
+    def profile(responses):
+        answers = derive_responses(responses, table)
+        return Profile(
+            tags={dim: frozenset(tag for tag, check in checks if check(answers)) for dim, checks in tags.items()},
+            numbers={dim: answers.get(field) for dim, field in numbers.items()},
+        )
+
+    return profile
+
+
+def compile_jurisdiction(definition, where="<definition>"):
+    """Turn a parsed jurisdiction file into a Jurisdiction with a compiled evaluator."""
+    thresholds = definition.get("thresholds", {})
+    fields = definition["fields"]
+    derived = {}
+    for field, (lookup, source) in definition.get("derived", {}).items():
+        if lookup not in LOOKUPS:
+            raise ValueError(f"{where}: derived field {field!r} uses unknown lookup {lookup!r}")
+        derived[field] = (LOOKUPS[lookup], source)
+    rules = [
+        Rule(r["id"], r["section"], _resolve(r["when"], thresholds, f"{where}: rule {r['id']!r}"), r["message"])
+        for r in definition["rules"]
+    ]
+    table = RuleTable(fields=fields, rules=rules, derived=derived or None)
+    try:
+        evaluate = compile_rules(table)
+        profile = _compile_profile(definition["profile"], table) if "profile" in definition else None
+    except ValueError as e:
+        raise ValueError(f"{where}: {e}") from None
+    sections = {}
+    for s in definition["sections"]:
+        sections[s["name"]] = Section(s["name"], s["header"], [_field(f, where) for f in s["fields"]])
+    # Answers are stored per widget, plus any value a widget derives (e.g. years from a start date)
+    widgets = [field for section in sections.values() for field in section.fields]
+    layout = RecordLayout(definition["id"], widgets, fields, [f.derive[0] for f in widgets if f.derive])
+    return Jurisdiction(
+        id=definition["id"],
+        title=definition["title"],
+        intro=definition.get("intro", ""),
+        next_steps=definition.get("next_steps", ""),
+        incomplete=definition.get("incomplete", "Please complete all sections to see your results."),
+        footer=definition.get("footer", ""),
+        as_of=date.fromisoformat(definition["as_of"]),
+        thresholds=thresholds,
+        sections=sections,
+        rules=table,
+        evaluate=evaluate,
+        profile=profile,
+        layout=layout,
+    )
+
+
+@lru_cache(maxsize=None)
+def load_jurisdiction(jurisdiction_id):
+    """Load and compile jurisdictions/<id>.json; cached for the life of the process."""
+    path = os.path.join(JURISDICTIONS_DIR, f"{jurisdiction_id}.json")
+    if not os.path.exists(path):
+        raise ValueError(f"Unknown jurisdiction {jurisdiction_id!r}; "
+                         f"available: {', '.join(available_jurisdictions())}")
+    with open(path, encoding="utf-8") as f:
+        return compile_jurisdiction(json.load(f), where=path)
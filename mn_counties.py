@@ -0,0 +1,133 @@
+import csv
+import difflib
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Index of all 87 Minnesota counties, loaded once per process from
+# data/mn_counties.csv. Columns:
+#   metro       one of the seven Twin Cities metro counties
+#   rural       outside any metropolitan statistical area
+#   distressed  on our local distressed-county list (population loss / high
+#               poverty); refresh it when DEED republishes its designations
+#   aliases     "|"-separated alternate spellings and principal cities
+
+County = namedtuple("County", ["name", "fips", "metro", "rural", "distressed"])
+
+COUNTIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "mn_counties.csv")
+
+# Minimum difflib similarity for a typo to resolve to a county
+FUZZY_CUTOFF = 0.8
+
+# Names at least this long also match any spelling that differs only in its vowels
+# or doubled letters ("Hennipen"); shorter words collide too easily ("Pipe" and Pope)
+SOUNDALIKE_MIN_LETTERS = 6
+
+
+def normalize_county(text):
+    text = str(text).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = re.sub(r"\b(county|cnty|co|mn|minnesota)\b", " ", text)
+    text = re.sub(r"\bsaint\b", "st", text)
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=None)
+def county_index():
+    """Map every normalized name, alias and FIPS code to its County."""
+    index = {}
+    with open(COUNTIES_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            county = County(row["name"], row["fips"], row["metro"] == "1",
+                            row["rural"] == "1", row["distressed"] == "1")
+            keys = [row["name"], *filter(None, row["aliases"].split("|"))]
+            for key in keys:
+                normalized = normalize_county(key)
+                index[normalized] = county
+                index[normalized.replace(" ", "")] = county
+            # Only the full state+county code and the 3-digit county code; shorter
+            # numbers are too easily a house number or a count to stand for a county
+            index[county.fips] = county
+            index[county.fips[2:]] = county
+    return index
+
+
+@lru_cache(maxsize=None)
+def _name_keys():
+    # Typos are matched against names and aliases only, never FIPS codes
+    return [key for key in county_index() if not key.isdigit()]
+
+
+def _soundalike(key):
+    # Every run of vowels becomes one "a", then doubled letters become single
+    return re.sub(r"(.)\1+", r"\1", re.sub(r"[aeiou]+", "a", key.replace(" ", "")))
+
+
+@lru_cache(maxsize=None)
+def _soundalike_index():
+    counties = {}
+    for key, county in county_index().items():
+        if not key.isdigit() and len(key.replace(" ", "")) >= SOUNDALIKE_MIN_LETTERS:
+            counties.setdefault(_soundalike(key), set()).add(county)
+    # A spelling that sounds like two counties resolves to neither
+    return {sound: next(iter(matches)) for sound, matches in counties.items() if len(matches) == 1}
+
+
+@lru_cache(maxsize=4096)
+def lookup_county(text):
+    """Resolve free text to a County, or None.
+
+    Accepts a name or alias, an exact 5- or 3-digit FIPS code, or a misspelt
+    name: one of SOUNDALIKE_MIN_LETTERS or more letters with any vowels changed
+    or letters doubled or undoubled ("Hennipen", "Sherbourne"), or any name
+    within FUZZY_CUTOFF difflib similarity, which allows about one wrong,
+    missing or swapped letter in eight ("Wahsington", "Ramsy"). Numbers are
+    never matched loosely.
+    """
+    if not text:
+        return None
+    index = county_index()
+    key = normalize_county(text)
+    county = index.get(key) or index.get(key.replace(" ", ""))
+    if county is None and key and not key.replace(" ", "").isdigit():
+        if len(key.replace(" ", "")) >= SOUNDALIKE_MIN_LETTERS:
+            county = _soundalike_index().get(_soundalike(key))
+        if county is None:
+            match = difflib.get_close_matches(key, _name_keys(), n=1, cutoff=FUZZY_CUTOFF)
+            county = index[match[0]] if match else None
+    return county
+
+
+def is_metro_county(text):
+    county = lookup_county(text)
+    return county is not None and county.metro
+
+
+def is_rural_county(text):
+    county = lookup_county(text)
+    return county is not None and county.rural
+
+
+def is_distressed_county(text):
+    county = lookup_county(text)
+    return county is not None and county.distressed
+
+
+def canonical_county(text):
+    """One spelling per county: its name if text resolves to one, else None."""
+    county = lookup_county(text)
+    return county.name if county is not None else None
+
+
+def lookup_counties(series):
+    """Resolve a pandas Series of county text; returns a DataFrame of County fields."""
+    import pandas as pd
+
+    # Resolve each distinct spelling once, then broadcast back to the rows
+    uniques = series.dropna().unique()
+    resolved = pd.DataFrame(
+        [lookup_county(value) or (None,) * len(County._fields) for value in uniques],
+        index=uniques, columns=County._fields,
+    )
+    return resolved.reindex(series.to_numpy()).set_index(series.index)
@@ -0,0 +1,249 @@
+import heapq
+import json
+import os
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+
+# Local catalog of concrete grant and assistance programs, matched against a
+# business profile built from a checker's answers (see the "profile" block of
+# jurisdictions/*.json).
+#
+# Each program may require tags (any-of per dimension), prefer tags, and bound
+# numeric answers with inclusive [min, max] ranges (null = open ended). When
+# the catalog is loaded, every criterion is precompiled into bitsets (Python
+# ints with one bit per program):
+#
+#   required[dim][tag]   programs that accept tag for dim
+#   open_to[dim]         programs with no requirement on dim
+#   preferred[dim][tag]  programs that give priority to tag
+#   ranges[dim]          sorted range boundaries plus one bitset per elementary
+#                        segment between them, found with bisect
+#
+# so a query is a handful of ORs and ANDs, and only the surviving programs are
+# scored for the top-k ranking.
+
+PROGRAMS_PATH = os.environ.get(
+    "GRANT_PROGRAMS_CATALOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "programs.json"),
+)
+
+TAG_DIMS = ("scope", "location", "ownership", "industry", "uses")
+NUMBER_DIMS = ("employees", "revenue", "years", "jobs", "wage")
+
+# Scope narrows the catalog to where the business is; it doesn't make a program more specific
+UNSCORED_DIMS = ("scope",)
+
+# A business as the catalog sees it: {dim: frozenset(tags)} and {dim: number or None}
+Profile = namedtuple("Profile", ["tags", "numbers"])
+
+Program = namedtuple("Program", [
+    "id", "name", "agency", "scope", "kind", "award", "url", "summary", "requires", "prefers", "ranges",
+])
+
+Match = namedtuple("Match", ["program", "score", "reasons"])
+
+# Phrases used when explaining a match
+_NUMBER_UNITS = {
+    "employees": "{} employees",
+    "revenue": "${:,.0f} in revenue",
+    "years": "{:g} years in operation",
+    "jobs": "{} new jobs",
+    "wage": "${:,.2f}/hour wages",
+}
+
+
+def _bits(indices, size):
+    # Set bits through a byte buffer; OR-ing 1 << i into a growing int is quadratic
+    buffer = bytearray((size + 7) // 8)
+    for i in indices:
+        buffer[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _members(mask):
+    # Indices of the set bits, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _range_label(dim, low, high):
+    unit = _NUMBER_UNITS[dim]
+    if low is not None and high is not None:
+        return f"{unit.format(low)} to {unit.format(high)}"
+    if low is not None:
+        return f"at least {unit.format(low)}"
+    return f"up to {unit.format(high)}"
+
+
+class ProgramIndex:
+    """Bitset and interval indexes over a list of programs."""
+
+    def __init__(self, programs, labels=None):
+        self.programs = programs
+        self.labels = labels or {}
+        self.all = (1 << len(programs)) - 1
+        self.required, self.open_to, self.preferred = {}, {}, {}
+        for dim in TAG_DIMS:
+            required, preferred, restricted = {}, {}, []
+            for i, program in enumerate(programs):
+                for tag in program.requires.get(dim, ()):
+                    required.setdefault(tag, []).append(i)
+                if dim in program.requires:
+                    restricted.append(i)
+                for tag in program.prefers.get(dim, ()):
+                    preferred.setdefault(tag, []).append(i)
+            self.required[dim] = {tag: _bits(members, len(programs)) for tag, members in required.items()}
+            self.preferred[dim] = {tag: _bits(members, len(programs)) for tag, members in preferred.items()}
+            self.open_to[dim] = self.all & ~_bits(restricted, len(programs))
+        self.ranges = {dim: self._segments(dim) for dim in NUMBER_DIMS}
+        # Programs grouped by how many criteria they target, most specific first, so
+        # ranking can stop once no lower level could reach the current top k
+        self.specificity = []
+        levels = {}
+        for i, program in enumerate(programs):
+            specificity = sum(1 for dim in program.requires if dim not in UNSCORED_DIMS) + len(program.ranges)
+            self.specificity.append(specificity)
+            levels.setdefault(specificity, []).append(i)
+        self.levels = [(level, _bits(levels[level], len(programs))) for level in sorted(levels, reverse=True)]
+
+    def _segments(self, dim):
+        """Split the number line at every boundary used for dim.
+
+        With sorted boundaries b0 < b1 < ..., segment 2j+1 is the point bj and
+        segment 2j is the open interval just below it, so a value's segment is
+        one bisect away. Each segment holds the bitset of programs whose range
+        covers it.
+        """
+        size = len(self.programs)
+        bounded = [(i, p.ranges[dim]) for i, p in enumerate(self.programs) if dim in p.ranges]
+        points = sorted({v for _, bounds in bounded for v in bounds if v is not None})
+        position = {v: j for j, v in enumerate(points)}
+        toggles = [[] for _ in range(2 * len(points) + 2)]
+        for i, (low, high) in bounded:
+            first = 0 if low is None else 2 * position[low] + 1
+            last = 2 * len(points) if high is None else 2 * position[high] + 1
+            toggles[first].append(i)
+            toggles[last + 1].append(i)
+        # Each program's bit switches on at its first segment and off after its last
+        segments, covering = [], 0
+        for members in toggles[:-1]:
+            covering ^= _bits(members, size)
+            segments.append(covering)
+        unbounded = self.all & ~_bits([i for i, _ in bounded], size)
+        return points, segments, unbounded
+
+    def _in_range(self, dim, value):
+        points, segments, unbounded = self.ranges[dim]
+        if value is None:
+            return self.all
+        j = bisect_left(points, value)
+        segment = 2 * j + 1 if j < len(points) and points[j] == value else 2 * j
+        return unbounded | segments[segment]
+
+    def candidates(self, profile):
+        """Bitset of programs whose requirements the profile meets."""
+        mask = self.all
+        for dim in TAG_DIMS:
+            accepted = self.open_to[dim]
+            for tag in profile.tags.get(dim, ()):
+                accepted |= self.required[dim].get(tag, 0)
+            mask &= accepted
+            if not mask:
+                return 0
+        for dim in NUMBER_DIMS:
+            mask &= self._in_range(dim, profile.numbers.get(dim))
+            if not mask:
+                return 0
+        return mask
+
+    def top(self, profile, k=10):
+        """Return up to k Matches, best first.
+
+        Each requirement a program targets (beyond scope) scores 2, so programs
+        aimed at this kind of business rank above ones open to everyone; each
+        priority the business meets scores 1. Ties keep catalog order.
+        """
+        mask = self.candidates(profile)
+        if not mask:
+            return []
+        preferred = [self.preferred[dim][tag] for dim in TAG_DIMS
+                     for tag in profile.tags.get(dim, ()) if tag in self.preferred[dim]]
+        ranked = []  # (-score, index), best first
+        for level, programs in self.levels:
+            if len(ranked) >= k and -ranked[k - 1][0] > 2 * level + len(preferred):
+                break
+            bucket = mask & programs
+            if not bucket:
+                continue
+            hits = {}
+            for bits in preferred:
+                for i in _members(bucket & bits):
+                    hits[i] = hits.get(i, 0) + 1
+            ranked = heapq.nsmallest(k, [*ranked, *((-2 * level - hits.get(i, 0), i) for i in _members(bucket))])
+        return [Match(self.programs[i], -score, self.reasons(self.programs[i], profile)) for score, i in ranked]
+
+    def reasons(self, program, profile):
+        """Explain why a matching program was returned."""
+        label = lambda tag: self.labels.get(tag, tag)
+        reasons = []
+        for dim in TAG_DIMS:
+            if dim in UNSCORED_DIMS:
+                continue
+            met = [t for t in program.requires.get(dim, ()) if t in profile.tags.get(dim, ())]
+            if met:
+                reasons.append(f"Targets {', '.join(map(label, met))}")
+        for dim, (low, high) in program.ranges.items():
+            value = profile.numbers.get(dim)
+            if value is not None:
+                reasons.append(f"Eligible range: {_range_label(dim, low, high)} (you: {_NUMBER_UNITS[dim].format(value)})")
+        for dim in TAG_DIMS:
+            met = [t for t in program.prefers.get(dim, ()) if t in profile.tags.get(dim, ())]
+            if met:
+                reasons.append(f"Gives priority to {', '.join(map(label, met))}")
+        if not reasons:
+            reasons.append("Open to any eligible business")
+        return reasons
+
+
+def _program(spec, where):
+    for key in ("requires", "prefers"):
+        unknown = set(spec.get(key, {})) - set(TAG_DIMS)
+        if unknown:
+            raise ValueError(f"{where}: program {spec.get('id')!r} {key} unknown dimension(s) {sorted(unknown)}")
+    unknown = set(spec.get("ranges", {})) - set(NUMBER_DIMS)
+    if unknown:
+        raise ValueError(f"{where}: program {spec.get('id')!r} ranges unknown dimension(s) {sorted(unknown)}")
+    for dim, (low, high) in spec.get("ranges", {}).items():
+        if low is None and high is None or low is not None and high is not None and low > high:
+            raise ValueError(f"{where}: program {spec.get('id')!r} has an empty or open {dim} range")
+    requires = {dim: tuple(tags) for dim, tags in spec.get("requires", {}).items()}
+    requires["scope"] = (spec["scope"],)
+    return Program(
+        id=spec["id"],
+        name=spec["name"],
+        agency=spec.get("agency", ""),
+        scope=spec["scope"],
+        kind=spec.get("kind", "Grant"),
+        award=spec.get("award", ""),
+        url=spec.get("url", ""),
+        summary=spec.get("summary", ""),
+        requires=requires,
+        prefers={dim: tuple(tags) for dim, tags in spec.get("prefers", {}).items()},
+        ranges={dim: tuple(bounds) for dim, bounds in spec.get("ranges", {}).items()},
+    )
+
+
+def build_index(catalog, where="<catalog>"):
+    """Build a ProgramIndex from a parsed catalog ({"labels": ..., "programs": [...]})."""
+    programs = [_program(spec, where) for spec in catalog["programs"]]
+    return ProgramIndex(programs, catalog.get("labels"))
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path=PROGRAMS_PATH):
+    """Load and index the program catalog; cached for the life of the process."""
+    with open(path, encoding="utf-8") as f:
+        return build_index(json.load(f), where=path)
@@ -0,0 +1,539 @@
+import atexit
+import logging
+import os
+import pickle
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import date
+
+log = logging.getLogger(__name__)
+# Compact per-session storage for checker answers.
+#
+# A jurisdiction's questions are fixed, so each one gets a RecordLayout once per
+# process: a slot per answer key, and for most slots a fixed-width position in a
+# packed buffer. Choice answers are packed as the option's index (one byte),
+# multiselects as a bitmask of options, dates as ordinals and numbers as int64 or
+# float64, following the rule table's field kinds. Only free text is kept as
+# objects. A ResponseRecord is then one small bytearray behind the usual mapping
+# API, so the renderer and the rule evaluators read it like the dict it replaces.
+#
+# Records live in a process-wide SessionRecords store rather than in
+# st.session_state, so idle ones can actually be released. A record unused for
+# GRANT_SESSION_TTL seconds, or the least recently used beyond
+# GRANT_SESSION_MAX_RESIDENT, is spilled to a SQLite file and loaded back
+# transparently if its session returns; spilled records are dropped after
+# GRANT_SESSION_EXPIRE seconds.
+#
+# That store is private to one server process. Setting GRANT_SESSION_STORE to a
+# SQLite path shared by several `streamlit run` workers (e.g. one per core behind
+# a websocket-capable load balancer) switches to SharedRecords instead: records
+# are written to that database and a session is identified by the ?sid= token in
+# its URL, so a reconnect to any worker, or after a restart, picks its answers
+# up again. Each worker keeps a read cache of records, checked against the
+# database when unused for GRANT_SESSION_REVALIDATE seconds, and writes changed
+# ones out in one transaction every GRANT_SESSION_FLUSH seconds.
+
+SESSION_TTL = float(os.environ.get("GRANT_SESSION_TTL", "900"))
+SESSION_EXPIRE = float(os.environ.get("GRANT_SESSION_EXPIRE", "86400"))
+MAX_RESIDENT = int(os.environ.get("GRANT_SESSION_MAX_RESIDENT", "2000"))
+SPILL_DIR = os.environ.get("GRANT_SESSION_SPILL_DIR") or tempfile.gettempdir()
+SHARED_STORE = os.environ.get("GRANT_SESSION_STORE")
+FLUSH_SECONDS = float(os.environ.get("GRANT_SESSION_FLUSH", "0.5"))
+REVALIDATE_SECONDS = float(os.environ.get("GRANT_SESSION_REVALIDATE", "2"))
+
+# Idle records are looked for at most this often
+SWEEP_SECONDS = 30
+
+
+# Codecs for packed slots: (struct format, encode, decode). encode raises
+# ValueError for a value the slot can't represent (an option since removed, a
+# date range, a float typed into an int field); the record then keeps that value
+# as an object so it still round-trips.
+
+def _choice_codec(options):
+    index = {option: i for i, option in enumerate(options)}
+
+    def encode(value):
+        if not isinstance(value, str) or value not in index:
+            raise ValueError(value)
+        return index[value]
+
+    return ("B" if len(options) < 256 else "H"), encode, options.__getitem__
+
+
+def _multi_codec(options):
+    bits = {option: 1 << i for i, option in enumerate(options)}
+
+    def encode(values):
+        try:
+            return sum(bits[value] for value in set(values))
+        except (KeyError, TypeError):
+            raise ValueError(values) from None
+
+    def decode(mask):
+        return [option for i, option in enumerate(options) if mask >> i & 1]
+
+    return "Q", encode, decode
+
+
+def _typed(kind):
+    def encode(value):
+        if type(value) is not kind:
+            raise ValueError(value)
+        return value
+
+    return encode
+
+
+def _encode_date(value):
+    if type(value) is not date:
+        raise ValueError(value)
+    return value.toordinal()
+
+
+_DATE_CODEC = ("i", _encode_date, date.fromordinal)
+_NUMBER_CODECS = {"int": ("q", _typed(int), int), "float": ("d", _typed(float), float)}
+
+
+class RecordLayout:
+    """Slot numbers, packed positions and codecs for one jurisdiction's answers.
+
+    fields are the widgets' Field specs; kinds maps answer keys to the rule table's
+    field kinds, which decide how numbers (including derived ones) are packed.
+    """
+
+    def __init__(self, name, fields, kinds=None, extra_keys=()):
+        kinds = kinds or {}
+        self.name = name
+        keys, codecs = [], []
+        for field in fields:
+            if field.widget == "multiselect" and len(field.options) <= 64:
+                codec = _multi_codec(tuple(field.options))
+            elif field.options is not None and field.widget != "multiselect":
+                codec = _choice_codec(tuple(field.options))
+            elif field.widget == "date_input":
+                codec = _DATE_CODEC
+            else:
+                codec = _NUMBER_CODECS.get(kinds.get(field.key))
+            keys.append(field.key)
+            codecs.append(codec)
+        for key in extra_keys:
+            if key not in keys:
+                keys.append(key)
+                codecs.append(_NUMBER_CODECS.get(kinds.get(key)))
+        self.keys = tuple(keys)
+        self.slots = {key: i for i, key in enumerate(keys)}
+        # Per slot: (Struct, offset, encode, decode) for packed slots, or an index into the record's objects
+        self.packed, self.objects = [], []
+        offset = 0
+        for slot, codec in enumerate(codecs):
+            if codec is None:
+                self.packed.append(None)
+                self.objects.append(slot)
+                continue
+            fmt, encode, decode = codec
+            packer = struct.Struct("<" + fmt)
+            self.packed.append((packer, offset, encode, decode))
+            offset += packer.size
+        self.object_index = {slot: i for i, slot in enumerate(self.objects)}
+        self.size = offset
+        # Spilled records are only loaded back into the layout that wrote them
+        self.signature = f"{name}:" + ",".join(f"{k}={c[0] if c else 'O'}" for k, c in zip(keys, codecs))
+
+    def record(self):
+        return ResponseRecord(self)
+
+
+class ResponseRecord(MutableMapping):
+    """One session's answers packed into a bytearray, with a bitmask of which are set."""
+
+    __slots__ = ("layout", "data", "objects", "present", "extras", "used", "dirty")
+
+    def __init__(self, layout, data=None, objects=None, present=0, extras=None):
+        self.layout = layout
+        self.data = data if data is not None else bytearray(layout.size)
+        self.objects = objects if objects is not None else ([None] * len(layout.objects) or None)
+        self.present = present
+        # Values a packed slot couldn't represent, by slot; usually None
+        self.extras = extras
+        # Last access (time.monotonic), kept by the session store
+        self.used = 0.0
+        # Changed since the shared store last wrote it out
+        self.dirty = False
+
+    def _read(self, slot):
+        if self.extras is not None and slot in self.extras:
+            return self.extras[slot]
+        packed = self.layout.packed[slot]
+        if packed is None:
+            return self.objects[self.layout.object_index[slot]]
+        packer, offset, _, decode = packed
+        return decode(packer.unpack_from(self.data, offset)[0])
+
+    def __getitem__(self, key):
+        slot = self.layout.slots[key]
+        if not self.present >> slot & 1:
+            raise KeyError(key)
+        return self._read(slot)
+
+    def get(self, key, default=None):
+        # Called for every field by the rule evaluators; avoid raising for unanswered ones
+        slot = self.layout.slots.get(key)
+        if slot is None or not self.present >> slot & 1:
+            return default
+        return self._read(slot)
+
+    def __contains__(self, key):
+        slot = self.layout.slots.get(key)
+        return slot is not None and bool(self.present >> slot & 1)
+
+    def __setitem__(self, key, value):
+        slot = self.layout.slots.get(key)
+        if slot is None:
+            raise KeyError(f"{key!r} is not an answer in {self.layout.name}")
+        packed = self.layout.packed[slot]
+        if packed is None:
+            self.objects[self.layout.object_index[slot]] = value
+        else:
+            packer, offset, encode, _ = packed
+            try:
+                packer.pack_into(self.data, offset, encode(value))
+            except (ValueError, struct.error):
+                if self.extras is None:
+                    self.extras = {}
+                self.extras[slot] = value
+            else:
+                if self.extras is not None:
+                    self.extras.pop(slot, None)
+        self.present |= 1 << slot
+        self.dirty = True
+
+    def __delitem__(self, key):
+        slot = self.layout.slots[key]
+        if not self.present >> slot & 1:
+            raise KeyError(key)
+        if self.layout.packed[slot] is None:
+            self.objects[self.layout.object_index[slot]] = None
+        elif self.extras is not None:
+            self.extras.pop(slot, None)
+        self.present &= ~(1 << slot)
+        self.dirty = True
+
+    def __iter__(self):
+        present = self.present
+        return (key for slot, key in enumerate(self.layout.keys) if present >> slot & 1)
+
+    def __len__(self):
+        return bin(self.present).count("1")
+
+    def __repr__(self):
+        return f"ResponseRecord({self.layout.name}, {dict(self)!r})"
+
+    def dumps(self):
+        return pickle.dumps((self.present, bytes(self.data), self.objects, self.extras), pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def loads(cls, layout, data):
+        present, packed, objects, extras = pickle.loads(data)
+        return cls(layout, bytearray(packed), objects, present, extras)
+
+
+_SPILL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spilled (
+    session TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    layout TEXT NOT NULL,
+    data BLOB NOT NULL,
+    spilled_at REAL NOT NULL,
+    PRIMARY KEY (session, scope)
+);
+CREATE INDEX IF NOT EXISTS spilled_at ON spilled (spilled_at);
+"""
+
+
+class SessionRecords:
+    """Resident records by (session id, scope), least recently used first, with a disk spill."""
+
+    # Records are private to this process, keyed by Streamlit's own session id
+    shared = False
+
+    def __init__(self, ttl=SESSION_TTL, max_resident=MAX_RESIDENT, spill_path=None, expire=SESSION_EXPIRE):
+        self.ttl = ttl
+        self.max_resident = max_resident
+        self.expire = expire
+        self.spill_path = spill_path
+        self._resident = OrderedDict()  # (session, scope) -> record, least recently used first
+        self._lock = threading.Lock()
+        self._spill = None
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._resident)
+
+    def get(self, session_id, scope, layout):
+        """The record for this session and scope: resident, loaded back from the spill, or new."""
+        key = (str(session_id), str(scope))
+        now = time.monotonic()
+        with self._lock:
+            record = self._resident.get(key)
+            if record is not None and record.layout is layout:
+                self._resident.move_to_end(key)
+            else:
+                record = self._resident[key] = self._unspill(key, layout) or layout.record()
+            record.used = now
+            if now - self._last_sweep >= SWEEP_SECONDS:
+                self._sweep(now)
+            elif len(self._resident) > self.max_resident:
+                self._spill_lru(now)
+        return record
+
+    def sweep(self):
+        """Spill idle records and drop expired spills now; normally done as a side effect of get()."""
+        with self._lock:
+            self._sweep(time.monotonic())
+
+    def _sweep(self, now):
+        self._last_sweep = now
+        self._spill_lru(now)
+        if self._spill is not None:
+            with self._spill:
+                self._spill.execute("DELETE FROM spilled WHERE spilled_at < ?", (time.time() - self.expire,))
+
+    def _spill_lru(self, now):
+        # Over capacity, spill down to 90% so the next few new sessions don't each pay for a write
+        limit = self.max_resident - self.max_resident // 10 if len(self._resident) > self.max_resident \
+            else self.max_resident
+        spill = []
+        while self._resident:
+            key, record = next(iter(self._resident.items()))
+            if now - record.used < self.ttl and len(self._resident) <= limit:
+                break
+            del self._resident[key]
+            if record:
+                spill.append((*key, record.layout.signature, record.dumps(), time.time()))
+        if spill:
+            with self._spill_db() as db:
+                db.executemany("INSERT OR REPLACE INTO spilled VALUES (?, ?, ?, ?, ?)", spill)
+
+    def _unspill(self, key, layout):
+        if self._spill is None:
+            return None
+        with self._spill:
+            row = self._spill.execute("SELECT layout, data FROM spilled WHERE session = ? AND scope = ?",
+                                      key).fetchone()
+            if row is not None:
+                self._spill.execute("DELETE FROM spilled WHERE session = ? AND scope = ?", key)
+        if row is None or row[0] != layout.signature:
+            return None
+        return ResponseRecord.loads(layout, row[1])
+
+    def _spill_db(self):
+        if self._spill is None:
+            path = self.spill_path
+            if path is None:
+                fd, path = tempfile.mkstemp(prefix="grant-sessions-", suffix=".db", dir=SPILL_DIR)
+                os.close(fd)
+                atexit.register(_remove, path)
+            self._spill = sqlite3.connect(path, check_same_thread=False)
+            # Scratch data that dies with the process; no need to wait for the disk
+            self._spill.execute("PRAGMA synchronous = OFF")
+            self._spill.execute("PRAGMA journal_mode = MEMORY")
+            self._spill.executescript(_SPILL_SCHEMA)
+        return self._spill
+
+    def close(self):
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+    def spilled_count(self):
+        if self._spill is None:
+            return 0
+        with self._lock:
+            return self._spill.execute("SELECT COUNT(*) FROM spilled").fetchone()[0]
+
+
+_SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    layout TEXT NOT NULL,
+    data BLOB NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (session, scope)
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+"""
+
+
+class SharedRecords:
+    """Records kept in a SQLite database shared by worker processes, with a per-worker cache.
+
+    With flush_seconds <= 0 nothing is written until flush() is called.
+
+    Writes are optimistic: each stored record has a version, and a worker only
+    overwrites the version it last read. If another worker saved the session in
+    between (the user reconnected elsewhere), this worker's copy is dropped and
+    the newer answers are read back on next use.
+    """
+
+    # Records are keyed by a session token that survives reconnecting to another worker
+    shared = True
+
+    def __init__(self, path, ttl=SESSION_TTL, max_resident=MAX_RESIDENT, expire=SESSION_EXPIRE,
+                 flush_seconds=FLUSH_SECONDS, revalidate=REVALIDATE_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.max_resident = max_resident
+        self.expire = expire
+        self.flush_seconds = flush_seconds
+        self.revalidate = revalidate
+        self._resident = OrderedDict()  # (session, scope) -> record, least recently used first
+        self._versions = {}             # (session, scope) -> version last read or written; 0 if never stored
+        self._lock = threading.Lock()
+        self._db = None
+        self._flusher = None
+        self._stopped = threading.Event()
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._resident)
+
+    def get(self, session_id, scope, layout):
+        """The record for this session and scope: cached, read from the database, or new."""
+        key = (str(session_id), str(scope))
+        now = time.monotonic()
+        with self._lock:
+            record = self._resident.get(key)
+            if record is not None and record.layout is layout and now - record.used < self.revalidate:
+                self._resident.move_to_end(key)
+            else:
+                record = self._resident[key] = self._load(key, layout, record)
+                self._resident.move_to_end(key)
+            record.used = now
+            if self._flusher is None and self.flush_seconds > 0:
+                self._start_flusher()
+        return record
+
+    def _load(self, key, layout, cached):
+        row = self._connect().execute("SELECT layout, data, version FROM sessions WHERE session = ? AND scope = ?",
+                                      key).fetchone()
+        version = row[2] if row is not None else 0
+        if cached is not None and cached.layout is layout and version == self._versions.get(key):
+            # Nobody else wrote it since; the cached copy (with any unflushed changes) is current
+            return cached
+        self._versions[key] = version
+        if row is None or row[0] != layout.signature:
+            return layout.record()
+        return ResponseRecord.loads(layout, row[1])
+
+    def flush(self):
+        """Write out changed records and release idle ones now; normally done by a background thread."""
+        with self._lock:
+            self._flush(time.monotonic())
+
+    def _flush(self, now):
+        pending = []
+        for key, record in self._resident.items():
+            if record.dirty:
+                # Cleared before the snapshot, so a change made meanwhile marks it for the next flush
+                record.dirty = False
+                pending.append((key, record, record.dumps()))
+        if pending:
+            self._write(pending)
+        limit = self.max_resident - self.max_resident // 10 if len(self._resident) > self.max_resident \
+            else self.max_resident
+        while self._resident:
+            key, record = next(iter(self._resident.items()))
+            if (now - record.used < self.ttl and len(self._resident) <= limit) or record.dirty:
+                break
+            del self._resident[key]
+            self._versions.pop(key, None)
+        if now - self._last_sweep >= SWEEP_SECONDS:
+            self._last_sweep = now
+            db = self._connect()
+            db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.expire,))
+
+    def _write(self, pending):
+        db = self._connect()
+        stored = time.time()
+        conflicts = []
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for key, record, data in pending:
+                version = self._versions.get(key, 0)
+                if version == 0:
+                    cursor = db.execute("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?, 1, ?)",
+                                        (*key, record.layout.signature, data, stored))
+                else:
+                    cursor = db.execute("UPDATE sessions SET layout = ?, data = ?, version = version + 1, "
+                                        "updated_at = ? WHERE session = ? AND scope = ? AND version = ?",
+                                        (record.layout.signature, data, stored, *key, version))
+                if cursor.rowcount:
+                    self._versions[key] = version + 1
+                else:
+                    conflicts.append(key)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            for _, record, _ in pending:
+                record.dirty = True
+            raise
+        for key in conflicts:
+            log.info("session %s/%s was saved by another worker; dropping this worker's copy", *key)
+            self._resident.pop(key, None)
+            self._versions.pop(key, None)
+
+    def _connect(self):
+        if self._db is None:
+            # Autocommit; _write opens its own transactions
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            self._db.executescript(_SHARED_SCHEMA)
+        return self._db
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._flush_loop, name="grant-session-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                log.exception("writing sessions to %s failed; retrying", self.path)
+
+    def sweep(self):
+        self.flush()
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            if self._db is not None:
+                self._flush(time.monotonic())
+                self._db.close()
+                self._db = None
+
+    def stored_count(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Shared by every session in the process (and, with GRANT_SESSION_STORE, every worker)
+SESSION_RECORDS = SharedRecords(SHARED_STORE) if SHARED_STORE else SessionRecords()
@@ -0,0 +1,458 @@
+"""Local JSON scoring API for the eligibility checkers.
+
+Serves the same jurisdiction rules as the Streamlit checkers over HTTP, for
+intake systems that submit answers programmatically:
+
+    python scoring_api.py --port 8765
+    curl -s localhost:8765/v1/score/minnesota \\
+         -d '{"located_in_mn": "Yes", "county": "hennepin", "employees": 12, "ownership_types": ["Women-Owned"]}'
+
+    GET  /v1/jurisdictions         fields, kinds and options each jurisdiction accepts
+    POST /v1/score/<jurisdiction>  a JSON object of answers; returns the canonical
+                                   answers, rule flags, criteria met and feedback
+    GET  /metrics                  OpenMetrics (see app_metrics.py)
+    GET  /healthz
+
+Answers are put in a canonical form before anything else: choices match
+their options case-insensitively, multiselect answers are sets, numbers may
+be strings, a county is its resolved name, and answers equal to the rules'
+defaults are dropped. The canonical form keys an LRU cache of encoded
+results, so repeated and near-identical submissions are answered without
+evaluating anything. Misses that arrive together are evaluated as one
+batch, and a submission already being evaluated is joined, not repeated.
+Unknown fields and invalid values are rejected with a 400 naming each one.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+from string import Formatter
+
+from app_metrics import CONTENT_TYPE, SCORING_BATCH, SCORING_SECONDS, exposition
+from eligibility_rules import FIELD_DEFAULTS, LOOKUPS, MULTI_SEP
+from jurisdiction_engine import available_jurisdictions, load_jurisdiction
+from mn_counties import canonical_county
+
+DEFAULT_HOST = os.environ.get("GRANT_SCORING_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("GRANT_SCORING_PORT", "8765"))
+
+# Encoded results kept, across jurisdictions (about 1.5 KB each)
+CACHE_SIZE = int(os.environ.get("GRANT_SCORING_CACHE", "20000"))
+
+# How long a miss waits for others to batch with; 0 batches the misses read in one event loop pass
+BATCH_WAIT = float(os.environ.get("GRANT_SCORING_BATCH_MS", "0")) / 1000
+MAX_BATCH = 256
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+# Idle keep-alive connections are closed after this many seconds
+IDLE_SECONDS = 30
+
+
+def _county(value):
+    text = " ".join(str(value).split())
+    if not text:
+        return ""
+    county = canonical_county(text)
+    if county is None:
+        raise ValueError("unknown Minnesota county")
+    return county
+
+
+# Free-text answers that rules only see through these lookups are keyed by what the lookup resolves
+TEXT_CANONICAL = {
+    LOOKUPS["is_metro_county"]: _county,
+    LOOKUPS["is_rural_county"]: _county,
+    LOOKUPS["is_distressed_county"]: _county,
+}
+
+_formatter = Formatter()
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+            413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class AnswerError(ValueError):
+    """Answers that cannot be scored; errors maps each offending field to the reason."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(f"{key}: {reason}" for key, reason in errors.items()))
+        self.errors = errors
+
+
+def _condition_fields(cond, found):
+    if cond[0] in ("all", "any", "not"):
+        for part in cond[1:]:
+            _condition_fields(part, found)
+    else:
+        found.add(cond[1])
+    return found
+
+
+def _years_since(value, as_of):
+    return (as_of - date.fromisoformat(value)).days / 365.25
+
+
+def _number(kind):
+    def canonical(value):
+        if isinstance(value, bool):
+            raise ValueError("expected a number")
+        if isinstance(value, str):
+            try:
+                value = float(value.replace(",", ""))
+            except ValueError:
+                raise ValueError("expected a number") from None
+        if not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError("expected a finite number")
+        if kind == "int":
+            if value != int(value):
+                raise ValueError("expected a whole number")
+            return int(value)
+        return float(value) + 0.0  # no -0.0
+    return canonical
+
+
+def _flag(value):
+    if not isinstance(value, bool):
+        raise ValueError("expected true or false")
+    return value
+
+
+def _choice(options):
+    if options is None:
+        return lambda value: " ".join(str(value).split())
+    spellings = {" ".join(option.split()).casefold(): option for option in options}
+    exact = {option: option for option in options}
+
+    def canonical(value):
+        option = exact.get(value) if isinstance(value, str) else None
+        if option is None:
+            option = spellings.get(" ".join(str(value).split()).casefold())
+        if option is None:
+            raise ValueError(f"expected one of {', '.join(options)}")
+        return option
+    return canonical
+
+
+def _multi(options):
+    one = _choice(options)
+    order = {option: i for i, option in enumerate(options or ())}
+
+    def canonical(value):
+        if isinstance(value, str):
+            value = value.split(MULTI_SEP)
+        elif not isinstance(value, (list, tuple)):
+            raise ValueError("expected a list")
+        chosen = {one(v) for v in value if str(v).strip()}
+        return tuple(sorted(chosen, key=lambda v: (order.get(v, len(order)), v)))
+    return canonical
+
+
+@lru_cache(maxsize=None)
+def canonicalizer(jurisdiction_id):
+    """Compile canonical(answers) -> tuple of (field, value) pairs for one jurisdiction."""
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    table = jurisdiction.rules
+    widgets = {field.key: field for section in jurisdiction.sections.values() for field in section.fields}
+    derived = table.derived or {}
+    used = set()
+    for rule in table.rules:
+        _condition_fields(rule.when, used)
+        used.update(name for _, name, _, _ in _formatter.parse(rule.message) if name)
+
+    converters = {}
+    for key, kind in table.fields.items():
+        if key in derived:
+            continue
+        options = widgets[key].options if key in widgets else None
+        if kind in ("int", "float"):
+            converters[key] = _number(kind)
+        elif kind == "multi":
+            converters[key] = _multi(options)
+        elif kind == "choice":
+            converters[key] = _choice(options)
+        elif kind == "text":
+            lookups = {TEXT_CANONICAL.get(lookup) for lookup, source in derived.values() if source == key}
+            if key not in used and len(lookups) == 1 and None not in lookups:
+                converters[key] = lookups.pop()
+            else:
+                # Text answered with a selectbox still has to be one of its options
+                converters[key] = _choice(options)
+        else:
+            converters[key] = _flag
+    # Widgets that only derive a rule field, e.g. a start date giving years operational
+    dates = {field.key: field.derive[0] for field in widgets.values()
+             if field.derive and field.derive[1] == "years_since" and field.derive[0] in converters}
+    defaults = {key: FIELD_DEFAULTS[kind] for key, kind in table.fields.items()}
+    order = {key: i for i, key in enumerate(converters)}
+
+    def canonical(answers):
+        values, errors = {}, {}
+        for key, value in answers.items():
+            if key in dates:
+                if dates[key] in answers or value in (None, ""):
+                    continue
+                try:
+                    key, value = dates[key], _years_since(str(value), jurisdiction.as_of)
+                except ValueError:
+                    errors[key] = "expected an ISO date (YYYY-MM-DD)"
+                    continue
+            convert = converters.get(key)
+            if convert is None:
+                errors[key] = "derived from other answers" if key in derived else "unknown field"
+                continue
+            if value is None:
+                continue
+            try:
+                value = convert(value)
+            except (TypeError, ValueError) as exc:
+                errors[key] = str(exc) or "invalid value"
+                continue
+            # An answer equal to the default scores exactly like a missing one
+            if value != defaults[key]:
+                values[key] = value
+        if errors:
+            raise AnswerError(errors)
+        return tuple(sorted(values.items(), key=lambda item: order[item[0]]))
+
+    return canonical
+
+
+def evaluate(jurisdiction_id, key):
+    """Score one canonical answer set; returns the encoded JSON result."""
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    answers = dict(key)
+    flags, feedback = jurisdiction.evaluate(answers)
+    result = {
+        "jurisdiction": jurisdiction_id,
+        "answers": answers,
+        "met": sum(flags.values()),
+        "total": len(flags),
+        "flags": flags,
+        "feedback": feedback,
+    }
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Scorer:
+    """LRU cache of encoded results in front of batched evaluation; used from one event loop."""
+
+    def __init__(self, cache_size=CACHE_SIZE, batch_wait=BATCH_WAIT, max_batch=MAX_BATCH):
+        self.cache_size, self.batch_wait, self.max_batch = cache_size, batch_wait, max_batch
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._pending = []
+        self._flush_handle = None
+
+    async def score(self, jurisdiction_id, key):
+        """Return (encoded result, "hit" | "shared" | "evaluated") for a canonical answer set."""
+        cache_key = (jurisdiction_id, key)
+        body = self._cache.get(cache_key)
+        if body is not None:
+            self._cache.move_to_end(cache_key)
+            return body, "hit"
+        future = self._in_flight.get(cache_key)
+        if future is not None:
+            return await asyncio.shield(future), "shared"
+        loop = asyncio.get_running_loop()
+        future = self._in_flight[cache_key] = loop.create_future()
+        self._pending.append(cache_key)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = (loop.call_later(self.batch_wait, self._flush) if self.batch_wait
+                                  else loop.call_soon(self._flush))
+        # Shielded so one caller disconnecting doesn't cancel the result for the others
+        return await asyncio.shield(future), "evaluated"
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        SCORING_BATCH.observe(len(batch))
+        for cache_key in batch:
+            future = self._in_flight.pop(cache_key)
+            try:
+                body = evaluate(*cache_key)
+            except Exception as exc:
+                future.set_exception(exc)
+                continue
+            if self.cache_size:
+                self._cache[cache_key] = body
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            future.set_result(body)
+
+    def cache_len(self):
+        return len(self._cache)
+
+
+@lru_cache(maxsize=None)
+def known_jurisdictions():
+    return frozenset(available_jurisdictions())
+
+
+@lru_cache(maxsize=None)
+def describe():
+    """The /v1/jurisdictions body: what each jurisdiction accepts."""
+    result = {}
+    for jurisdiction_id in available_jurisdictions():
+        jurisdiction = load_jurisdiction(jurisdiction_id)
+        derived = jurisdiction.rules.derived or {}
+        fields = {}
+        for section in jurisdiction.sections.values():
+            for field in section.fields:
+                kind = "date" if field.widget == "date_input" else jurisdiction.rules.fields.get(field.key)
+                if kind is None or field.key in derived:
+                    continue
+                fields[field.key] = {"kind": kind, "label": field.label,
+                                     **({"options": field.options} if field.options else {}),
+                                     **({"derives": field.derive[0]} if field.derive else {})}
+        result[jurisdiction_id] = {"title": jurisdiction.title, "as_of": jurisdiction.as_of.isoformat(),
+                                   "rules": len(jurisdiction.rules.rules), "fields": fields}
+    return json.dumps({"jurisdictions": result}, ensure_ascii=False).encode("utf-8")
+
+
+def _json(status, payload):
+    return status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", None
+
+
+async def route(scorer, method, path, body):
+    """Answer one request; returns (status, body, content type, X-Cache value or None)."""
+    path = path.split("?", 1)[0]
+    if path.startswith("/v1/score/"):
+        if method != "POST":
+            return _json(405, {"error": "use POST"})
+        jurisdiction_id = path[len("/v1/score/"):]
+        if jurisdiction_id not in known_jurisdictions():
+            return _json(404, {"error": f"unknown jurisdiction {jurisdiction_id!r}"})
+        start = time.perf_counter()
+        try:
+            answers = json.loads(body or b"{}")
+        except ValueError as exc:
+            return _json(400, {"error": f"malformed JSON: {exc}"})
+        if not isinstance(answers, dict):
+            return _json(400, {"error": "expected a JSON object of answers"})
+        try:
+            key = canonicalizer(jurisdiction_id)(answers)
+        except AnswerError as exc:
+            return _json(400, {"error": "invalid answers", "fields": exc.errors})
+        result, how = await scorer.score(jurisdiction_id, key)
+        SCORING_SECONDS.observe(time.perf_counter() - start, jurisdiction_id, how)
+        return 200, result, "application/json", how
+    if method != "GET":
+        return _json(405 if path in ("/v1/jurisdictions", "/metrics", "/healthz") else 404, {"error": "not found"})
+    if path == "/v1/jurisdictions":
+        return 200, describe(), "application/json", None
+    if path == "/metrics":
+        return 200, exposition().encode("utf-8"), CONTENT_TYPE, None
+    if path == "/healthz":
+        return _json(200, {"status": "ok", "cached": scorer.cache_len()})
+    return _json(404, {"error": "not found"})
+
+
+def _response(status, body, content_type, cache, keep_alive):
+    head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if cache:
+        head.append(f"X-Cache: {cache}")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def handle(scorer, reader, writer):
+    """Serve HTTP/1.1 requests on one connection until it closes or idles out."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            # Closing the transport ends the read below; cheaper than a wait_for task per request
+            idle = loop.call_later(IDLE_SECONDS, writer.close)
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.LimitOverrunError:
+                writer.write(_response(431, b"", "text/plain", None, False))
+                break
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            finally:
+                idle.cancel()
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, path, version = lines[0].split(" ")
+            except ValueError:
+                writer.write(_response(400, b"", "text/plain", None, False))
+                break
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+            if "transfer-encoding" in headers:
+                writer.write(_response(411, b"", "text/plain", None, False))
+                break
+            try:
+                length = int(headers.get("content-length", "0"))
+            except ValueError:
+                length = -1
+            if not 0 <= length <= MAX_BODY_BYTES:
+                writer.write(_response(413 if length > 0 else 400, b"", "text/plain", None, False))
+                break
+            body = await reader.readexactly(length) if length else b""
+            try:
+                status, payload, content_type, cache = await route(scorer, method, path, body)
+            except Exception as exc:
+                status, payload, content_type, cache = _json(500, {"error": f"{type(exc).__name__}: {exc}"})
+            writer.write(_response(status, payload, content_type, cache, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, scorer=None):
+    """Start the API on host:port; returns the asyncio server."""
+    scorer = scorer or Scorer()
+    # Compile every jurisdiction up front so the first requests don't pay for it
+    for jurisdiction_id in available_jurisdictions():
+        canonicalizer(jurisdiction_id)
+    describe()
+    return await asyncio.start_server(lambda r, w: handle(scorer, r, w), host, port, limit=MAX_HEADER_BYTES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=DEFAULT_HOST, help="interface to listen on (default: local only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="encoded results kept; 0 disables")
+    parser.add_argument("--batch-ms", type=float, default=BATCH_WAIT * 1000,
+                        help="how long a miss waits for others to batch with")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="answer sets evaluated per batch")
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = await serve(args.host, args.port, Scorer(args.cache_size, args.batch_ms / 1000, args.max_batch))
+        print(f"Scoring API on http://{args.host}:{args.port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
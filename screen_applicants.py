@@ -0,0 +1,130 @@
+"""Screen applicant files against the eligibility rules without Streamlit.
+
+Reads CSV or JSONL records as a stream, scores them in chunks across a
+process pool and writes results incrementally, in input order:
+
+    python screen_applicants.py federal clients.csv -o results.jsonl
+    cat clients.jsonl | python screen_applicants.py minnesota - --input-format jsonl
+
+Multiselect answers in CSV input are ";"-separated. A "start_date" column is
+turned into years operational when the years column itself is absent.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from eligibility_rules import evaluate_frame
+from jurisdiction_engine import available_jurisdictions, load_jurisdiction
+
+
+def read_chunks(source, input_format, chunk_size):
+    import pandas as pd
+
+    if input_format == "jsonl":
+        return pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False)
+    return pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+
+def derive_years(df, jurisdiction):
+    import pandas as pd
+
+    # Vectorized version of the "years_since" hook the start date widget derives with
+    for section in jurisdiction.sections.values():
+        for field in section.fields:
+            if not field.derive or field.derive[1] != "years_since":
+                continue
+            target = field.derive[0]
+            if target not in df.columns and field.key in df.columns:
+                start = pd.to_datetime(df[field.key], errors="coerce")
+                df[target] = (pd.Timestamp(jurisdiction.as_of) - start).dt.days / 365.25
+    return df
+
+
+def screen_chunk(jurisdiction_id, df, id_column, output_format):
+    """Score one chunk and return it already serialized, so workers do the encoding."""
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    df = derive_years(df, jurisdiction)
+    flags, messages = evaluate_frame(df, jurisdiction.rules)
+    ids = df[id_column].tolist() if id_column in df.columns else df.index.tolist()
+    flag_rows = flags.to_dict("records")
+    message_rows = messages.to_numpy().tolist()
+
+    out = io.StringIO()
+    if output_format == "jsonl":
+        for record_id, row_flags, row_messages in zip(ids, flag_rows, message_rows):
+            feedback = [m for m in row_messages if isinstance(m, str)]
+            json.dump({"id": record_id, "flags": row_flags, "feedback": feedback}, out, default=str, ensure_ascii=False)
+            out.write("\n")
+    else:
+        writer = csv.writer(out)
+        for record_id, row_flags, row_messages in zip(ids, flag_rows, message_rows):
+            feedback = " | ".join(m for m in row_messages if isinstance(m, str))
+            writer.writerow([record_id, *(int(v) for v in row_flags.values()), feedback])
+    return out.getvalue()
+
+
+def run(args, out):
+    table = load_jurisdiction(args.jurisdiction).rules
+    if args.output_format == "csv":
+        csv.writer(out).writerow([args.id_column, *(rule.id for rule in table.rules), "feedback"])
+
+    source = sys.stdin if args.input == "-" else args.input
+    chunks = read_chunks(source, args.input_format, args.chunk_size)
+
+    if args.workers <= 1:
+        for df in chunks:
+            out.write(screen_chunk(args.jurisdiction, df, args.id_column, args.output_format))
+            out.flush()
+        return
+
+    # Keep a bounded window of chunks in flight and write them back in order
+    max_pending = args.workers * 2
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pending = deque()
+        for df in chunks:
+            pending.append(pool.submit(screen_chunk, args.jurisdiction, df, args.id_column, args.output_format))
+            if len(pending) >= max_pending:
+                out.write(pending.popleft().result())
+                out.flush()
+        while pending:
+            out.write(pending.popleft().result())
+            out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen applicant records for grant eligibility.")
+    parser.add_argument("jurisdiction", choices=available_jurisdictions())
+    parser.add_argument("input", nargs="?", default="-", help="CSV or JSONL file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"],
+                        help="defaults to the input file extension, else csv")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"],
+                        help="defaults to the output file extension, else jsonl")
+    parser.add_argument("--id-column", default="id", help="column copied to each result (default: id)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="records per chunk")
+    args = parser.parse_args(argv)
+
+    if args.input_format is None:
+        args.input_format = "jsonl" if args.input.endswith((".jsonl", ".ndjson")) else "csv"
+    if args.output_format is None:
+        args.output_format = "csv" if args.output.endswith(".csv") else "jsonl"
+
+    if args.output == "-":
+        try:
+            run(args, sys.stdout)
+        except BrokenPipeError:
+            # Downstream closed early (e.g. piped into head); stop quietly
+            sys.stderr.close()
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            run(args, out)
+
+
+if __name__ == "__main__":
+    main()
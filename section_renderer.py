@@ -0,0 +1,132 @@
+import re
+import secrets
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from response_records import SESSION_RECORDS
+
+# Shared section registry and renderer for the eligibility checkers.
+#
+# Each checker's sidebar sections are Section/Field specs compiled once per
+# process by jurisdiction_engine.py. Only the selected section is drawn,
+# inside a fragment when the installed Streamlit supports them so widget
+# changes rerun just that section. Answers are committed to the session's
+# ResponseRecord (see response_records.py) from on_change callbacks, so a rerun
+# only writes the value that actually changed.
+#
+# With a shared session store (GRANT_SESSION_STORE, see response_records.py)
+# answers are keyed by a ?sid= token kept in the page URL instead of Streamlit's
+# per-connection session id, so a user who reconnects to another worker, or
+# reloads the page, gets their answers back. The token is the only thing that
+# ties a visitor to their answers; sharing the URL shares them.
+
+# Named callables referenced by Field.derive / Field.note
+HOOKS = {}
+
+
+def hook(name):
+    def register(fn):
+        HOOKS[name] = fn
+        return fn
+    return register
+
+
+_SID = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+
+def _session_id():
+    if SESSION_RECORDS.shared:
+        return st.session_state.responses_sid
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _shared_session_id():
+    # Reuse the token from the URL, or start a new one and put it there
+    sid = st.query_params.get("sid")
+    if not sid or not _SID.fullmatch(sid):
+        sid = secrets.token_urlsafe(16)
+        st.query_params["sid"] = sid
+    return sid
+
+
+# Record layout per scope, registered by init_responses
+_LAYOUTS = {}
+
+
+def _responses():
+    scope = st.session_state.responses_scope
+    return SESSION_RECORDS.get(_session_id(), scope, _LAYOUTS[scope])
+
+
+def init_responses(scope, layout):
+    """This session's answers for scope (e.g. a jurisdiction), as a record with the given layout.
+
+    Only the scope is kept in st.session_state; the record itself lives in
+    SESSION_RECORDS so it can be spilled to disk when the session goes idle, or
+    shared with other workers.
+    """
+    _LAYOUTS[scope] = layout
+    if SESSION_RECORDS.shared and "responses_sid" not in st.session_state:
+        st.session_state.responses_sid = _shared_session_id()
+    st.session_state.responses_scope = scope
+    return _responses()
+
+
+def _store(field, value):
+    responses = _responses()
+    responses[field.key] = value
+    if field.derive:
+        target, name = field.derive
+        responses[target] = HOOKS[name](value)
+
+
+def _commit(field):
+    value = st.session_state[field.key]
+    if _responses().get(field.key) != value:
+        _store(field, value)
+
+
+def _restore_kwargs(field, answer):
+    # Widget default that shows a saved answer again when returning to a section
+    if field.widget == "selectbox":
+        return {"index": field.options.index(answer)} if answer in field.options else {}
+    if field.widget == "multiselect":
+        return {"default": [a for a in answer if a in field.options]}
+    return {"value": answer}
+
+
+def _render_field(field, responses):
+    kwargs = dict(field.kwargs or {})
+    if field.key in responses:
+        kwargs.update(_restore_kwargs(field, responses[field.key]))
+    widget = getattr(st, field.widget)
+    args = (field.label, field.options) if field.options is not None else (field.label,)
+    value = widget(*args, key=field.key, on_change=_commit, args=(field,), **kwargs)
+    if field.key not in responses:
+        _store(field, value)
+    if field.note:
+        HOOKS[field.note](value, responses)
+
+
+def _render_fields(section):
+    responses = _responses()
+    st.header(section.header)
+    for field in section.fields:
+        if field.show_if and responses.get(field.show_if[0]) not in field.show_if[1]:
+            continue
+        _render_field(field, responses)
+
+
+# Wrapped once per process rather than on every rerun
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+_render_fragment = _fragment(_render_fields) if _fragment else _render_fields
+
+
+def render_section(section):
+    """Draw one section's widgets, isolated in a fragment where available.
+
+    Call init_responses first so the answers land in the right scope.
+    """
+    _render_fragment(section)
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# The apps open their stores from the environment at import time, so point them at scratch files first
+SCRATCH = tempfile.mkdtemp(prefix="grant-tests-")
+os.environ["GRANT_DRAFTS_DB"] = os.path.join(SCRATCH, "drafts.db")
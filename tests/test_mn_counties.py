@@ -0,0 +1,42 @@
+import pytest
+
+from mn_counties import lookup_county
+
+# Misspellings seen in real intake answers, and the county each means
+MISSPELLINGS = {
+    "Hennipen": "Hennepin",
+    "Henepin": "Hennepin",
+    "Hennapin": "Hennepin",
+    "Ramsy": "Ramsey",
+    "Ramesy": "Ramsey",
+    "Dakoda": "Dakota",
+    "Wahsington": "Washington",
+    "Sherbourne": "Sherburne",
+    "Olmstead": "Olmsted",
+    "Stearnes": "Stearns",
+    "Itsaca": "Itasca",
+    "Beltrammi": "Beltrami",
+    "Kandiyoi": "Kandiyohi",
+    "Nicolet": "Nicollet",
+    "Le Seur": "Le Sueur",
+    "Pennigton": "Pennington",
+    "Otertail": "Otter Tail",
+    "St Luis": "St. Louis",
+}
+
+
+@pytest.mark.parametrize("text, county", MISSPELLINGS.items())
+def test_misspelt_names_resolve(text, county):
+    assert lookup_county(text).name == county
+
+
+@pytest.mark.parametrize("text, county", [("27053", "Hennepin"), ("053", "Hennepin"), ("27001", "Aitkin"),
+                                          ("Hennepin County, MN", "Hennepin"), ("saint louis", "St. Louis")])
+def test_names_and_fips_codes_resolve(text, county):
+    assert lookup_county(text).name == county
+
+
+@pytest.mark.parametrize("text", ["1", "10", "270", "99999", "Martinique", "Douglas Fir", "Hennessy", "Pipe",
+                                  "Dallas", "Madison", "unknown", ""])
+def test_other_text_resolves_to_nothing(text):
+    assert lookup_county(text) is None
@@ -0,0 +1,15 @@
+import pytest
+
+from scoring_api import AnswerError, canonicalizer
+
+
+def test_county_is_keyed_by_its_resolved_name():
+    canonical = canonicalizer("minnesota")
+    assert dict(canonical({"county": "  hennipen county "}))["county"] == "Hennepin"
+    assert "county" not in dict(canonical({"county": " "}))
+
+
+def test_unknown_county_is_rejected():
+    with pytest.raises(AnswerError) as raised:
+        canonicalizer("minnesota")({"county": "nowhere"})
+    assert raised.value.errors == {"county": "unknown Minnesota county"}
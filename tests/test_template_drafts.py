@@ -0,0 +1,59 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from conftest import REPO_ROOT
+from draft_store import DraftStore
+
+TEMPLATE = os.path.join(REPO_ROOT, "grantwritingtemplatev1.py")
+
+
+def open_draft(at, draft_id):
+    drafts = at.sidebar.selectbox[0]
+    drafts.set_value(next(label for label in drafts.options if label.startswith(f"#{draft_id} "))).run()
+    next(b for b in at.sidebar.button if b.label == "Open Draft").click().run()
+
+
+def save_draft(at):
+    next(b for b in at.sidebar.button if b.label == "Save Draft").click().run()
+
+
+def test_opening_a_partial_draft_clears_the_other_sections():
+    store = DraftStore(os.environ["GRANT_DRAFTS_DB"])
+    [partial] = store.import_drafts([{"Executive Summary": "Imported summary"}])
+
+    at = AppTest.from_file(TEMPLATE, default_timeout=60).run()
+    at.text_input(key="Organization Name").input("Organization A").run()
+    at.text_area(key="Budget").input("secret budget").run()
+    save_draft(at)
+
+    open_draft(at, partial)
+    assert not at.exception
+    assert at.text_area(key="Executive Summary").value == "Imported summary"
+    assert at.text_input(key="Organization Name").value == ""
+    assert at.text_area(key="Budget").value == ""
+
+    save_draft(at)
+    saved = store.load_draft(partial)
+    assert "secret budget" not in saved.values()
+    assert "Organization A" not in saved.values()
+
+
+def draft_caption(at):
+    return next(c.value for c in at.sidebar.caption if c.value.startswith("Draft #"))
+
+
+def test_save_draft_writes_queued_changes():
+    store = DraftStore(os.environ["GRANT_DRAFTS_DB"])
+    at = AppTest.from_file(TEMPLATE, default_timeout=60).run()
+    at.text_input(key="Organization Name").input("Organization B").run()
+    draft_id = at.session_state.draft_id
+    assert draft_caption(at) == f"Draft #{draft_id} saved 0s ago"
+
+    # A second edit within the autosave window is queued, not written yet
+    at.text_area(key="Budget").input("queued budget").run()
+    assert draft_caption(at) == f"Draft #{draft_id} has unsaved changes"
+
+    save_draft(at)
+    assert draft_caption(at) == f"Draft #{draft_id} saved 0s ago"
+    assert store.load_draft(draft_id)["Budget"] == "queued budget"
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Live statistics for the grant template's text sections: word and character
+# counts, Flesch readability, funder length limits and paragraphs repeated
+# across sections.
+#
+# Streamlit reruns the whole script on every edit, so the per-section work is
+# memoized on the section's text: section_stats() is an lru_cache keyed by the
+# string itself (Python caches a str's content hash), and only a section whose
+# text changed since the last rerun is analyzed again. Duplicate detection then
+# only combines the cached paragraph digests, so a rerun stays flat however long
+# the draft grows.
+
+FUNDER_LIMITS_PATH = os.environ.get(
+    "GRANT_FUNDER_LIMITS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "funder_limits.json"),
+)
+
+# Shorter paragraphs (headings, "N/A", list items) repeat legitimately
+MIN_DUPLICATE_WORDS = 8
+
+# Texts kept analyzed; a few sessions' worth of sections
+STATS_CACHE_SIZE = 256
+
+SectionStats = namedtuple("SectionStats", [
+    "words", "characters", "sentences", "syllables",
+    "paragraphs",   # tuple of digests of normalized paragraphs, None for short ones
+])
+
+# A funder type's limit for one section: {"words": n} and/or {"characters": n}
+Limit = namedtuple("Limit", ["unit", "value", "source"])
+
+# Paragraph number (1-based) of a section repeated in other sections
+Duplicate = namedtuple("Duplicate", ["paragraph", "sections"])
+
+_WORD = re.compile(r"[A-Za-z0-9]+(?:['’][A-Za-z]+)*")
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s|$)")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_VOWEL_GROUP = re.compile(r"[aeiouy]+")
+
+
+@lru_cache(maxsize=65536)
+def syllables(word):
+    """Vowel-group estimate of a word's syllables, as used by readability formulas."""
+    word = word.lower()
+    if len(word) <= 3:
+        return 1
+    count = len(_VOWEL_GROUP.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee", "ye")):
+        count -= 1
+    return max(count, 1)
+
+
+def _paragraph_digest(paragraph):
+    words = _WORD.findall(paragraph.lower())
+    if len(words) < MIN_DUPLICATE_WORDS:
+        return None
+    return hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=8).digest()
+
+
+@lru_cache(maxsize=STATS_CACHE_SIZE)
+def section_stats(text):
+    words = _WORD.findall(text)
+    sentences = len(_SENTENCE_END.findall(text)) or (1 if words else 0)
+    return SectionStats(
+        words=len(words),
+        characters=len(text),
+        sentences=sentences,
+        syllables=sum(syllables(word) for word in words),
+        paragraphs=tuple(_paragraph_digest(p) for p in _PARAGRAPH_BREAK.split(text) if p.strip()),
+    )
+
+
+def reading_ease(stats):
+    """Flesch reading ease (higher is easier; 60-70 is plain English), or None for empty text."""
+    if not stats.words:
+        return None
+    return 206.835 - 1.015 * stats.words / stats.sentences - 84.6 * stats.syllables / stats.words
+
+
+def grade_level(stats):
+    """Flesch-Kincaid U.S. school grade, or None for empty text."""
+    if not stats.words:
+        return None
+    return 0.39 * stats.words / stats.sentences + 11.8 * stats.syllables / stats.words - 15.59
+
+
+def reading_label(ease):
+    if ease >= 70:
+        return "easy"
+    if ease >= 60:
+        return "plain English"
+    if ease >= 50:
+        return "fairly difficult"
+    if ease >= 30:
+        return "difficult"
+    return "very difficult"
+
+
+@lru_cache(maxsize=4)
+def load_limits(path=FUNDER_LIMITS_PATH):
+    """{funder type: {section: [Limit]}}; cached for the life of the process."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    limits = {}
+    for source, sections in spec["limits"].items():
+        for section, units in sections.items():
+            for unit, value in units.items():
+                if unit not in ("words", "characters") or not isinstance(value, int) or value <= 0:
+                    raise ValueError(f"{path}: {source} / {section}: bad limit {unit}={value!r}")
+                limits.setdefault(source, {}).setdefault(section, []).append(Limit(unit, value, source))
+    return limits
+
+
+def section_limits(sources, section, limits=None):
+    """The strictest word and character limits any of the selected funder types set for a section."""
+    limits = load_limits() if limits is None else limits
+    strictest = {}
+    for source in sources:
+        for limit in limits.get(source, {}).get(section, ()):
+            if limit.unit not in strictest or limit.value < strictest[limit.unit].value:
+                strictest[limit.unit] = limit
+    return [strictest[unit] for unit in ("words", "characters") if unit in strictest]
+
+
+def duplicate_paragraphs(texts):
+    """{section: [Duplicate]} for paragraphs that appear more than once across {section: text}."""
+    seen = {}
+    for section, text in texts.items():
+        for number, digest in enumerate(section_stats(text).paragraphs, 1):
+            if digest is not None:
+                seen.setdefault(digest, []).append((section, number))
+    duplicates = {}
+    for places in seen.values():
+        if len(places) < 2:
+            continue
+        for section, number in places:
+            others = [other for other, _ in places if other != section] or [section]
+            duplicates.setdefault(section, []).append(Duplicate(number, tuple(dict.fromkeys(others))))
+    for found in duplicates.values():
+        found.sort()
+    return duplicates
@@ -0,0 +1,312 @@
+"""What-if sweeps over the checkers' numeric answers.
+
+Varies one or two numeric answers over a grid, keeps the rest as entered, and
+reports where each rule starts or stops passing:
+
+    python what_if.py federal employees 0 1000
+    python what_if.py minnesota employees 0 100 --y revenue 0 2000000 --answers answers.json
+"""
+import argparse
+import json
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+from eligibility_rules import MULTI_SEP, RuleTable, compile_condition, derive_responses, evaluate_flags
+from jurisdiction_engine import available_jurisdictions, load_jurisdiction
+
+# "How many hires until I qualify?" is answered by evaluating the rule table at
+# every point of a grid in one column-wise pass (eligibility_rules.evaluate_flags
+# over a DataFrame with a row per grid point), not by rerunning the evaluator
+# point by point. Only rules that read a swept answer are evaluated over the
+# grid; the rest are evaluated once. Sweeps are cached per answer set, grid and
+# jurisdiction, so redrawing the Results section with unchanged answers is free.
+
+# Grid points per sweep (all axes together)
+MAX_POINTS = 1_000_000
+DEFAULT_POINTS = 200
+SWEEP_CACHE_SIZE = 32
+
+Axis = namedtuple("Axis", ["field", "values"])
+
+# flags: {rule id: bool array shaped like the grid} for rules that read a swept answer
+# met:   int array shaped like the grid, the number of rules passing at each point
+Sweep = namedtuple("Sweep", ["axes", "flags", "met"])
+
+# rule passes (or stops passing, passes=False) from field=value on
+Flip = namedtuple("Flip", ["rule", "field", "value", "passes"])
+
+
+def _fields_of(cond):
+    if cond[0] in ("all", "any"):
+        return set().union(*(_fields_of(c) for c in cond[1:]))
+    if cond[0] == "not":
+        return _fields_of(cond[1])
+    return {cond[1]}
+
+
+def _limits(cond, field):
+    # Numbers a condition compares field with
+    if cond[0] in ("all", "any"):
+        return [v for c in cond[1:] for v in _limits(c, field)]
+    if cond[0] == "not":
+        return _limits(cond[1], field)
+    if cond[0] in ("lt", "le", "gt", "ge") and cond[1] == field:
+        return [cond[2]]
+    return []
+
+
+def numeric_fields(jurisdiction):
+    """{answer key: label} for the int and float answers the rules read, in question order."""
+    table = jurisdiction.rules
+    used = set().union(*(_fields_of(rule.when) for rule in table.rules))
+    labels = {}
+    for section in jurisdiction.sections.values():
+        for field in section.fields:
+            keys = [(field.key, field.label.rstrip(":"))]
+            if field.derive:
+                # e.g. years operational, derived from a start date
+                keys.append((field.derive[0], field.derive[0].replace("_", " ").capitalize()))
+            for key, label in keys:
+                if table.fields.get(key) in ("int", "float") and key in used:
+                    labels[key] = label
+    return labels
+
+
+def default_range(jurisdiction, field, current=None):
+    """(start, stop) covering every threshold the rules compare field with, and the current answer."""
+    limits = [v for rule in jurisdiction.rules.rules for v in _limits(rule.when, field)]
+    stop = max([2 * v for v in limits] + [2 * (current or 0), 1])
+    return 0, int(stop) if jurisdiction.rules.fields[field] == "int" else float(stop)
+
+
+def grid(jurisdiction, field, start, stop, points=DEFAULT_POINTS):
+    """Evenly spaced values of field from start to stop; whole numbers for int answers."""
+    import numpy as np
+
+    if jurisdiction.rules.fields[field] == "int":
+        start, stop = int(start), int(stop)
+        if stop - start + 1 <= points:
+            return np.arange(start, stop + 1, dtype=np.int64)
+        return np.unique(np.linspace(start, stop, points).round().astype(np.int64))
+    return np.linspace(float(start), float(stop), points)
+
+
+def answers_key(answers):
+    """A hashable form of a session's answers; multiselect choices keep their order."""
+    return tuple(sorted((key, tuple(value) if isinstance(value, list) else value) for key, value in answers.items()))
+
+
+def sweep(jurisdiction, answers, axes, points=DEFAULT_POINTS):
+    """Evaluate the rules over a grid of one or two numeric answers.
+
+    axes is [(field, start, stop), ...]; the other answers are taken from
+    answers. The arrays in the result are shared through the cache and read-only.
+    """
+    axes = tuple((field, start, stop) for field, start, stop in axes)
+    if not 1 <= len(axes) <= 2 or len({field for field, _, _ in axes}) != len(axes):
+        raise ValueError("sweep one or two different answers")
+    for field, _, _ in axes:
+        if jurisdiction.rules.fields.get(field) not in ("int", "float"):
+            raise ValueError(f"{field!r} is not a numeric answer in {jurisdiction.id}")
+    if points ** len(axes) > MAX_POINTS:
+        raise ValueError(f"{points} points per axis is more than {MAX_POINTS:,} grid points")
+    return _sweep(jurisdiction.id, answers_key(answers), axes, points)
+
+
+@lru_cache(maxsize=SWEEP_CACHE_SIZE)
+def _sweep(jurisdiction_id, key, axes, points):
+    import numpy as np
+    import pandas as pd
+
+    jurisdiction = load_jurisdiction(jurisdiction_id)
+    table = jurisdiction.rules
+    answers = derive_responses(dict(key), table)
+    swept = {field for field, _, _ in axes}
+    grid_axes = tuple(Axis(field, grid(jurisdiction, field, start, stop, points)) for field, start, stop in axes)
+    shape = tuple(len(axis.values) for axis in grid_axes)
+
+    varying = [rule for rule in table.rules if _fields_of(rule.when) & swept]
+    varying_ids = {rule.id for rule in varying}
+    flags, _ = jurisdiction.evaluate(answers)
+    met = np.full(shape, sum(passed for rule_id, passed in flags.items() if rule_id not in varying_ids),
+                  dtype=np.int64)
+
+    # One row per grid point, holding only the answers the varying rules read
+    mesh = dict(zip([axis.field for axis in grid_axes],
+                    (m.ravel() for m in np.meshgrid(*(axis.values for axis in grid_axes), indexing="ij"))))
+    needed = set().union(*(_fields_of(rule.when) for rule in varying))
+    size = int(np.prod(shape))
+    columns = {}
+    for field in needed:
+        if field in mesh:
+            columns[field] = mesh[field]
+            continue
+        value = answers.get(field)
+        if table.fields[field] == "multi":
+            value = MULTI_SEP.join(value or ())
+        columns[field] = np.full(size, value, dtype=object)
+    frame = pd.DataFrame(columns)
+    subtable = RuleTable(fields={field: table.fields[field] for field in needed}, rules=varying)
+    result = {}
+    for rule_id, column in evaluate_flags(frame, subtable).items():
+        passed = column.to_numpy().reshape(shape)
+        passed.setflags(write=False)
+        result[rule_id] = passed
+        met += passed
+    met.setflags(write=False)
+    return Sweep(grid_axes, result, met)
+
+
+def _nearest(values, value):
+    import numpy as np
+
+    return int(np.abs(values - (value or 0)).argmin())
+
+
+def _refine(check, answers, field, low, high, passes, whole):
+    # Narrow a change between two grid values down to the first value (whole, or to the cent) where it happens
+    def state(value):
+        return check({**answers, field: value}) == passes
+
+    if whole:
+        while high - low > 1:
+            middle = (low + high) // 2
+            low, high = (low, middle) if state(middle) else (middle, high)
+        return high
+    for _ in range(64):
+        middle = (low + high) / 2
+        if middle in (low, high):
+            break
+        low, high = (low, middle) if state(middle) else (middle, high)
+    cent = round(high, 2)
+    return cent if state(cent) else round(cent + 0.01, 2)
+
+
+def flip_points(jurisdiction, result, answers):
+    """Where each swept rule changes, along each axis, to the exact value rather than the grid's.
+
+    For a two-answer sweep, changes along one axis are read at the grid point
+    nearest the current answer on the other axis.
+    """
+    table = jurisdiction.rules
+    rules = {rule.id: rule for rule in table.rules}
+    answers = derive_responses(answers, table)
+    flips = []
+    for rule_id, passed in result.flags.items():
+        check = compile_condition(rules[rule_id].when, table.fields)
+        for n, axis in enumerate(result.axes):
+            index = [_nearest(other.values, answers.get(other.field)) for other in result.axes]
+            at = {other.field: other.values[i].item() for other, i in zip(result.axes, index)}
+            index[n] = slice(None)
+            line = passed[tuple(index)]
+            for i in (line[1:] != line[:-1]).nonzero()[0] + 1:
+                value = _refine(check, {**answers, **at}, axis.field, axis.values[i - 1].item(),
+                                axis.values[i].item(), bool(line[i]), table.fields[axis.field] == "int")
+                flips.append(Flip(rule_id, axis.field, value, bool(line[i])))
+    return flips
+
+
+def format_value(jurisdiction, field, value):
+    return f"{value:,}" if jurisdiction.rules.fields[field] == "int" else f"{value:,.2f}"
+
+
+# Heat map cells per axis; a finer grid is sampled down for drawing
+CHART_CELLS = 50
+
+
+def sweep_chart(result, labels, flips=(), answers=None):
+    """A Vega-Lite spec of the rules passing over the sweep: a step line, or a heat map for two answers.
+
+    labels maps answer keys to axis titles; flips are marked on a one-answer
+    line, and the current answers as a point on a heat map. The data is inline
+    in each layer, so drawing it needs neither pandas nor Arrow.
+    """
+    import numpy as np
+
+    x = result.axes[0]
+    if len(result.axes) == 1:
+        # A step line only needs the points where the count changes, and the ends
+        keep = np.concatenate(([0], (result.met[1:] != result.met[:-1]).nonzero()[0] + 1, [len(x.values) - 1]))
+        layers = [{
+            "data": {"values": [{"x": v, "met": m} for v, m in zip(x.values[keep].tolist(), result.met[keep].tolist())]},
+            "mark": {"type": "line", "interpolate": "step-after"},
+            "encoding": {"x": {"field": "x", "type": "quantitative", "title": labels[x.field]},
+                         "y": {"field": "met", "type": "quantitative", "title": "Checks passing"}},
+        }]
+        if flips:
+            layers.append({
+                "data": {"values": [{"x": flip.value, "rule": flip.rule} for flip in flips]},
+                "mark": {"type": "rule", "strokeDash": [4, 4]},
+                "encoding": {"x": {"field": "x", "type": "quantitative"},
+                             "tooltip": {"field": "rule", "type": "nominal"}},
+            })
+        return {"layer": layers}
+
+    y = result.axes[1]
+    step_x = -(-len(x.values) // CHART_CELLS)
+    step_y = -(-len(y.values) // CHART_CELLS)
+    xs, ys = x.values[::step_x], y.values[::step_y]
+    # Each cell spans to the next sampled value
+    x2 = np.append(xs[1:], x.values[-1]).tolist()
+    y2 = np.append(ys[1:], y.values[-1]).tolist()
+    met = result.met[::step_x, ::step_y].tolist()
+    cells = [{"x": xv, "x2": x2[i], "y": yv, "y2": y2[j], "met": met[i][j]}
+             for i, xv in enumerate(xs.tolist()) for j, yv in enumerate(ys.tolist())]
+    layers = [{
+        "data": {"values": cells},
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "x", "type": "quantitative", "title": labels[x.field]}, "x2": {"field": "x2"},
+            "y": {"field": "y", "type": "quantitative", "title": labels[y.field]}, "y2": {"field": "y2"},
+            "color": {"field": "met", "type": "quantitative", "title": "Checks passing",
+                      "scale": {"scheme": "greens"}},
+            "tooltip": [{"field": "x", "type": "quantitative", "title": labels[x.field]},
+                        {"field": "y", "type": "quantitative", "title": labels[y.field]},
+                        {"field": "met", "type": "quantitative", "title": "Checks passing"}],
+        },
+    }]
+    if answers is not None:
+        layers.append({
+            "data": {"values": [{"x": answers.get(x.field) or 0, "y": answers.get(y.field) or 0}]},
+            "mark": {"type": "point", "color": "red", "size": 80, "filled": True},
+            "encoding": {"x": {"field": "x", "type": "quantitative"}, "y": {"field": "y", "type": "quantitative"}},
+        })
+    return {"layer": layers}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jurisdiction", choices=available_jurisdictions())
+    parser.add_argument("x", help="numeric answer to vary")
+    parser.add_argument("start", type=float)
+    parser.add_argument("stop", type=float)
+    parser.add_argument("--y", nargs=3, metavar=("FIELD", "START", "STOP"), help="a second answer to vary")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="grid points per axis")
+    parser.add_argument("--answers", help="JSON file of the other answers (default: none given)")
+    args = parser.parse_args(argv)
+
+    jurisdiction = load_jurisdiction(args.jurisdiction)
+    answers = {}
+    if args.answers:
+        with open(args.answers, encoding="utf-8") as f:
+            answers = json.load(f)
+    axes = [(args.x, args.start, args.stop)]
+    if args.y:
+        axes.append((args.y[0], float(args.y[1]), float(args.y[2])))
+    try:
+        result = sweep(jurisdiction, answers, axes, args.points)
+    except ValueError as e:
+        parser.error(str(e))
+    flips = flip_points(jurisdiction, result, answers)
+    for flip in flips:
+        print(f"{flip.rule}: {'passes' if flip.passes else 'stops passing'} from "
+              f"{flip.field} = {format_value(jurisdiction, flip.field, flip.value)}")
+    if not flips:
+        print("No rule changes over this range.")
+    print(f"Rules passing: {result.met.min()} to {result.met.max()} of {len(jurisdiction.rules.rules)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())